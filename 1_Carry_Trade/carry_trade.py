@@ -1,13 +1,14 @@
 import sys
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
 from datetime import datetime, timedelta
 
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import get_banxico_series
+from utils import get_banxico_series_batch, get_yahoo_history, write_table
+from freq_panel import as_panel
+import charts
+import metrics
 
 # IDs
 ID_TIIE_FONDEO = 'SF60648'
@@ -25,18 +26,17 @@ def fetch_data():
     s_start = start_date.strftime('%Y-%m-%d')
     s_end = end_date.strftime('%Y-%m-%d')
     
-    df_fondeo = get_banxico_series(ID_TIIE_FONDEO, s_start, s_end, "TIIE Fondeo")
-    df_tiie28 = get_banxico_series(ID_TIIE_28, s_start, s_end, "TIIE 28d")
-    df_cetes28 = get_banxico_series(ID_CETES_28, s_start, s_end, "Cetes 28d")
-    df_cetes364 = get_banxico_series(ID_CETES_364, s_start, s_end, "Cetes 364d")
-    
-    # Merge Banxico Data
-    dfs = [df_fondeo, df_tiie28, df_cetes28, df_cetes364]
-    df_mx = pd.concat(dfs, axis=1)
+    # Single round trip for all Banxico series
+    df_mx = get_banxico_series_batch(
+        [ID_TIIE_FONDEO, ID_TIIE_28, ID_CETES_28, ID_CETES_364],
+        s_start, s_end,
+        ["TIIE Fondeo", "TIIE 28d", "Cetes 28d", "Cetes 364d"]
+    )
+    panel = as_panel(df_mx)
     
     print("Fetching External Data (FED Rates)...")
     # Using 13 Week Treasury Bill (^IRX) as proxy for short term risk-free rate
-    fed_data = yf.download("^IRX", start=s_start, end=s_end, progress=False)
+    fed_data = get_yahoo_history("^IRX", s_start, s_end)
     if not fed_data.empty:
         # yfinance returns multi-index columns sometimes, handle 'Close'
         try:
@@ -44,25 +44,17 @@ def fetch_data():
             if isinstance(fed_series, pd.DataFrame):
                  fed_series = fed_series.iloc[:, 0]
             
-            # Reindex to match MX data logic (fill weekends or just join)
-            # We will join on index (Date)
-            fed_df = pd.DataFrame(fed_series)
-            fed_df.columns = ['FED Rate (Proxy 13W)']
-            fed_df.index = pd.to_datetime(fed_df.index).tz_localize(None)
-            
-            df_mx = df_mx.join(fed_df, how='outer')
+            # US trading days differ from Mexican ones; the panel keeps both calendars
+            panel.add('FED Rate (Proxy 13W)', fed_series)
         except Exception as e:
             print(f"Error processing FED data: {e}")
-            
-    # Fill Forward for missing weekends where applicable (rates usually hold)
-    df_mx = df_mx.ffill()
-    df_mx.dropna(inplace=True) # Drop beginning NaNs
-    
     
-    return df_mx
+    return panel
 
-def analyze_carry_trade(df):
-    results = df.copy()
+def analyze_carry_trade(panel):
+    # Rates hold until the next print: every series as of each date, from the date
+    # all of them have started
+    results = as_panel(panel).align().dropna()
     
     # 1. Liquidity Spread: TIIE 28d - TIIE Fondeo
     results['Liquidity Spread'] = results['TIIE 28d'] - results['TIIE Fondeo']
@@ -77,39 +69,39 @@ def analyze_carry_trade(df):
         
     return results
 
+def draw_liquidity_spread(fig, df):
+    ax = fig.subplots()
+    ax.plot(df.index, df['Liquidity Spread'], label='Spread TIIE 28d - Fondeo')
+    ax.set_title('Liquidity Spread (Market Stress Proxy)')
+    ax.axhline(y=0, color='r', linestyle='--', alpha=0.3)
+    ax.legend()
+    ax.grid(True)
+
+def draw_yield_curve(fig, df):
+    ax = fig.subplots()
+    ax.plot(df.index, df['Yield Curve Slope'], label='Slope (Cetes 364 - 28)', color='orange')
+    ax.set_title('Yield Curve Slope (Recession Signal if < 0)')
+    ax.axhline(y=0, color='r', linestyle='--', linewidth=2)
+    ax.fill_between(df.index, df['Yield Curve Slope'], 0, where=(df['Yield Curve Slope'] < 0), color='red', alpha=0.3)
+    ax.legend()
+    ax.grid(True)
+
+def draw_carry_spread(fig, df):
+    ax = fig.subplots()
+    ax.plot(df.index, df['Carry Spread (bp)'], label='MXN-USD Spread (bp)', color='green')
+    ax.set_title('Carry Trade Attractiveness (Spread vs FED)')
+    ax.axhline(y=400, color='r', linestyle='--', label='Critical Level (400bp)')
+    ax.legend()
+    ax.grid(True)
+
 def plot_analysis(df):
-    # Plot Liquidity Spread
-    plt.figure(figsize=(10, 5))
-    plt.plot(df.index, df['Liquidity Spread'], label='Spread TIIE 28d - Fondeo')
-    plt.title('Liquidity Spread (Market Stress Proxy)')
-    plt.axhline(y=0, color='r', linestyle='--', alpha=0.3)
-    plt.legend()
-    plt.grid(True)
-    plt.savefig('liquidity_spread.png')
-    plt.close()
-    
-    # Plot Yield Curve
+    """Queue the PNGs on the chart workers (skipped when their data is unchanged)"""
+    futures = [charts.render_async(save_path('liquidity_spread.png'), draw_liquidity_spread, df[['Liquidity Spread']])]
     if 'Yield Curve Slope' in df.columns:
-        plt.figure(figsize=(10, 5))
-        plt.plot(df.index, df['Yield Curve Slope'], label='Slope (Cetes 364 - 28)', color='orange')
-        plt.title('Yield Curve Slope (Recession Signal if < 0)')
-        plt.axhline(y=0, color='r', linestyle='--', linewidth=2)
-        plt.fill_between(df.index, df['Yield Curve Slope'], 0, where=(df['Yield Curve Slope'] < 0), color='red', alpha=0.3)
-        plt.legend()
-        plt.grid(True)
-        plt.savefig('yield_curve.png')
-        plt.close()
-        
-    # Plot Carry Spread
+        futures.append(charts.render_async(save_path('yield_curve.png'), draw_yield_curve, df[['Yield Curve Slope']]))
     if 'Carry Spread (bp)' in df.columns:
-        plt.figure(figsize=(10, 5))
-        plt.plot(df.index, df['Carry Spread (bp)'], label='MXN-USD Spread (bp)', color='green')
-        plt.title('Carry Trade Attractiveness (Spread vs FED)')
-        plt.axhline(y=400, color='r', linestyle='--', label='Critical Level (400bp)')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig('carry_spread.png')
-        plt.close()
+        futures.append(charts.render_async(save_path('carry_spread.png'), draw_carry_spread, df[['Carry Spread (bp)']]))
+    return futures
 
 def save_path(filename):
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
@@ -120,29 +112,14 @@ def main():
         print("No data fetched.")
         return
         
-    df_analyzed = analyze_carry_trade(df)
+    with metrics.span("analyze", pillar="carry_trade"):
+        df_analyzed = analyze_carry_trade(df)
     
     # Save Data
-    df_analyzed.to_csv(save_path('carry_trade_data.csv'))
-    print(f"Data saved to {save_path('carry_trade_data.csv')}")
-    
-    # Plot
-    # Update plot_analysis to take a directory or handle paths inside
-    # Ideally refactor plot_analysis to return figures or save using save_path
-    # For quick fix, let's just change CWD or pass paths.
-    # Passing paths is cleaner but requires modifying plot_analysis signature.
-    # Let's simple change plot_analysis to save using save_path provided globally or passed.
-    
-    plot_analysis(df_analyzed) # This still saves to CWD. Let's patch imports/functions.
-    
-    # Actually, easiest is to just chdir to script dir at start of main
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    df_analyzed.to_csv('carry_trade_data.csv')
-    print("Data saved to carry_trade_data.csv")
-    
-    plot_analysis(df_analyzed)
-    print("Plots generated: liquidity_spread.png, yield_curve.png, carry_spread.png")
+    print(f"Data saved to {write_table(df_analyzed, save_path('carry_trade_data'))}")
+
+    # Plot (rendered in the background while the signals are printed)
+    plots = plot_analysis(df_analyzed)
 
     # Latest Signals
     last = df_analyzed.iloc[-1]
@@ -156,6 +133,8 @@ def main():
     if 'Carry Spread (bp)' in df_analyzed.columns:
         print(f"Carry Spread: {last['Carry Spread (bp)']:.0f} bp " + ("(LOW ATTRACTIVENESS)" if last['Carry Spread (bp)'] < 400 else "(HEALTHY)"))
 
+    print(f"\nPlots: {', '.join(charts.wait(plots))}")
+
 
 if __name__ == "__main__":
     main()
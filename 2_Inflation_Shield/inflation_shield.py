@@ -1,11 +1,11 @@
 import sys
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import get_banxico_series
+from utils import get_banxico_series_batch, write_table
+from freq_panel import as_of, as_panel
+import metrics
 
 # IDs
 ID_UDI = 'SP68257'
@@ -22,66 +22,59 @@ def fetch_data():
     s_start = start_date.strftime('%Y-%m-%d')
     s_end = end_date.strftime('%Y-%m-%d')
     
-    # Fetch
-    df_udi = get_banxico_series(ID_UDI, s_start, s_end, "UDI")
-    df_bono10 = get_banxico_series(ID_BONO_M_10, s_start, s_end, "Bono M 10y")
-    df_udibono10 = get_banxico_series(ID_UDIBONO_10, s_start, s_end, "Udibono 10y")
-    
-    # Real Rate Data
-    df_cetes = get_banxico_series(ID_CETES_28, s_start, s_end, "Cetes 28d")
-    # INPC is monthly. 
-    df_inpc = get_banxico_series(ID_INPC_MENSUAL, s_start, s_end, "INPC")
+    # Fetch (single round trip; INPC is monthly, Cetes 28d is for the Real Rate)
+    df = get_banxico_series_batch(
+        [ID_UDI, ID_BONO_M_10, ID_UDIBONO_10, ID_CETES_28, ID_INPC_MENSUAL],
+        s_start, s_end,
+        ["UDI", "Bono M 10y", "Udibono 10y", "Cetes 28d", "INPC"]
+    )
     
     # Fallback for Udibono
-    if df_udibono10.empty:
+    if 'Udibono 10y' not in df.columns:
          print(f"Warning: Udibono ID {ID_UDIBONO_10} failed. Using nulls.")
-         df_udibono10 = pd.DataFrame()
-    
-    dfs = [df_udi, df_bono10, df_udibono10, df_cetes, df_inpc]
-    df = pd.concat(dfs, axis=1)
-    
-    # Forward fill to daily logic for most rates, but INPC is monthly.
-    df = df.ffill()
-    df.dropna(inplace=True)
-    
     
-    return df
+    # Each series stays at its own frequency (INPC is monthly); see freq_panel.py
+    return as_panel(df)
 
-def analyze_inflation(df):
-    results = df.copy()
+def analyze_inflation(panel):
+    panel = as_panel(panel)
+
+    # Daily output on the daily series' dates; monthly values (INPC) as of each day.
+    # Rows before every series has started are dropped.
+    daily = [name for name in panel.names if panel.freq(name) in ('D', 'B')]
+    results = panel.align(panel.calendar(daily or None)).dropna()
     
     # 1. Breakeven
     if 'Bono M 10y' in results.columns and 'Udibono 10y' in results.columns:
         results['Breakeven Inflation'] = results['Bono M 10y'] - results['Udibono 10y']
         
     # 2. UDI Velocity
-    if 'UDI' in results.columns:
-        results['UDI Velocity (%)'] = results['UDI'].pct_change() * 100
+    if 'UDI' in panel:
+        results['UDI Velocity (%)'] = as_of(panel.pct_change('UDI'), results.index)
 
     # 3. Real Rate Ex-Post (Cetes - Annual Inflation)
-    # Calculate Annual Inflation first
-    if 'INPC' in results.columns:
-        # We need YoY change. Shifts approx 365 days? 
-        # Refine: INPC is strictly monthly but ffilled. 365 days would be 365 rows if daily.
-        # Let's assume daily rows (ffilled).
-        results['Inflation YoY'] = results['INPC'].pct_change(periods=360) * 100 # Approx
+    if 'INPC' in panel:
+        # Calendar-exact YoY on the monthly INPC, then carried to the daily rows
+        results['Inflation YoY'] = as_of(panel.yoy('INPC'), results.index)
         
         if 'Cetes 28d' in results.columns:
             results['Real Rate Ex-Post'] = results['Cetes 28d'] - results['Inflation YoY']
     
     return results
 
+def save_path(filename):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+
 def main():
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
     df = fetch_data()
     if df.empty:
         print("No data fetched.")
         return
         
-    df_analyzed = analyze_inflation(df)
-    df_analyzed.to_csv('inflation_data.csv')
-    print("Data saved to inflation_data.csv")
+    with metrics.span("analyze", pillar="inflation"):
+        df_analyzed = analyze_inflation(df)
+    write_table(df_analyzed, save_path('inflation_data'))
+    print("Data saved to inflation_data.arrow")
     
     last = df_analyzed.iloc[-1]
     print("\n--- LATEST SIGNALS ---")
@@ -2,16 +2,21 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import get_banxico_series
+from utils import get_banxico_series, get_yahoo_history, write_table, read_table
+from streaming_indicators import RiskIndicatorState, VOL_Z_WINDOW
+import metrics
 
 # IDs
 ID_RESERVAS = 'SF43707' 
 TICKER_USDMXN = 'USDMXN=X'
 
+# Streaming indicator state persisted between runs
+STATE_FILE = 'risk_state.json'
+HISTORY_DAYS = 365
+
 def fetch_data():
     print("Fetching Risk Data (Advanced)...")
     end_date = datetime.now()
@@ -20,7 +25,7 @@ def fetch_data():
     # 1. Fetch USD/MXN from Yahoo Finance for OHLC (Candles)
     print(f"Fetching {TICKER_USDMXN} for Candles...")
     try:
-        df_fx = yf.download(TICKER_USDMXN, start=start_date, end=end_date, progress=False)
+        df_fx = get_yahoo_history(TICKER_USDMXN, start_date, end_date)
         # Handle MultiIndex common in new yfinance
         if isinstance(df_fx.columns, pd.MultiIndex):
             df_fx.columns = df_fx.columns.get_level_values(0)
@@ -57,19 +62,20 @@ def analyze_risk(df_fx, df_reservas):
     df_fx['Volatility_30d'] = df_fx['Log_Ret'].rolling(window=30).std() * np.sqrt(252) * 100
     
     # Z-Score of Volatility (vs last 1 year mean/std of the volatility itself)
-    vol_mean = df_fx['Volatility_30d'].mean()
-    vol_std = df_fx['Volatility_30d'].std()
+    # Trailing window, so every row matches what RiskIndicatorState produced on that day
+    vol_window = df_fx['Volatility_30d'].rolling(window=VOL_Z_WINDOW, min_periods=1)
+    vol_mean = vol_window.mean()
+    vol_std = vol_window.std()
     df_fx['Vol_Z_Score'] = (df_fx['Volatility_30d'] - vol_mean) / (vol_std + 1e-9)
     
     # Check for Squeeze (Band Width)
     df_fx['Band_Width'] = (df_fx['Upper_Band'] - df_fx['Lower_Band']) / df_fx['SMA_20']
     
+    return add_reservas(df_fx, df_reservas)
+
+def add_reservas(df_fx, df_reservas):
     # --- RESERVAS ANALYSIS ---
-    # Merge Reservas logic later or save separately. 
-    # For now, let's keep them separate in the return or merge to a daily summary.
-    # We will save df_fx as the main risk data, and Reservas as a single current metric or separate csv.
-    # Let's merge Reservas to daily fx index (ffill)
-    
+    # Merge Reservas to daily fx index (ffill)
     if not df_reservas.empty:
         # Reindex Reservas
         # Ensure indexes are tz-naive
@@ -83,21 +89,60 @@ def analyze_risk(df_fx, df_reservas):
         
     return df_fx
 
+def analyze_risk_incremental(df_fx, df_reservas, state, previous):
+    """
+    Push only the bars at or after the state's last bar through the streaming state
+    and append them to the previous output. Returns None when a full recompute is needed,
+    including when the previous output does not end on the state's last bar (a run that
+    stopped between the two writes).
+    """
+    if state is None or previous.empty or state.last_date not in df_fx.index:
+        return None
+    if previous.index[-1].normalize() != state.last_date.normalize():
+        print("Risk state does not match risk_data, rebuilding from full history")
+        return None
+
+    new_rows = state.update_frame(df_fx[df_fx.index >= state.last_date])
+    history = previous[previous.index < state.last_date.normalize()]
+    history = history[[c for c in new_rows.columns if c in history.columns]]
+    df = pd.concat([history, new_rows])
+    df = df[df.index >= df.index[-1] - timedelta(days=HISTORY_DAYS)]
+    print(f"Incremental update: {len(new_rows)} bar(s) pushed through indicator state")
+    return add_reservas(df, df_reservas)
+
+def save_path(filename):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+
+def load_previous(path):
+    try:
+        return read_table(path)
+    except Exception as e:
+        print(f"Could not read previous risk data: {e}")
+        return pd.DataFrame()
+
 def main():
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
     df_fx, df_reservas = fetch_data()
     if df_fx.empty:
         print("No FX data fetched.")
         return
         
-    df_analyzed = analyze_risk(df_fx, df_reservas)
+    state = RiskIndicatorState.load(save_path(STATE_FILE))
+    previous = load_previous(save_path('risk_data'))
+
+    with metrics.span("analyze", pillar="risk"):
+        df_analyzed = analyze_risk_incremental(df_fx, df_reservas, state, previous)
+        if df_analyzed is None:
+            df_analyzed = analyze_risk(df_fx, df_reservas)
+            # Bootstrap the streaming state from the full history (one pass)
+            state = RiskIndicatorState.from_frame(df_fx[['Open', 'High', 'Low', 'Close']])
     
     # Verify Columns
     print(f"Columns: {df_analyzed.columns}")
     
-    df_analyzed.to_csv('risk_data.csv')
-    print("Data saved to risk_data.csv")
+    # Output first, then the state: the state must never be ahead of the output
+    write_table(df_analyzed, save_path('risk_data'))
+    state.save(save_path(STATE_FILE))
+    print("Data saved to risk_data.arrow")
 
     # Signals
     if not df_analyzed.empty:
@@ -1,12 +1,13 @@
 import sys
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
 from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import get_banxico_series
+from utils import get_banxico_series, get_yahoo_history, write_table
+from freq_panel import FrequencyPanel, as_of, as_panel
+import charts
+import metrics
 
 # IDs
 ID_M1 = 'SF61745' # Billetes y Monedas (Daily Liquidity Proxy)
@@ -30,83 +31,73 @@ def fetch_data():
     # IPC
     print("Fetching IPC Data...")
     try:
-        ipc_data = yf.download(TICKER_IPC, start=s_start, end=s_end, progress=False)
+        ipc_data = get_yahoo_history(TICKER_IPC, s_start, s_end)
     except Exception as e:
         print(f"Error fetching IPC download: {e}")
         ipc_data = pd.DataFrame()
 
+    # M1 and the IPC keep their own frequencies (see freq_panel.py)
+    panel = as_panel(df_m1) if not df_m1.empty else FrequencyPanel()
     try:
         if not ipc_data.empty:
             ipc_series = ipc_data['Close']
             if isinstance(ipc_series, pd.DataFrame):
                  ipc_series = ipc_series.iloc[:, 0]
-            df_ipc = pd.DataFrame(ipc_series)
-            df_ipc.columns = ['IPC Index']
-            df_ipc.index = pd.to_datetime(df_ipc.index).tz_localize(None)
-        else:
-            df_ipc = pd.DataFrame()
+            panel.add('IPC Index', ipc_series)
     except Exception as e:
         print(f"Error processing IPC: {e}")
-        df_ipc = pd.DataFrame()
-        
-    dfs = [df_m1, df_ipc]
-    df = pd.concat(dfs, axis=1)
     
-    # Ensure M1 column exists to prevent crash
-    if 'M1' not in df.columns:
+    # Ensure M1 exists to prevent crash
+    if 'M1' not in panel:
         print("Warning: M1 data missing. Creating empty column.")
-        df['M1'] = float('nan')
-    
-    # Forward fill (M1 has different freq, IPC daily)
-    df = df.ffill()
-    # df.dropna(inplace=True) # Keep data even if partial
-    return df
+        panel.add('M1', pd.Series(dtype=float))
+    return panel
 
-def analyze_economy(df):
-    results = df.copy()
+def analyze_economy(panel):
+    panel = as_panel(panel)
+    # M1 and IPC as of every date either was observed (partial rows are kept)
+    results = panel.align(names=['M1', 'IPC Index'] if 'IPC Index' in panel else ['M1'])
     
     # Normalize to compare divergence
-    # Rebase to 100 at start
-    if 'M1' in results.columns and 'IPC Index' in results.columns:
-        # Use first valid index to avoid NaN if start date has no data
-        first_valid_m1 = results['M1'].first_valid_index()
-        first_valid_ipc = results['IPC Index'].first_valid_index()
-        
-        m1_start = results['M1'].loc[first_valid_m1] if first_valid_m1 else 1
-        ipc_start = results['IPC Index'].loc[first_valid_ipc] if first_valid_ipc else 1
-
-        results['M1 Normalized'] = (results['M1'] / m1_start) * 100
-        results['IPC Normalized'] = (results['IPC Index'] / ipc_start) * 100
+    # Rebase to 100 at each series' first observation (native frequency)
+    if 'M1' in panel and 'IPC Index' in panel:
+        results['M1 Normalized'] = as_of(panel.rebase('M1'), results.index)
+        results['IPC Normalized'] = as_of(panel.rebase('IPC Index'), results.index)
         
         results['Divergence'] = results['M1 Normalized'] - results['IPC Normalized']
     
     return results
 
+def draw_m1_vs_ipc(fig, df):
+    ax = fig.subplots()
+    ax.plot(df.index, df['M1 Normalized'], label='M1 Supply (Money)', color='blue')
+    ax.plot(df.index, df['IPC Normalized'], label='IPC Index (Stocks)', color='green')
+    ax.set_title('Liquidez vs Bolsa (Dinero Real vs Activos)')
+    ax.legend()
+    ax.grid(True)
+
 def plot_analysis(df):
-    if 'M1 Normalized' in df.columns:
-        plt.figure(figsize=(10, 5))
-        plt.plot(df.index, df['M1 Normalized'], label='M1 Supply (Money)', color='blue')
-        plt.plot(df.index, df['IPC Normalized'], label='IPC Index (Stocks)', color='green')
-        plt.title('Liquidez vs Bolsa (Dinero Real vs Activos)')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig('m1_vs_ipc.png')
-        plt.close()
+    """Queue the PNG on the chart workers (skipped when its data is unchanged)"""
+    if 'M1 Normalized' not in df.columns:
+        return []
+    return [charts.render_async(save_path('m1_vs_ipc.png'), draw_m1_vs_ipc, df[['M1 Normalized', 'IPC Normalized']])]
+
+def save_path(filename):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
 
 def main():
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
     df = fetch_data()
     if df.empty:
         print("No data fetched.")
         return
         
-    df_analyzed = analyze_economy(df)
-    df_analyzed.to_csv('economy_data.csv')
-    print("Data saved to economy_data.csv")
+    with metrics.span("analyze", pillar="economy"):
+        df_analyzed = analyze_economy(df)
+    write_table(df_analyzed, save_path('economy_data'))
+    print("Data saved to economy_data.arrow")
     
-    plot_analysis(df_analyzed)
-    print("Plots generated: m1_vs_ipc.png")
+    # Plot (rendered in the background while the signals are printed)
+    plots = plot_analysis(df_analyzed)
     
     last = df_analyzed.iloc[-1]
     print("\n--- LATEST SIGNALS ---")
@@ -115,6 +106,9 @@ def main():
         div = last['Divergence']
         print(f"M1 vs IPC Divergence: {div:.2f} " + ("(HIGH M1 - BUY STOCKS?)" if div > 10 else "(NORMAL)"))
 
+    if plots:
+        print(f"\nPlots: {', '.join(charts.wait(plots))}")
+
 
 if __name__ == "__main__":
     main()
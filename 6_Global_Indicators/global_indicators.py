@@ -4,9 +4,13 @@ Fetches key global market indicators from Yahoo Finance
 """
 
 import pandas as pd
-import yfinance as yf
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import get_yahoo_history, write_table
+import metrics
 
 # Yahoo Finance tickers for global indicators
 INDICATORS = {
@@ -19,64 +23,75 @@ INDICATORS = {
 
 # Output path
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_PATH = os.path.join(BASE_DIR, "global_indicators_data.csv")
+OUTPUT_PATH = os.path.join(BASE_DIR, "global_indicators_data")  # .arrow (+ .csv if ALPHA_EXPORT_CSV=1)
+
 
+def fetch_prices(tickers):
+    """Fetch the last month of daily closes for all indicators in one batched call (dates x tickers)"""
+    end_date = datetime.now() + timedelta(days=1)  # include today's bar
+    start_date = end_date - timedelta(days=32)
+    df = get_yahoo_history(tickers, start_date, end_date)
+    if df.empty or 'Close' not in df.columns.get_level_values(0):
+        return pd.DataFrame()
+    return df['Close']
 
-def fetch_indicator(ticker, info):
-    """Fetch indicator data from Yahoo Finance"""
+
+def analyze_indicator(ticker, info, prices):
+    """Build the indicator card from its close series"""
     try:
-        stock = yf.Ticker(ticker)
-        # Get last 30 days for sparkline
-        df = stock.history(period="1mo")
-        
-        if df.empty:
+        prices = prices.dropna()
+        if prices.empty:
             print(f"No data for {ticker}")
             return None
         
-        # Handle MultiIndex columns
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-        
-        latest = df.iloc[-1]
-        prev_close = df['Close'].iloc[-2] if len(df) > 1 else latest['Close']
+        latest_close = prices.iloc[-1]
+        prev_close = prices.iloc[-2] if len(prices) > 1 else latest_close
         
         # Calculate change
-        change = latest['Close'] - prev_close
+        change = latest_close - prev_close
         change_pct = (change / prev_close) * 100
         
         # Get price history for sparkline
-        price_history = [round(p, 2) for p in df['Close'].tail(30).tolist()]
+        price_history = [round(p, 2) for p in prices.tail(30).tolist()]
         
         return {
             "ticker": ticker,
             "name": info["name"],
             "category": info["category"],
-            "price": round(latest['Close'], 2),
+            "price": round(latest_close, 2),
             "change": round(change, 2),
             "change_pct": round(change_pct, 2),
-            "date": df.index[-1].strftime("%Y-%m-%d"),
+            "date": prices.index[-1].strftime("%Y-%m-%d"),
             "price_history": price_history
         }
         
     except Exception as e:
-        print(f"Error fetching {ticker}: {e}")
+        print(f"Error analyzing {ticker}: {e}")
         return None
 
 
 def main():
     print("Fetching Global Market Indicators...")
     
+    try:
+        prices = fetch_prices(list(INDICATORS))
+    except Exception as e:
+        print(f"Error fetching prices: {e}")
+        prices = pd.DataFrame()
+
     results = []
-    for ticker, info in INDICATORS.items():
-        print(f"  Processing {info['name']}...")
-        data = fetch_indicator(ticker, info)
-        if data:
-            results.append(data)
+    with metrics.span("analyze", pillar="global_indicators"):
+        for ticker, info in INDICATORS.items():
+            if ticker not in prices.columns:
+                print(f"No data for {ticker}")
+                continue
+            data = analyze_indicator(ticker, info, prices[ticker])
+            if data:
+                results.append(data)
     
     if results:
         df = pd.DataFrame(results)
-        df.to_csv(OUTPUT_PATH, index=False)
-        print(f"Data saved to {OUTPUT_PATH}")
+        print(f"Data saved to {write_table(df, OUTPUT_PATH, index=False)}")
         print(f"  {len(results)} indicators processed successfully")
     else:
         print("No data was fetched")
@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
 import os
+import sys
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
@@ -63,20 +63,114 @@ def apply_chart_style(fig, title="", height=400):
     )
     return fig
 
-# --- DATA LOADING ---
-def load_csv(path):
-    if os.path.exists(path):
-        return pd.read_csv(path, index_col=0, parse_dates=True)
-    return pd.DataFrame()
-
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Navigate up from 'Dashboard' to 'Alpha_Dashboard'
 ROOT_DIR = os.path.dirname(BASE_DIR)
 
-P1_PATH = os.path.join(ROOT_DIR, "1_Carry_Trade/carry_trade_data.csv")
-P2_PATH = os.path.join(ROOT_DIR, "2_Inflation_Shield/inflation_data.csv")
-P3_PATH = os.path.join(ROOT_DIR, "3_Risk_Thermometer/risk_data.csv")
-P4_PATH = os.path.join(ROOT_DIR, "4_Real_Economy/economy_data.csv")
+sys.path.append(ROOT_DIR)
+from utils import read_table, table_version
+import downsample
+
+# --- DATA LOADING & CACHE ---
+# Frames, derived series and figures are cached with st.cache_resource, so they are
+# shared by every session and survive reruns. Keys include the output file's
+# mtime/size (table_version), so a new pillar run invalidates its entries.
+# max_entries bounds memory (least recently used entries are evicted first).
+FRAME_CACHE_ENTRIES = 8
+DERIVED_CACHE_ENTRIES = 64
+
+@st.cache_resource(max_entries=FRAME_CACHE_ENTRIES, show_spinner=False)
+def _load_frame(path, version):
+    # Pillar outputs are Arrow files (read_table falls back to legacy CSVs)
+    return read_table(path)
+
+def load_csv(path):
+    # Shared across sessions: do not modify the returned frame in place
+    return _load_frame(path, table_version(path))
+
+@st.cache_resource(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def _derived(name, path, version, _build):
+    return _build(load_csv(path))
+
+def cached(name, path, build):
+    """build(df) for the table at `path` (a derived series or a figure), cached per file version"""
+    return _derived(name, path, table_version(path), build)
+
+def chart(name, path, build):
+    """Figure for the selected range tier (~500 points per chart, see downsample.py)"""
+    return cached(f"{name}:{tier}", path, lambda df: build(downsample.tier_view(df, tier)))
+
+# Pillar outputs are read from the repo root unless ALPHA_DATA_ROOT points elsewhere (benchmark.py)
+DATA_ROOT = os.environ.get('ALPHA_DATA_ROOT', ROOT_DIR)
+P1_PATH = os.path.join(DATA_ROOT, "1_Carry_Trade/carry_trade_data")
+P2_PATH = os.path.join(DATA_ROOT, "2_Inflation_Shield/inflation_data")
+P3_PATH = os.path.join(DATA_ROOT, "3_Risk_Thermometer/risk_data")
+P4_PATH = os.path.join(DATA_ROOT, "4_Real_Economy/economy_data")
+
+# --- FIGURES (built once per data version, see cached) ---
+def fig_market_pulse(df3):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df3.index, y=df3['Tipo de Cambio FIX'], mode='lines', name='USD/MXN', line=dict(color='#00CC96', width=2)))
+    return apply_chart_style(fig, "Tipo de Cambio (Trend)")
+
+def fig_rates(df):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df.index, y=df['TIIE 28d'], name='TIIE 28d', line=dict(color='#636EFA')))
+    if 'FED Rate (Proxy 13W)' in df.columns:
+        fig.add_trace(go.Scatter(x=df.index, y=df['FED Rate (Proxy 13W)'], name='FED Rate (Proxy)', line=dict(color='#EF553B', dash='dot')))
+    return apply_chart_style(fig, "TIIE vs FED Rates")
+
+def fig_liquidity_spread(df):
+    fig_spread = px.area(df, x=df.index, y='Liquidity Spread', title="Liquidity Stress")
+    fig_spread.update_traces(line_color='#AB63FA', fillcolor='rgba(171,99,250,0.2)')
+    fig_spread = apply_chart_style(fig_spread, "Liquidity Spread (TIIE - Fondeo)")
+    fig_spread.add_hline(y=0.5, line_dash="drive", line_color="red")
+    return fig_spread
+
+def fig_yield_curve(df):
+    fig_curve = go.Figure()
+    fig_curve.add_trace(go.Scatter(x=df.index, y=df['Yield Curve Slope'], fill='tozeroy', line=dict(color='#FFA15A')))
+    fig_curve.add_hline(y=0, line_color="red", line_dash="dot")
+    return apply_chart_style(fig_curve, "Yield Curve Slope (364d - 28d)")
+
+def fig_breakeven(df):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df.index, y=df['Breakeven Inflation'], name='Breakeven 10y', line=dict(color='#FF6692', width=2)))
+    fig.add_hline(y=3.0, line_color="green", annotation_text="Banxico Target")
+    return apply_chart_style(fig, "Inflation Expectations")
+
+def udi_rolling_velocity(df):
+    return df['UDI Velocity (%)'].rolling(7).mean()
+
+def fig_udi_velocity(df):
+    # Rolling mean over the full series, sampled at the rows this tier kept
+    rolling_vel = cached("udi_rolling_velocity", P2_PATH, udi_rolling_velocity).reindex(df.index)
+    fig_vel = go.Figure()
+    fig_vel.add_trace(go.Bar(x=df.index, y=df['UDI Velocity (%)'], name='Daily Change', marker_color='#19D3F3', opacity=0.3))
+    fig_vel.add_trace(go.Scatter(x=df.index, y=rolling_vel, name='7d Avg', line=dict(color='#FFFFFF')))
+    return apply_chart_style(fig_vel, "UDI Velocity (Daily %)")
+
+def fig_exchange_rate(df):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df.index, y=df['Tipo de Cambio FIX'], name='USD/MXN', line=dict(color='#00CC96')))
+    return apply_chart_style(fig, "Exchange Rate History")
+
+def fig_volatility(df):
+    fig_vol = go.Figure()
+    fig_vol.add_trace(go.Scatter(x=df.index, y=df['Annualized Volatility (30d)'], name='Volatility', line=dict(color='#FECB52')))
+    fig_vol.add_hline(y=5, line_color="green", line_dash="dash", annotation_text="Calma Chicha")
+    fig_vol.add_hline(y=15, line_color="red", line_dash="dash", annotation_text="Stress")
+    return apply_chart_style(fig_vol, "Volatility Thermometer")
+
+def fig_money_vs_stocks(df):
+    fig = go.Figure()
+    if 'M1 Normalized' in df.columns:
+        fig.add_trace(go.Scatter(x=df.index, y=df['M1 Normalized'], name='Liquidity (Base Monetaria)', line=dict(color='#636EFA')))
+
+    if 'IPC Normalized' in df.columns:
+        fig.add_trace(go.Scatter(x=df.index, y=df['IPC Normalized'], name='IPC (Stocks)', line=dict(color='#00CC96')))
+
+    return apply_chart_style(fig, "Money Supply vs Stock Market (Normalized Base 100)")
 
 # --- MAIN APP ---
 
@@ -86,6 +180,8 @@ st.markdown("---")
 
 # Navigation
 page = st.sidebar.radio("Navegación", ["Overview", "Carry Trade (Rates)", "Inflation Shield", "Risk Thermometer", "Real Economy"])
+# Charts plot a downsampled tier; short ranges are full resolution
+tier = st.sidebar.radio("Rango", [name for name, _ in downsample.TIERS], index=len(downsample.TIERS) - 1, horizontal=True)
 
 if page == "Overview":
     st.header("Executive Summary")
@@ -119,10 +215,7 @@ if page == "Overview":
 
     st.markdown("### 📡 Market Pulse")
     if not df3.empty:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df3.index, y=df3['Tipo de Cambio FIX'], mode='lines', name='USD/MXN', line=dict(color='#00CC96', width=2)))
-        fig = apply_chart_style(fig, "Tipo de Cambio (Trend)")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(chart("market_pulse", P3_PATH, fig_market_pulse), use_container_width=True)
 
 # --- PILLAR 1 ---
 elif page == "Carry Trade (Rates)":
@@ -142,27 +235,14 @@ elif page == "Carry Trade (Rates)":
         tab_a, tab_b = st.tabs(["Spreads & Rates", "Yield Curve"])
         
         with tab_a:
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df.index, y=df['TIIE 28d'], name='TIIE 28d', line=dict(color='#636EFA')))
-            if 'FED Rate (Proxy 13W)' in df.columns:
-                fig.add_trace(go.Scatter(x=df.index, y=df['FED Rate (Proxy 13W)'], name='FED Rate (Proxy)', line=dict(color='#EF553B', dash='dot')))
-            fig = apply_chart_style(fig, "TIIE vs FED Rates")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(chart("rates", P1_PATH, fig_rates), use_container_width=True)
             
             if 'Liquidity Spread' in df.columns:
-                fig_spread = px.area(df, x=df.index, y='Liquidity Spread', title="Liquidity Stress")
-                fig_spread.update_traces(line_color='#AB63FA', fillcolor='rgba(171,99,250,0.2)')
-                fig_spread = apply_chart_style(fig_spread, "Liquidity Spread (TIIE - Fondeo)")
-                fig_spread.add_hline(y=0.5, line_dash="drive", line_color="red")
-                st.plotly_chart(fig_spread, use_container_width=True)
+                st.plotly_chart(chart("liquidity_spread", P1_PATH, fig_liquidity_spread), use_container_width=True)
 
         with tab_b:
              if 'Yield Curve Slope' in df.columns:
-                fig_curve = go.Figure()
-                fig_curve.add_trace(go.Scatter(x=df.index, y=df['Yield Curve Slope'], fill='tozeroy', line=dict(color='#FFA15A')))
-                fig_curve.add_hline(y=0, line_color="red", line_dash="dot")
-                fig_curve = apply_chart_style(fig_curve, "Yield Curve Slope (364d - 28d)")
-                st.plotly_chart(fig_curve, use_container_width=True)
+                st.plotly_chart(chart("yield_curve", P1_PATH, fig_yield_curve), use_container_width=True)
 
 # --- PILLAR 2 ---
 elif page == "Inflation Shield":
@@ -176,21 +256,12 @@ elif page == "Inflation Shield":
         col1.metric("UDI Value", f"{last.get('UDI', 0):.4f}")
         col2.metric("Breakeven Inflation (10y)", f"{last.get('Breakeven Inflation', 0):.2f}%")
         
-        fig = go.Figure()
         if 'Breakeven Inflation' in df.columns:
-            fig.add_trace(go.Scatter(x=df.index, y=df['Breakeven Inflation'], name='Breakeven 10y', line=dict(color='#FF6692', width=2)))
-            fig.add_hline(y=3.0, line_color="green", annotation_text="Banxico Target")
-            fig = apply_chart_style(fig, "Inflation Expectations")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(chart("breakeven", P2_PATH, fig_breakeven), use_container_width=True)
             
         if 'UDI Velocity (%)' in df.columns:
             st.subheader("UDI Velocity")
-            df['Rolling Vel'] = df['UDI Velocity (%)'].rolling(7).mean()
-            fig_vel = go.Figure()
-            fig_vel.add_trace(go.Bar(x=df.index, y=df['UDI Velocity (%)'], name='Daily Change', marker_color='#19D3F3', opacity=0.3))
-            fig_vel.add_trace(go.Scatter(x=df.index, y=df['Rolling Vel'], name='7d Avg', line=dict(color='#FFFFFF')))
-            fig_vel = apply_chart_style(fig_vel, "UDI Velocity (Daily %)")
-            st.plotly_chart(fig_vel, use_container_width=True)
+            st.plotly_chart(chart("udi_velocity", P2_PATH, fig_udi_velocity), use_container_width=True)
 
 # --- PILLAR 3 ---
 elif page == "Risk Thermometer":
@@ -206,17 +277,8 @@ elif page == "Risk Thermometer":
         col2.metric("Volatility (30d)", f"{vol:.2f}%", delta="Squeeze" if vol < 5 else "Normal")
         
         # Dual Axis Chart? Or two stacked
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df.index, y=df['Tipo de Cambio FIX'], name='USD/MXN', line=dict(color='#00CC96')))
-        fig = apply_chart_style(fig, "Exchange Rate History")
-        st.plotly_chart(fig, use_container_width=True)
-        
-        fig_vol = go.Figure()
-        fig_vol.add_trace(go.Scatter(x=df.index, y=df['Annualized Volatility (30d)'], name='Volatility', line=dict(color='#FECB52')))
-        fig_vol.add_hline(y=5, line_color="green", line_dash="dash", annotation_text="Calma Chicha")
-        fig_vol.add_hline(y=15, line_color="red", line_dash="dash", annotation_text="Stress")
-        fig_vol = apply_chart_style(fig_vol, "Volatility Thermometer")
-        st.plotly_chart(fig_vol, use_container_width=True)
+        st.plotly_chart(chart("exchange_rate", P3_PATH, fig_exchange_rate), use_container_width=True)
+        st.plotly_chart(chart("volatility", P3_PATH, fig_volatility), use_container_width=True)
 
 # --- PILLAR 4 ---
 elif page == "Real Economy":
@@ -227,15 +289,7 @@ elif page == "Real Economy":
         last = df.iloc[-1]
         st.metric("Divergence (M1 - IPC)", f"{last.get('Divergence', 0):.2f}", help="Positive = Money Supply > Stocks Growth")
         
-        fig = go.Figure()
-        if 'M1 Normalized' in df.columns:
-            fig.add_trace(go.Scatter(x=df.index, y=df['M1 Normalized'], name='Liquidity (Base Monetaria)', line=dict(color='#636EFA')))
-
-        if 'IPC Normalized' in df.columns:
-            fig.add_trace(go.Scatter(x=df.index, y=df['IPC Normalized'], name='IPC (Stocks)', line=dict(color='#00CC96')))
-            
-        fig = apply_chart_style(fig, "Money Supply vs Stock Market (Normalized Base 100)")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(chart("money_vs_stocks", P4_PATH, fig_money_vs_stocks), use_container_width=True)
 
 st.markdown("---")
 st.caption("Alpha Dashboard v2.0 | Automated Banxico & Market Data Pipeline")
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Long-history backfill for Banxico SIE series into the local series store.
+
+A multi-decade range is split into date windows, fetched newest first and concurrently
+within a request-rate budget. Windows are fixed calendar blocks (Jan 1 of every
+`--window-years`-th year), cut to --start/--end, so the same blocks come back on any
+later day. Each window asks for up to 20 series per request through
+utils._fetch_banxico_batch. Every finished window is merged into the series store
+right away and recorded, with the range it fetched, in the store's backfill_windows
+table. An interrupted run resumes where it stopped, and failed windows are retried on
+the next run. A block only counts as done when its recorded range covers what the run
+needs, so the open-ended newest block is topped up on later days. Once every window
+of a series is done, the series' coverage is extended and the pillars only download
+deltas from then on.
+
+Usage:
+    python backfill.py                              # default series, 20 years
+    python backfill.py SF43936 SF43783 --start 1995-01-01 --window-years 2
+    python backfill.py --status                     # progress per series
+    python backfill.py --restart                    # forget progress, redo every window
+"""
+
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import series_store
+import utils
+
+# Series fetched when none are given on the command line (the pillars' Banxico inputs)
+DEFAULT_SERIES = {
+    "SF60648": "TIIE Fondeo",
+    "SF61745": "TIIE 28d",
+    "SF43936": "Cetes 28d",
+    "SF43939": "Cetes 91d",
+    "SF43945": "Cetes 364d",
+    "SP68257": "UDI",
+    "SF43912": "Bono M 10y",
+    "SF3338": "Udibono 10y",
+    "SP30578": "INPC",
+    "SF43707": "Reservas Internacionales",
+}
+DEFAULT_YEARS = 20
+WINDOW_YEARS = int(os.environ.get('ALPHA_BACKFILL_WINDOW_YEARS', '2'))
+WORKERS = int(os.environ.get('ALPHA_BACKFILL_WORKERS', '4'))
+# SIE requests per second across all workers (stay well under the token's query limits)
+RATE = float(os.environ.get('ALPHA_BACKFILL_RATE', '1'))
+
+DONE, FAILED = "done", "failed"
+
+
+def _connect(path=None):
+    conn = series_store._connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_windows (
+            series_id TEXT NOT NULL,
+            block TEXT NOT NULL,
+            start TEXT NOT NULL,
+            end TEXT NOT NULL,
+            status TEXT NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (series_id, block)
+        )
+    """)
+    return conn
+
+
+class RateLimiter:
+    """Spaces calls evenly at `rate` per second across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, count=1):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval * count
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def split_windows(start, end, years=WINDOW_YEARS):
+    """
+    [(block, window start, window end)] covering start..end, newest first, 'YYYY-MM-DD'.
+    Blocks start on Jan 1 of the years divisible by `years` and do not depend on start/end;
+    only the first and last window are cut to them.
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    years = max(1, int(years))
+    windows = []
+    year = end.year - end.year % years
+    while True:
+        block = pd.Timestamp(year=year, month=1, day=1)
+        block_end = pd.Timestamp(year=year + years - 1, month=12, day=31)
+        windows.append((block.strftime('%Y-%m-%d'), max(start, block).strftime('%Y-%m-%d'),
+                        min(end, block_end).strftime('%Y-%m-%d')))
+        if block <= start:
+            return windows
+        year -= years
+
+
+def load_progress(series_ids, path=None):
+    """{(series_id, block): (start, end, status, rows, attempts)}"""
+    if not series_ids:
+        return {}
+    conn = _connect(path)
+    try:
+        placeholders = ",".join("?" * len(series_ids))
+        rows = conn.execute(
+            f"SELECT series_id, block, start, end, status, rows, attempts FROM backfill_windows "
+            f"WHERE series_id IN ({placeholders})", list(series_ids)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {(row[0], row[1]): row[2:] for row in rows}
+
+
+def is_done(progress, sid, window):
+    """True when the block was fetched successfully over at least the window's range"""
+    block, start, end = window
+    entry = progress.get((sid, block))
+    return entry is not None and entry[2] == DONE and entry[0] <= start and entry[1] >= end
+
+
+def record(entries, path=None):
+    """Upsert progress rows: [(series_id, block, start, end, status, rows, error)]; counts attempts"""
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with series_store._WRITE_LOCK:
+        conn = _connect(path)
+        try:
+            conn.executemany("""
+                INSERT INTO backfill_windows (series_id, block, start, end, status, rows, attempts, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT(series_id, block) DO UPDATE SET
+                    start = excluded.start, end = excluded.end,
+                    status = excluded.status, rows = excluded.rows, error = excluded.error,
+                    attempts = backfill_windows.attempts + 1, updated_at = excluded.updated_at
+            """, [entry + (now,) for entry in entries])
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def reset(series_ids, path=None):
+    with series_store._WRITE_LOCK:
+        conn = _connect(path)
+        try:
+            placeholders = ",".join("?" * len(series_ids))
+            conn.execute(f"DELETE FROM backfill_windows WHERE series_id IN ({placeholders})", list(series_ids))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def fetch_window(series_ids, window, limiter, path=None):
+    """Download one window for some series, merge it into the store and record progress"""
+    block, start, end = window
+    limiter.acquire(math.ceil(len(series_ids) / utils.SIE_MAX_SERIES_PER_REQUEST))
+    df, answered = utils._fetch_banxico_batch(series_ids, start, end)
+    series_store.save(df, path)
+    entries = []
+    for sid in series_ids:
+        if sid in answered:
+            count = int(df[sid].notna().sum()) if sid in df.columns else 0
+            entries.append((sid, block, start, end, DONE, count, None))
+        else:
+            entries.append((sid, block, start, end, FAILED, 0, "no answer from SIE"))
+    record(entries, path)
+    return entries
+
+
+def finish_coverage(series_ids, start, end, windows, path=None):
+    """
+    Extend coverage of the series whose windows are all done (never across a gap), up to
+    each series' last stored observation: a monthly series such as INPC has not been
+    published up to `end` yet, so that range is not claimed as downloaded.
+    """
+    progress = load_progress(series_ids, path)
+    coverage = series_store.get_coverage(series_ids, path)
+    last = series_store.last_observations(series_ids, path)
+    complete, gaps, ends = [], [], {}
+    for sid in series_ids:
+        if not all(is_done(progress, sid, window) for window in windows):
+            continue
+        series_end = min(series_store._as_date(end), last.get(sid, series_store._as_date(end)))
+        # mark_covered would replace (not extend) a coverage range this one does not touch
+        if sid in coverage and not series_store.touches(start, series_end, *coverage[sid]):
+            gaps.append(sid)
+            continue
+        complete.append(sid)
+        ends.setdefault(series_end, []).append(sid)
+    for series_end, sids in ends.items():
+        series_store.mark_covered(sids, start, series_end, path)
+    return complete, gaps
+
+
+def backfill(series_ids, start, end, window_years=WINDOW_YEARS, workers=WORKERS, rate=RATE, path=None):
+    """Run (or resume) a backfill; returns {"done": n, "failed": n, "rows": n, "complete": [...]}"""
+    windows = split_windows(start, end, window_years)
+    progress = load_progress(series_ids, path)
+    todo = []
+    for window in windows:
+        missing = [sid for sid in series_ids if not is_done(progress, sid, window)]
+        if missing:
+            todo.append((window, missing))
+    first, last = windows[-1][1], windows[0][2]
+
+    total = len(windows)
+    skipped = total - len(todo)
+    print(f"Backfilling {len(series_ids)} series {first} -> {last}: "
+          f"{total} windows of {window_years}y, {skipped} already done, {len(todo)} to fetch "
+          f"({workers} workers, {rate:g} req/s)")
+
+    limiter = RateLimiter(rate)
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as pool:
+        futures = {pool.submit(fetch_window, missing, window, limiter, path): window
+                   for window, missing in todo}
+        try:
+            completed = enumerate(as_completed(futures), 1)
+            done, failed, rows = _report(completed, futures, skipped, total, len(todo), started)
+        except KeyboardInterrupt:
+            # Windows already merged stay recorded; only the ones in flight are lost
+            for future in futures:
+                future.cancel()
+            print("\nInterrupted: waiting for the windows in flight, re-run the same command to resume")
+            raise
+
+    complete, gaps = finish_coverage(series_ids, first, last, windows, path)
+    for sid in gaps:
+        print(f"  {sid}: stored coverage does not touch {first}..{last}; "
+              f"coverage left unchanged (backfill up to the stored start to close the gap)")
+    return {"done": done, "failed": failed, "rows": rows, "complete": complete}
+
+
+def _report(completed, futures, skipped, total, pending, started):
+    """Print one progress line per finished window; returns (done, failed, rows)"""
+    done = failed = rows = 0
+    for finished, future in completed:
+        _, w_start, w_end = futures[future]
+        try:
+            entries = future.result()
+        except Exception as e:
+            entries = []
+            print(f"  Window {w_start}..{w_end} failed: {e}")
+        window_rows = sum(entry[5] for entry in entries)
+        window_failed = sum(entry[4] == FAILED for entry in entries)
+        rows += window_rows
+        if window_failed or not entries:
+            failed += 1
+        else:
+            done += 1
+        elapsed = time.monotonic() - started
+        eta = elapsed / finished * (pending - finished)
+        note = f", {window_failed} series failed" if window_failed else ""
+        print(f"  [{skipped + finished}/{total}] {w_start}..{w_end}: {window_rows:,} obs{note} "
+              f"({elapsed:.0f}s elapsed, ETA {eta:.0f}s)", flush=True)
+    return done, failed, rows
+
+
+def print_status(series_ids, path=None):
+    conn = _connect(path)
+    try:
+        placeholders = ",".join("?" * len(series_ids))
+        rows = conn.execute(f"""
+            SELECT series_id, MIN(start), MAX(end), SUM(status = 'done'), SUM(status = 'failed'), SUM(rows)
+            FROM backfill_windows WHERE series_id IN ({placeholders}) GROUP BY series_id
+        """, list(series_ids)).fetchall()
+    finally:
+        conn.close()
+    coverage = series_store.get_coverage(series_ids, path)
+    by_id = {row[0]: row[1:] for row in rows}
+    print(f"{'SERIES':<10} {'NAME':<26} {'WINDOWS':>15} {'OBS':>9}  COVERAGE")
+    for sid in series_ids:
+        first, last, ok, bad, count = by_id.get(sid, (None, None, 0, 0, 0))
+        cov = " -> ".join(coverage[sid]) if sid in coverage else "none"
+        windows = f"{ok} ok / {bad} failed" if first else "not started"
+        print(f"{sid:<10} {DEFAULT_SERIES.get(sid, ''):<26} {windows:>15} {count or 0:>9,}  {cov}")
+
+
+def main():
+    today = datetime.now()
+    parser = argparse.ArgumentParser(description="Backfill long Banxico histories into the series store")
+    parser.add_argument("series", nargs="*", help="SIE series IDs (default: the pillars' Banxico series)")
+    parser.add_argument("--start", default=(today - timedelta(days=int(365.25 * DEFAULT_YEARS))).strftime('%Y-%m-%d'))
+    parser.add_argument("--end", default=today.strftime('%Y-%m-%d'))
+    parser.add_argument("--window-years", type=int, default=WINDOW_YEARS, help="Years per request window")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Windows fetched concurrently")
+    parser.add_argument("--rate", type=float, default=RATE, help="Max SIE requests per second")
+    parser.add_argument("--restart", action="store_true", help="Forget recorded progress first")
+    parser.add_argument("--status", action="store_true", help="Show progress and coverage, fetch nothing")
+    args = parser.parse_args()
+
+    series_ids = [sid.strip().upper() for sid in args.series] or list(DEFAULT_SERIES)
+    if args.status:
+        print_status(series_ids)
+        return 0
+    if not series_store.STORE_ENABLED:
+        print("The series store is disabled (ALPHA_STORE=0); nothing to backfill into.")
+        return 1
+    if pd.Timestamp(args.start) > pd.Timestamp(args.end):
+        parser.error("--start is after --end")
+    if args.restart:
+        reset(series_ids)
+
+    started = time.monotonic()
+    try:
+        result = backfill(series_ids, args.start, args.end, args.window_years, args.workers, args.rate)
+    except KeyboardInterrupt:
+        return 130
+    print(f"\n{result['done']} window(s) fetched, {result['failed']} failed, {result['rows']:,} observations "
+          f"merged in {time.monotonic() - started:.0f}s")
+    print(f"Coverage extended: {', '.join(result['complete']) or 'none'}")
+    if result["failed"]:
+        print("Re-run the same command to retry the failed windows.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
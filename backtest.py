@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtest of the Alpha Decision (export_to_json.generate_alpha_signal).
+
+The signal rules live here and the export uses the same functions for the latest
+day. A backtest:
+1. aligns the carry spread (carry_trade pillar) with the USD/MXN candles and
+   volatility Z-score (risk pillar) on the FX trading calendar (as-of join)
+2. computes the signal for every date at once
+3. simulates the positions with their stop-losses and reports hit rate, P&L and
+   drawdown
+
+Positions (decided on a day's close, held from the next bar):
+    LONG MXN   spread > 500bp and vol Z < 1.5    short USD/MXN, earns the carry spread
+    SHORT MXN  spread < 400bp or vol Z > 2.0     long USD/MXN, pays the carry spread
+    HEDGE      anything else                     flat
+The stop is fixed when a position opens (LONG MXN: 1% over the upper Bollinger band,
+2% over the close without a band; SHORT MXN: 1% under the close). A bar whose high/low
+crosses it exits at the stop (at the open on a gap) and stays flat until the signal
+changes.
+
+Usage:
+    python backtest.py                    # pillar outputs under ALPHA_DATA_ROOT
+    python backtest.py --trades 20        # also list the last 20 trades
+    python backtest.py --no-stops --cost-bp 2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_ROOT = os.environ.get('ALPHA_DATA_ROOT', BASE_DIR)
+CARRY_PATH = os.path.join(DATA_ROOT, "1_Carry_Trade", "carry_trade_data")
+RISK_PATH = os.path.join(DATA_ROOT, "3_Risk_Thermometer", "risk_data")
+
+# Signal thresholds
+LONG_SPREAD_BP = 500     # carry spread above -> LONG MXN (if volatility is calm)
+LONG_MAX_VOL_Z = 1.5
+SHORT_SPREAD_BP = 400    # carry spread below -> SHORT MXN
+SHORT_VOL_Z = 2.0        # or volatility Z-score above -> SHORT MXN
+
+# Stop-loss levels (USD/MXN)
+LONG_STOP_BAND = 1.01    # LONG MXN: 1% over the upper Bollinger band
+LONG_STOP_CLOSE = 1.02   # LONG MXN without a band: 2% over the close
+SHORT_STOP_CLOSE = 0.99  # SHORT MXN: 1% under the close
+
+LONG, HEDGE, SHORT = 1, 0, -1
+DAY_COUNT = 360          # MXN money-market convention for the carry accrual
+TRADING_DAYS = 252
+
+
+def signals(spread, vol_z, long_spread=LONG_SPREAD_BP, long_max_vol_z=LONG_MAX_VOL_Z,
+            short_spread=SHORT_SPREAD_BP, short_vol_z=SHORT_VOL_Z):
+    """
+    LONG (1) / HEDGE (0) / SHORT (-1) MXN for every row of the spread (bp) and vol
+    Z-score arrays. A comparison with a missing input is false, like the scalar rules.
+    """
+    spread = np.asarray(spread, dtype=float)
+    vol_z = np.asarray(vol_z, dtype=float)
+    long_ = (spread > long_spread) & (vol_z < long_max_vol_z)
+    short = ~long_ & ((spread < short_spread) | (vol_z > short_vol_z))
+    return np.where(long_, LONG, np.where(short, SHORT, HEDGE)).astype(np.int8)
+
+
+def stop_levels(signal, close, upper_band, long_band=LONG_STOP_BAND, long_close=LONG_STOP_CLOSE,
+                short_close=SHORT_STOP_CLOSE):
+    """USD/MXN stop for a position opened on each row (NaN when HEDGE)"""
+    signal = np.asarray(signal)
+    close = np.asarray(close, dtype=float)
+    upper_band = np.asarray(upper_band, dtype=float)
+    has_band = np.nan_to_num(upper_band, nan=0.0) > 0
+    long_stop = np.where(has_band, upper_band * long_band, close * long_close)
+    return np.where(signal == LONG, long_stop, np.where(signal == SHORT, close * short_close, np.nan))
+
+
+def align(carry, risk):
+    """
+    Arrays on the risk (FX) calendar: dates, open, high, low, close, upper band, vol Z
+    and the carry spread as of each date (last published value, never a future one).
+    """
+    risk = risk.sort_index()
+    risk = risk[risk['Close'].notna()]
+    spread = carry['Carry Spread (bp)'].dropna().sort_index() if 'Carry Spread (bp)' in carry else pd.Series(dtype=float)
+    close = risk['Close'].to_numpy(dtype=float)
+
+    def column(name, default):
+        return risk[name].to_numpy(dtype=float) if name in risk else np.full(len(risk), default)
+
+    return {
+        "dates": risk.index.to_numpy(),
+        "open": column('Open', np.nan),
+        "high": column('High', np.nan),
+        "low": column('Low', np.nan),
+        "close": close,
+        "upper_band": column('Upper_Band', 0.0),
+        "vol_z": column('Vol_Z_Score', np.nan),
+        "spread": spread.reindex(risk.index, method='ffill').to_numpy(dtype=float),
+    }
+
+
+def simulate(data, signal, use_stops=True, cost_bp=0.0, carry=True, **stops):
+    """
+    Daily P&L of trading `signal` (one entry per row of `data`, decided on that close).
+    Returns {"pnl", "position", "stopped", "segment", "active"} arrays; row t holds the
+    return of the position carried over (t-1, t].
+    """
+    close = data["close"]
+    n = len(close)
+    signal = np.asarray(signal, dtype=np.int8)
+    if n < 2:
+        empty = np.zeros(n)
+        return {"pnl": empty, "position": empty.astype(np.int8), "stopped": empty.astype(bool),
+                "segment": np.zeros(n, dtype=np.int64), "active": empty.astype(bool)}
+
+    rows = np.arange(n)
+    # Runs of the same decision; a position keeps the stop and entry of its run's first day
+    change = np.r_[True, signal[1:] != signal[:-1]]
+    run_start = np.maximum.accumulate(np.where(change, rows, 0))
+    run_id = np.cumsum(change)
+
+    held = np.r_[0, signal[:-1]].astype(np.int8)          # decision of the previous close
+    start = np.r_[0, run_start[:-1]]                      # first decision day of that run
+    segment = np.r_[0, run_id[:-1]]
+    prev_close = np.r_[np.nan, close[:-1]]
+
+    if use_stops:
+        stop = stop_levels(signal, close, data["upper_band"], **stops)[start]
+        high = np.where(np.isnan(data["high"]), close, data["high"])
+        low = np.where(np.isnan(data["low"]), close, data["low"])
+        breach = ((held == LONG) & (high >= stop)) | ((held == SHORT) & (low <= stop))
+        breach[0] = False
+        hits = np.cumsum(breach)
+        # Breaches inside the run before this bar: cumulative count minus the count at its start
+        active = (held != HEDGE) & (np.r_[0, hits[:-1]] - hits[start] == 0)
+        stopped = active & breach
+        opened = np.where(np.isnan(data["open"]), stop, data["open"])
+        # Exit at the stop, or at the open when the bar gapped through it
+        gap_exit = np.where(held == LONG, np.maximum(opened, stop), np.minimum(opened, stop))
+        exit_price = np.where(stopped, gap_exit, close)
+    else:
+        active = held != HEDGE
+        stopped = np.zeros(n, dtype=bool)
+        exit_price = close
+
+    # LONG MXN is short USD/MXN: it gains when the rate falls
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pnl = -held * (exit_price / prev_close - 1.0)
+    if carry:
+        days = np.diff(data["dates"]).astype('timedelta64[D]').astype(float)
+        spread = np.nan_to_num(np.r_[np.nan, data["spread"][:-1]], nan=0.0)
+        pnl = pnl + held * spread / 10000.0 * np.r_[0.0, days] / DAY_COUNT
+    pnl = np.where(active, np.nan_to_num(pnl), 0.0)
+
+    if cost_bp:
+        open_exposure = np.where(active, held, 0)
+        close_exposure = np.where(active & ~stopped, held, 0)
+        turnover = np.abs(open_exposure - np.r_[0, close_exposure[:-1]]) + np.abs(close_exposure - open_exposure)
+        pnl = pnl - turnover * cost_bp / 10000.0
+
+    return {"pnl": pnl, "position": np.where(active, held, 0).astype(np.int8), "stopped": stopped,
+            "segment": np.where(active, segment, 0), "active": active}
+
+
+def trade_pnl(sim):
+    """Compounded return of every trade (run of one position) and whether it was stopped"""
+    segment = sim["segment"]
+    ids, inverse = np.unique(segment[sim["active"]], return_inverse=True)
+    if not len(ids):
+        return np.array([]), np.array([], dtype=bool), ids
+    log_growth = np.bincount(inverse, weights=np.log1p(sim["pnl"][sim["active"]]), minlength=len(ids))
+    stopped = np.bincount(inverse, weights=sim["stopped"][sim["active"]], minlength=len(ids)) > 0
+    return np.expm1(log_growth), stopped, ids
+
+
+def summarize(data, sim):
+    """Hit rate, P&L and drawdown of a simulation"""
+    pnl = sim["pnl"]
+    equity = np.cumprod(1.0 + pnl)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0 if len(equity) else np.array([0.0])
+    trades, stopped, _ = trade_pnl(sim)
+    years = len(pnl) / TRADING_DAYS
+    total = equity[-1] - 1.0 if len(equity) else 0.0
+    std = pnl.std()
+    return {
+        "days": int(len(pnl)),
+        "start": str(pd.Timestamp(data["dates"][0]).date()) if len(pnl) else None,
+        "end": str(pd.Timestamp(data["dates"][-1]).date()) if len(pnl) else None,
+        "trades": int(len(trades)),
+        "hit_rate": float((trades > 0).mean()) if len(trades) else 0.0,
+        "stops_hit": int(stopped.sum()),
+        "total_return": float(total),
+        "annual_return": float((1.0 + total) ** (1.0 / years) - 1.0) if years > 0 and total > -1 else 0.0,
+        "max_drawdown": float(drawdown.min()),
+        "sharpe": float(pnl.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else 0.0,
+        "exposure": float(sim["active"].mean()) if len(pnl) else 0.0,
+        "long_days": int((sim["position"] == LONG).sum()),
+        "short_days": int((sim["position"] == SHORT).sum()),
+    }
+
+
+def run(carry, risk, use_stops=True, cost_bp=0.0, carry_accrual=True, **thresholds):
+    """
+    Backtest pillar frames (carry_trade and risk outputs).
+    Returns (summary dict, daily DataFrame, trades DataFrame).
+    """
+    data = align(carry, risk)
+    signal = signals(data["spread"], data["vol_z"], **thresholds)
+    sim = simulate(data, signal, use_stops=use_stops, cost_bp=cost_bp, carry=carry_accrual)
+    summary = summarize(data, sim)
+
+    index = pd.DatetimeIndex(data["dates"], name='Date')
+    daily = pd.DataFrame({
+        "Signal": signal, "Position": sim["position"], "Stopped": sim["stopped"],
+        "PnL": sim["pnl"], "Equity": np.cumprod(1.0 + sim["pnl"]),
+    }, index=index)
+    returns, stopped, _ = trade_pnl(sim)
+    # Active rows of a trade are contiguous and trades come in order
+    active_rows = np.flatnonzero(sim["active"])
+    _, first, days = np.unique(sim["segment"][active_rows], return_index=True, return_counts=True)
+    first_row = active_rows[first]
+    trades = pd.DataFrame({
+        "Entry": index[first_row - 1],
+        "Exit": index[active_rows[first + days - 1]],
+        "Side": np.where(sim["position"][first_row] == LONG, "LONG MXN", "SHORT MXN"),
+        "Days": days,
+        "Return": returns,
+        "Stopped": stopped,
+    })
+    return summary, daily, trades
+
+
+def format_summary(summary):
+    return "\n".join([
+        f"Period: {summary['start']} -> {summary['end']} ({summary['days']} days)",
+        f"Trades: {summary['trades']} (stopped out: {summary['stops_hit']})",
+        f"Hit rate: {summary['hit_rate']:.1%}",
+        f"Total P&L: {summary['total_return']:+.2%} (annualized {summary['annual_return']:+.2%})",
+        f"Max drawdown: {summary['max_drawdown']:.2%}",
+        f"Sharpe: {summary['sharpe']:.2f}",
+        f"Exposure: {summary['exposure']:.1%} (LONG MXN {summary['long_days']}d, SHORT MXN {summary['short_days']}d)",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the Alpha Decision signal")
+    parser.add_argument("--no-stops", action="store_true", help="Hold positions until the signal changes")
+    parser.add_argument("--no-carry", action="store_true", help="FX P&L only, without the carry accrual")
+    parser.add_argument("--cost-bp", type=float, default=0.0, help="Cost per side in bp of notional")
+    parser.add_argument("--trades", type=int, default=0, help="List the last N trades")
+    args = parser.parse_args()
+
+    from utils import read_table
+
+    carry, risk = read_table(CARRY_PATH), read_table(RISK_PATH)
+    if carry.empty or risk.empty:
+        print("Carry trade or risk data missing; run the pillars first.")
+        return 1
+
+    started = time.perf_counter()
+    summary, _, trades = run(carry, risk, use_stops=not args.no_stops, cost_bp=args.cost_bp,
+                             carry_accrual=not args.no_carry)
+    elapsed = time.perf_counter() - started
+
+    print(format_summary(summary))
+    if args.trades and not trades.empty:
+        print()
+        print(trades.tail(args.trades).to_string(index=False, formatters={"Return": "{:+.2%}".format}))
+    print(f"\nBacktest took {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks for every pipeline stage, with committed baselines.
+
+Data comes from fake_upstream.py (synthetic histories, or recorded fixtures with
+--replay), started on a free local port for the duration of the run. Each pillar's
+lookback window is multiplied by the scale (1x, 10x, 100x history) by patching the
+`timedelta` the pillar module uses, so the real fetch code runs unchanged.
+
+Stages (each one runs in a fresh child process):
+    fetch.<pillar>              pillar fetch_data()/fetch_prices(): HTTP + SIE/Yahoo parsing
+    analyze.<pillar>            pillar analysis on the fetched frames
+    write.arrow / write.csv     writing all six pillar outputs
+    export.load                 reading all six pillar outputs (load_frame)
+    export.encode_columnar      encoding the time series sections (json_stream)
+    export.json                 export_to_json.main() into an empty Web/data
+    streamlit.cold / .rerun     Dashboard/app.py visiting every page (empty / warm caches)
+
+Each result is the best wall time of --repeat runs (after one warm-up; the minimum is the
+least noisy estimate, as in timeit) and the child's peak RSS. Both are compared with benchmark_baselines.json; a stage regresses when it is
+more than `threshold` (default 25%) slower or bigger than its baseline.
+
+Usage:
+    python benchmark.py                          # all stages at 1x, 10x, 100x; exit 1 on a regression
+    python benchmark.py --scales 1,10 --stages analyze,export
+    python benchmark.py --replay fixtures/       # recorded payloads instead of synthetic data
+    python benchmark.py --update                 # rewrite the baselines from this machine
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import timedelta
+
+import metrics
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_PATH = os.path.join(BASE_DIR, "benchmark_baselines.json")
+SCALES = (1, 10, 100)
+DEFAULT_THRESHOLD = 0.25
+# Differences below these never count as regressions (timer and allocator noise)
+MIN_SECONDS_DELTA = 0.010
+MIN_MB_DELTA = 5.0
+# Synthetic histories must cover the longest window (inflation: 2 years x 100)
+FAKE_SINCE = "1800-01-01"
+
+# name: (script, output under the data root, fetch, analyze)
+PILLARS = {
+    "carry_trade": ("1_Carry_Trade/carry_trade.py", "1_Carry_Trade/carry_trade_data",
+                    lambda m: m.fetch_data(), lambda m, raw: m.analyze_carry_trade(raw)),
+    "inflation": ("2_Inflation_Shield/inflation_shield.py", "2_Inflation_Shield/inflation_data",
+                  lambda m: m.fetch_data(), lambda m, raw: m.analyze_inflation(raw)),
+    "risk": ("3_Risk_Thermometer/risk_thermometer.py", "3_Risk_Thermometer/risk_data",
+             lambda m: m.fetch_data(), lambda m, raw: m.analyze_risk(raw[0].copy(), raw[1].copy())),
+    "economy": ("4_Real_Economy/real_economy.py", "4_Real_Economy/economy_data",
+                lambda m: m.fetch_data(), lambda m, raw: m.analyze_economy(raw)),
+    "us_stocks": ("5_US_Stocks/us_stocks.py", "5_US_Stocks/us_stocks_data",
+                  lambda m: m.fetch_prices(m.TICKERS), lambda m, raw: m.latest_snapshot(raw, m.COMPANY_NAMES)),
+    "global_indicators": ("6_Global_Indicators/global_indicators.py", "6_Global_Indicators/global_indicators_data",
+                          lambda m: m.fetch_prices(list(m.INDICATORS)), lambda m, raw: _global_cards(m, raw)),
+}
+# Outputs written without their index (records tables)
+RECORD_OUTPUTS = ("us_stocks", "global_indicators")
+
+STAGES = (
+    [f"fetch.{name}" for name in PILLARS]
+    + [f"analyze.{name}" for name in PILLARS]
+    + ["write.arrow", "write.csv", "export.load", "export.encode_columnar",
+       "export.json", "streamlit.cold", "streamlit.rerun"]
+)
+
+
+def _global_cards(module, prices):
+    import pandas as pd
+    cards = [module.analyze_indicator(t, info, prices[t]) for t, info in module.INDICATORS.items() if t in prices]
+    return pd.DataFrame([card for card in cards if card])
+
+
+# --- child side ---------------------------------------------------------------------------
+
+def load_pillar(name, scale):
+    from run_pipeline import load_module
+
+    module = load_module(os.path.join(BASE_DIR, PILLARS[name][0]))
+    module.timedelta = lambda *args, **kwargs: timedelta(*args, **kwargs) * scale
+    return module
+
+
+def raw_path(workdir, name):
+    return os.path.join(workdir, "raw", f"{name}.pkl")
+
+
+def output_path(workdir, name):
+    return os.path.join(workdir, "data", PILLARS[name][1])
+
+
+def load_outputs(workdir):
+    from utils import read_table
+    return {name: read_table(output_path(workdir, name), index=name not in RECORD_OUTPUTS) for name in PILLARS}
+
+
+def setup_stage(stage, scale, workdir):
+    """Returns (run, after): run() is timed, after(result) persists inputs for later stages"""
+    import pandas as pd
+
+    group, _, name = stage.partition(".")
+    if group == "fetch":
+        module = load_pillar(name, scale)
+
+        def save_raw(raw):
+            os.makedirs(os.path.dirname(raw_path(workdir, name)), exist_ok=True)
+            pd.to_pickle(raw, raw_path(workdir, name))
+        return (lambda: PILLARS[name][2](module)), save_raw
+
+    if group == "analyze":
+        from utils import write_table
+        module = load_pillar(name, scale)
+        raw = pd.read_pickle(raw_path(workdir, name))
+
+        def save_output(df):
+            path = output_path(workdir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_table(df, path, index=name not in RECORD_OUTPUTS)
+        return (lambda: PILLARS[name][3](module, raw)), save_output
+
+    if group == "write":
+        outputs = load_outputs(workdir)
+        target = os.path.join(workdir, "write")
+        os.makedirs(target, exist_ok=True)
+        if name == "arrow":
+            from utils import write_table
+            return (lambda: [write_table(df, os.path.join(target, n), index=n not in RECORD_OUTPUTS)
+                             for n, df in outputs.items()]), None
+        return (lambda: [df.to_csv(os.path.join(target, f"{n}.csv"), index=n not in RECORD_OUTPUTS)
+                         for n, df in outputs.items()]), None
+
+    if group == "export":
+        import export_to_json
+        paths = {n: output_path(workdir, n) for n in PILLARS}
+        if name == "load":
+            return (lambda: [export_to_json.load_frame(p, index=n not in RECORD_OUTPUTS)
+                             for n, p in paths.items()]), None
+        if name == "encode_columnar":
+            import json_stream
+            frames = [export_to_json.load_frame(paths[n]) for n in export_to_json.TIME_SERIES]
+            return (lambda: [json_stream.encode_section(df, columnar=True) for df in frames]), None
+        return (lambda: run_export(export_to_json, paths, workdir)), None
+
+    if group == "streamlit":
+        import streamlit as st
+        visit = streamlit_pages()
+        if name == "rerun":
+            visit()  # fill the caches; only the warm pass is timed
+            return visit, None
+        return (lambda: (st.cache_resource.clear(), visit())), None
+
+    raise ValueError(f"Unknown stage {stage}")
+
+
+def run_export(export_to_json, paths, workdir):
+    data_dir = os.path.join(workdir, "Web", "data")
+    shutil.rmtree(data_dir, ignore_errors=True)
+    export_to_json.DATA_PATHS = paths
+    export_to_json.DATA_DIR = data_dir
+    export_to_json.SECTIONS_DIR = os.path.join(data_dir, "sections")
+    export_to_json.MANIFEST_PATH = os.path.join(data_dir, "manifest.json")
+    export_to_json.OUTPUT_PATH = os.path.join(data_dir, "dashboard_data.json")
+    export_to_json.LOCK_PATH = os.path.join(workdir, "export.lock")
+    export_to_json.fetch_live_fx = lambda: None
+    os.makedirs(data_dir, exist_ok=True)
+    export_to_json.main(pretty=False, combined=False)
+
+
+def streamlit_pages():
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(BASE_DIR, "Dashboard", "app.py"), default_timeout=120)
+
+    def visit():
+        app.run()
+        for page in app.sidebar.radio[0].options[1:]:
+            app.sidebar.radio[0].set_value(page).run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+        app.sidebar.radio[0].set_value(app.sidebar.radio[0].options[0])
+    return visit
+
+
+def child(stage, scale, workdir, repeat):
+    import contextlib
+    import io
+
+    run, after = setup_stage(stage, scale, workdir)
+    output = io.StringIO()  # pillar prints stay out of the report
+    with contextlib.redirect_stdout(output):
+        result = run()  # warm-up
+        if after is not None:
+            after(result)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+    print(json.dumps({"seconds": min(timings), "peak_mb": round(metrics.peak_rss_mb(), 1),
+                      "rows": _rows(result)}))
+
+
+def _rows(result):
+    """Rows of the stage's frame (first frame of a tuple), None for other results"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    shape = getattr(result, "shape", None)
+    return shape[0] if shape else None
+
+
+# --- parent side --------------------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_upstream(replay=None):
+    port = free_port()
+    command = [sys.executable, os.path.join(BASE_DIR, "fake_upstream.py"), "--port", str(port), "--since", FAKE_SINCE]
+    if replay:
+        command += ["--replay", replay]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"{base}/_fake/stats", timeout=1).read()
+            return process, base
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake_upstream.py did not start")
+
+
+def run_child(stage, scale, workdir, repeat, env):
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", stage, "--scale", str(scale), "--workdir", workdir,
+         "--repeat", str(repeat)],
+        capture_output=True, text=True, cwd=BASE_DIR, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{stage} @{scale}x failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {"threshold": DEFAULT_THRESHOLD, "results": {}}
+    with open(BASELINES_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(measured, baseline, threshold):
+    """List of regression messages (empty when within threshold or no baseline)"""
+    if not baseline:
+        return []
+    problems = []
+    seconds, base_seconds = measured["seconds"], baseline["seconds"]
+    if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > MIN_SECONDS_DELTA:
+        problems.append(f"{seconds * 1000:.0f} ms vs baseline {base_seconds * 1000:.0f} ms")
+    peak, base_peak = measured["peak_mb"], baseline["peak_mb"]
+    if peak > base_peak * (1 + threshold) and peak - base_peak > MIN_MB_DELTA:
+        problems.append(f"{peak:.0f} MB vs baseline {base_peak:.0f} MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages against stored baselines")
+    parser.add_argument("--scales", default=",".join(str(s) for s in SCALES), help="History multipliers, e.g. 1,10")
+    parser.add_argument("--stages", help="Comma-separated stage names or prefixes (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage (best one is used)")
+    parser.add_argument("--replay", metavar="DIR", help="Serve recorded fixtures (fake_upstream.py --replay)")
+    parser.add_argument("--threshold", type=float, help="Allowed slowdown/growth (default from the baselines file)")
+    parser.add_argument("--update", action="store_true", help="Rewrite the baselines from this machine")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.scale, args.workdir, args.repeat)
+        return 0
+
+    scales = [int(s) for s in args.scales.split(",")]
+    prefixes = [p.strip() for p in args.stages.split(",")] if args.stages else None
+    stages = [s for s in STAGES if prefixes is None or s.startswith(tuple(prefixes))]
+    # Later stages read what earlier ones produced: keep their inputs in the run
+    needed = set(stages)
+    if any(not s.startswith("fetch.") for s in stages):
+        needed |= {s for s in STAGES if s.startswith(("fetch.", "analyze."))}
+    plan = [s for s in STAGES if s in needed]
+
+    baselines = load_baselines()
+    threshold = args.threshold if args.threshold is not None else baselines.get("threshold", DEFAULT_THRESHOLD)
+    failures = []
+
+    fake, base_url = start_fake_upstream(args.replay)
+    env = dict(
+        os.environ,
+        SIE_BASE_URL=f"{base_url}/SieAPIRest/service/v1",
+        TWELVE_DATA_BASE_URL=base_url,
+        YAHOO_BASE_URL=base_url,
+        BANXICO_TOKEN=os.environ.get("BANXICO_TOKEN", "benchmark"),
+        ALPHA_STORE="0",        # every fetch goes to the (fake) upstream
+        ALPHA_EXPORT_CSV="0",
+        PYTHONDONTWRITEBYTECODE="1",
+    )
+    root = tempfile.mkdtemp(prefix="alpha-bench-")
+    print(f"{'STAGE':<34} {'SCALE':>5} {'ROWS':>7} {'TIME':>10} {'BASELINE':>10} {'PEAK RSS':>9} {'BASELINE':>9}")
+    print("-" * 92)
+    try:
+        for scale in scales:
+            workdir = os.path.join(root, f"x{scale}")
+            env["ALPHA_DATA_ROOT"] = os.path.join(workdir, "data")
+            for stage in plan:
+                measured = run_child(stage, scale, workdir, args.repeat, env)
+                if stage not in stages:
+                    continue
+                key = f"{stage}@{scale}x"
+                baseline = baselines["results"].get(key)
+                problems = compare(measured, baseline, threshold)
+                failures += [f"{key}: {p}" for p in problems]
+                status = "❌" if problems else ("✅" if baseline else "·")
+                print(f"{status} {stage:<32} {scale:>4}x {measured['rows'] or '':>7} "
+                      f"{measured['seconds'] * 1000:>8.1f}ms "
+                      f"{(baseline['seconds'] * 1000 if baseline else 0):>8.1f}ms "
+                      f"{measured['peak_mb']:>7.0f}MB {(baseline['peak_mb'] if baseline else 0):>7.0f}MB", flush=True)
+                if args.update:
+                    baselines["results"][key] = {"seconds": round(measured["seconds"], 6),
+                                                 "peak_mb": measured["peak_mb"]}
+    finally:
+        fake.terminate()
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.update:
+        baselines["threshold"] = threshold
+        baselines["results"] = dict(sorted(baselines["results"].items()))
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=4)
+            f.write("\n")
+        print(f"\nBaselines updated in {BASELINES_PATH}")
+        return 0
+
+    if failures:
+        print(f"\nRegressions (threshold {threshold:.0%}):")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print(f"\nNo regressions (threshold {threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
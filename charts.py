@@ -0,0 +1,113 @@
+"""
+PNG chart rendering for the pillar scripts.
+
+- Each chart is keyed by a hash of its input data (values + index + column names)
+  and of the drawing function's code. The hash is stored inside the PNG (a text
+  chunk), so a chart whose inputs did not change is not re-rendered.
+- Real renders run on a small background thread pool, so a pillar can save its data
+  and print its signals while the PNGs are drawn.
+- Drawing uses matplotlib's object API (Figure + Agg canvas), not pyplot, so charts
+  can render concurrently without shared global state.
+
+Usage:
+    def draw_spread(fig, df):
+        ax = fig.subplots()
+        ax.plot(df.index, df['Spread'])
+
+    future = charts.render_async(save_path('spread.png'), draw_spread, df[['Spread']])
+    ...
+    charts.wait([future])   # -> ['spread.png: rendered'] / ['spread.png: up to date']
+"""
+
+import hashlib
+import os
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+import metrics
+
+CHART_WORKERS = int(os.environ.get('ALPHA_CHART_WORKERS', '2'))
+FIGSIZE = (10, 5)
+HASH_KEY = "AlphaDataHash"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="chart")
+        return _executor
+
+
+def data_hash(draw, data):
+    """Hash of the chart inputs and of the drawing code (style changes re-render too)"""
+    h = hashlib.sha256()
+    code = draw.__code__
+    h.update(code.co_code)
+    h.update(repr(code.co_consts).encode('utf-8'))
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    h.update(repr(list(data.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def stored_hash(path):
+    """Data hash saved in an existing PNG's text chunks (None if missing/not ours)"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(8) != b'\x89PNG\r\n\x1a\n':
+                return None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                length, chunk_type = struct.unpack('>I4s', header)
+                if chunk_type == b'IDAT':
+                    return None  # text chunks written by matplotlib come before the image data
+                body = f.read(length)
+                f.read(4)  # CRC
+                if chunk_type == b'tEXt':
+                    key, _, value = body.partition(b'\x00')
+                    if key.decode('latin-1') == HASH_KEY:
+                        return value.decode('latin-1')
+    except OSError:
+        return None
+
+
+def _render(path, draw, data, digest):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    with metrics.span("chart", file=os.path.basename(path)):
+        fig = Figure(figsize=FIGSIZE)
+        FigureCanvasAgg(fig)
+        draw(fig, data)
+        tmp_path = f"{path}.tmp.png"
+        fig.savefig(tmp_path, metadata={HASH_KEY: digest})
+        os.replace(tmp_path, path)
+    return f"{os.path.basename(path)}: rendered"
+
+
+def render_async(path, draw, data):
+    """
+    Render draw(fig, data) to `path` on the chart worker pool, unless the PNG there
+    was made from the same data and code. Returns a Future with a short status line.
+    """
+    digest = data_hash(draw, data)
+    if stored_hash(path) == digest:
+        done = Future()
+        done.set_result(f"{os.path.basename(path)}: up to date")
+        return done
+    return _get_executor().submit(_render, path, draw, data, digest)
+
+
+def wait(futures):
+    """Block until the given renders finish; returns their status lines"""
+    return [future.result() for future in futures]
@@ -1,9 +1,20 @@
 document.addEventListener('DOMContentLoaded', function () {
     updateGreeting(); // Set personalized greeting
     fetchLiveUSDMXN(); // Fetch real-time FX rate
-    fetch('data/dashboard_data.json')
-        .then(response => response.json())
+    loadDashboardData()
         .then(data => {
+            // Time series -> columnar tables (typed arrays); start from the Max tier when
+            // the export has resolution tiers, the full section is fetched on zoom
+            TIME_SERIES.forEach(name => {
+                const tiers = parseTiers(data[name + '_tiers']);
+                if (tiers) {
+                    seriesTiers[name] = tiers;
+                    data[name] = tiers[tiers.length - 1].table;
+                } else {
+                    data[name] = toTable(data[name]);
+                    if (data[name]) fullSeries[name] = data[name];
+                }
+            });
             window.dashboardData = data; // Store globally for Modal access
             updateMeta(data.metadata);
             // Strategies
@@ -41,11 +52,186 @@ document.addEventListener('DOMContentLoaded', function () {
         .catch(err => console.error("Error loading data:", err));
 });
 
-// Fetch live USD/MXN rate from real-time APIs
+// --- DATA LOADING ---
+// data/manifest.json lists one file per section with its sha256. Sections are cached
+// in localStorage by hash, so only the ones that changed since the last visit are
+// downloaded.
+const SECTION_CACHE_PREFIX = 'alpha:section:';
+
+function loadDashboardData() {
+    return fetch('data/manifest.json', { cache: 'no-cache' })
+        .then(response => {
+            if (!response.ok) throw new Error(`manifest: HTTP ${response.status}`);
+            return response.json();
+        })
+        .then(manifest => {
+            window.dashboardManifest = manifest;
+            // Lazy sections (full-resolution series) are loaded on demand by loadFullSeries
+            const names = Object.keys(manifest.sections || {}).filter(name => !manifest.sections[name].lazy);
+            return Promise.all(names.map(name => loadSection(name, manifest.sections[name])))
+                .then(values => {
+                    const data = { metadata: manifest.metadata || {} };
+                    names.forEach((name, i) => { data[name] = values[i]; });
+                    return data;
+                });
+        });
+}
+
+function loadSection(name, entry) {
+    const key = SECTION_CACHE_PREFIX + name;
+    try {
+        const cached = JSON.parse(localStorage.getItem(key));
+        if (cached && cached.sha256 === entry.sha256) {
+            return Promise.resolve(cached.data);
+        }
+    } catch (e) { /* corrupt or unavailable cache -> download */ }
+
+    // Hash in the URL so HTTP caches never serve an outdated section
+    return fetch(`data/${entry.file}?v=${entry.sha256.slice(0, 12)}`)
+        .then(response => response.json())
+        .then(sectionData => {
+            try {
+                localStorage.setItem(key, JSON.stringify({ sha256: entry.sha256, data: sectionData }));
+            } catch (e) { /* quota exceeded: still usable, just not cached */ }
+            return sectionData;
+        });
+}
+
+// --- TIME SERIES TABLES ---
+// carry_trade / inflation / risk / economy are exported columnar:
+//   {schema_version: 1, index: [dates], columns: {name: [values]}}
+// Older files have a list of records instead. Both become {index, columns, length},
+// numeric columns as Float64Array (null -> NaN, drawn by Chart.js as a gap).
+const TABLE_SCHEMA_VERSION = 1;
+const TIME_SERIES = ['carry_trade', 'inflation', 'risk', 'economy'];
+
+function toTable(section) {
+    if (!section) return null;
+    if (Array.isArray(section)) {
+        const names = section.length ? Object.keys(section[0]).filter(k => k !== 'Date') : [];
+        const cols = {};
+        names.forEach(name => { cols[name] = section.map(r => r[name]); });
+        section = { schema_version: TABLE_SCHEMA_VERSION, index: section.map(r => r.Date), columns: cols };
+    }
+    if (section.schema_version > TABLE_SCHEMA_VERSION) {
+        console.warn(`Unknown time series schema v${section.schema_version}`);
+    }
+    const index = section.index || [];
+    const columns = {};
+    Object.entries(section.columns || {}).forEach(([name, values]) => {
+        const numeric = values.every(v => v === null || typeof v === 'number');
+        columns[name] = numeric ? Float64Array.from(values, v => (v === null ? NaN : v)) : values;
+    });
+    return { index, columns, length: index.length };
+}
+
+// One row as an object (NaN -> null), for KPI boxes and modals
+function tableRow(table, i) {
+    const row = { Date: table.index[i] };
+    Object.entries(table.columns).forEach(([name, values]) => {
+        const v = values[i];
+        row[name] = (typeof v === 'number' && isNaN(v)) ? null : v;
+    });
+    return row;
+}
+
+function lastRow(table) {
+    return table && table.length ? tableRow(table, table.length - 1) : {};
+}
+
+// Last n rows (typed columns are sliced as views, no copy)
+function tailTable(table, n) {
+    const start = Math.max(table.length - n, 0);
+    const columns = {};
+    Object.entries(table.columns).forEach(([name, values]) => {
+        columns[name] = values.subarray ? values.subarray(start) : values.slice(start);
+    });
+    return { index: table.index.slice(start), columns, length: table.length - start };
+}
+
+// Rows from the last `days` calendar days (ISO dates compare as strings)
+function sinceTable(table, days) {
+    if (!table || !table.length) return table;
+    const last = new Date(table.index[table.length - 1]);
+    last.setDate(last.getDate() - days);
+    const cutoff = last.toISOString().slice(0, 10);
+    let start = 0;
+    while (start < table.length && table.index[start] < cutoff) start++;
+    return tailTable(table, table.length - start);
+}
+
+// --- RESOLUTION TIERS ---
+// "<name>_tiers" sections hold pre-reduced views (1M/1Y/5Y/Max, ~500 points each,
+// see downsample.py). Charts start from them; the full-resolution section is only
+// fetched when a requested range falls in a downsampled tier.
+const seriesTiers = {};
+const fullSeries = {};
+
+function parseTiers(section) {
+    if (!section || !section.tiers) return null;
+    const tiers = Object.entries(section.tiers).map(([name, tier]) => ({
+        name,
+        days: tier.days,
+        downsampled: tier.downsampled,
+        table: toTable(tier.table)
+    }));
+    // Smallest window first, "Max" (days = null) last
+    tiers.sort((a, b) => (a.days === null) - (b.days === null) || a.days - b.days);
+    return tiers.length ? tiers : null;
+}
+
+function loadFullSeries(name) {
+    if (fullSeries[name]) return Promise.resolve(fullSeries[name]);
+    const manifest = window.dashboardManifest;
+    if (!manifest || !manifest.sections[name]) return Promise.reject(new Error(`No section ${name}`));
+    return loadSection(name, manifest.sections[name]).then(section => {
+        fullSeries[name] = toTable(section);
+        return fullSeries[name];
+    });
+}
+
+// Last `days` of a series at the best resolution available without over-fetching
+function seriesView(name, days) {
+    const tiers = seriesTiers[name];
+    if (!tiers) return Promise.resolve(sinceTable(window.dashboardData[name], days));
+    const tier = tiers.find(t => t.days === null || t.days >= days);
+    if (!tier.downsampled || fullSeries[name]) {
+        return Promise.resolve(sinceTable(fullSeries[name] || tier.table, days));
+    }
+    return loadFullSeries(name)
+        .then(full => sinceTable(full, days))
+        .catch(() => sinceTable(tier.table, days));
+}
+
+// First column present among `names` (later names are legacy fallbacks)
+function column(table, ...names) {
+    for (const name of names) {
+        if (table.columns[name]) return table.columns[name];
+    }
+    return new Float64Array(table.length).fill(NaN);
+}
+
+// Live USD/MXN: pushed by fx_stream.py over Server-Sent Events (port 8081 on the
+// same host, or window.FX_STREAM_URL). metadata.live_fx_rate from the export is
+// still shown first and stays as the value when the stream is not running.
+const FX_STREAM_PORT = 8081;
+
 function fetchLiveUSDMXN() {
-    // Live rate is now fetched by Python backend and stored in metadata.live_fx_rate
-    // The display will be updated in updateMeta() when JSON loads
-    console.log('Live FX rate will be loaded from backend JSON');
+    if (!window.EventSource || !location.protocol.startsWith('http')) return;
+    const url = window.FX_STREAM_URL || `${location.protocol}//${location.hostname}:${FX_STREAM_PORT}/fx/stream`;
+    const source = new EventSource(url);
+    source.addEventListener('fx', event => {
+        const quote = JSON.parse(event.data);
+        if (quote && quote.rate) {
+            window.liveFXFromStream = true;
+            updateLiveFXDisplay(quote.rate);
+        }
+    });
+    source.onerror = () => {
+        // No stream service: stop retrying and keep the exported rate
+        if (source.readyState === EventSource.CLOSED || !window.liveFXStreamSeen) source.close();
+    };
+    source.onopen = () => { window.liveFXStreamSeen = true; };
 }
 
 function updateLiveFXDisplay(livePrice) {
@@ -91,8 +277,8 @@ function renderCarryBox(status) {
 }
 
 function renderInflationBox(inflData) {
-    if (!inflData || !inflData[0]) return;
-    const data = inflData.slice(-1)[0]; // get latest (Fix: was [0])
+    if (!inflData || !inflData.length) return;
+    const data = lastRow(inflData); // get latest
     const realRate = parseFloat(data['Real Rate Ex-Post'] || 0);
 
     const box = document.getElementById('box-inflation');
@@ -116,8 +302,8 @@ function renderInflationBox(inflData) {
 }
 
 function renderRiskBox(riskData) {
-    if (!riskData || !riskData[0]) return;
-    const data = riskData.slice(-1)[0];
+    if (!riskData || !riskData.length) return;
+    const data = lastRow(riskData);
     const close = parseFloat(data['Close'] || data['Tipo de Cambio FIX']);
     const upper = parseFloat(data['Upper_Band']);
     const isOverbought = close >= (upper * 0.995);
@@ -146,7 +332,7 @@ function openAlphaModal(strategyType) {
     if (!window.dashboardData) return;
 
     // Common Data
-    const carryData = window.dashboardData.carry_trade.slice(-1)[0];
+    const carryData = lastRow(window.dashboardData.carry_trade);
     const currentSpread = parseFloat(carryData['Carry Spread (bp)']).toFixed(0);
     const mxRate = parseFloat(carryData['TIIE 28d']).toFixed(2);
     const usRate = parseFloat(carryData['FED Rate (Proxy 13W)'] || carryData['3-Month Bill'] || 0).toFixed(2);
@@ -163,7 +349,7 @@ function openAlphaModal(strategyType) {
         title.textContent = "ANÁLISIS: CARRY TRADE";
 
         // Get additional data for explanations
-        const riskData = window.dashboardData.risk ? window.dashboardData.risk.slice(-1)[0] : {};
+        const riskData = lastRow(window.dashboardData.risk);
         const systemStatus = window.dashboardData.system_status || {};
         const currentPrice = parseFloat(riskData['Close'] || 18).toFixed(2);
         const stopLoss = systemStatus.stop_loss || '$' + (currentPrice * 0.99).toFixed(2);
@@ -243,7 +429,7 @@ function openAlphaModal(strategyType) {
 
     } else if (strategyType === 'inflation') {
         title.textContent = "ANÁLISIS: ESCUDO DE INFLACIÓN";
-        const infl = window.dashboardData.inflation.slice(-1)[0];
+        const infl = lastRow(window.dashboardData.inflation);
         const nominalRate = parseFloat(infl['Cetes 28d'] || 0).toFixed(2);
         const inflationRate = parseFloat(infl['Inflation YoY'] || 0).toFixed(2);
         const real = parseFloat(infl['Real Rate Ex-Post']).toFixed(2);
@@ -312,7 +498,7 @@ function openAlphaModal(strategyType) {
 
     } else if (strategyType === 'risk') {
         title.textContent = "ANÁLISIS: TERMÓMETRO DE RIESGO";
-        const risk = window.dashboardData.risk.slice(-1)[0];
+        const risk = lastRow(window.dashboardData.risk);
         const close = parseFloat(risk['Close'] || risk['Tipo de Cambio FIX']).toFixed(2);
         const upper = parseFloat(risk['Upper_Band']).toFixed(2);
         const lower = parseFloat(risk['Lower_Band']).toFixed(2);
@@ -418,8 +604,8 @@ function updateMeta(meta) {
     if (meta && meta.generated_at) {
         document.getElementById('last-update').textContent = `Actualizado: ${meta.generated_at}`;
     }
-    // Display live FX rate from backend
-    if (meta && meta.live_fx_rate) {
+    // Display live FX rate from backend (unless the stream already sent a newer one)
+    if (meta && meta.live_fx_rate && !window.liveFXFromStream) {
         updateLiveFXDisplay(meta.live_fx_rate);
     }
 }
@@ -467,7 +653,7 @@ function renderAlphaBox(status) {
 // --- PILLAR 1: CARRY TRADE (Logic: Spread Zones) ---
 function renderPillar1(data) {
     if (!data || data.length === 0) return;
-    const last = data[data.length - 1];
+    const last = lastRow(data);
 
     // KPI
     document.getElementById('val-tiie').textContent = `${parseFloat(last['TIIE 28d']).toFixed(2)}%`;
@@ -500,10 +686,10 @@ function renderPillar1(data) {
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: data.map(d => d.Date),
+            labels: data.index,
             datasets: [{
                 label: 'Spread BP',
-                data: data.map(d => d['Carry Spread (bp)']),
+                data: column(data, 'Carry Spread (bp)'),
                 borderColor: spreadColor,
                 backgroundColor: spreadColor === "#34c759" ? 'rgba(52, 199, 89, 0.1)' : 'rgba(255, 59, 48, 0.1)',
                 fill: true,
@@ -518,7 +704,7 @@ function renderPillar1(data) {
 // --- PILLAR 2: INFLATION ---
 function renderPillar2(data) {
     if (!data || data.length === 0) return;
-    const last = data[data.length - 1];
+    const last = lastRow(data);
 
     // KPI
     // Prefer Real Rate if available, else Breakeven
@@ -536,10 +722,10 @@ function renderPillar2(data) {
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: data.map(d => d.Date),
+            labels: data.index,
             datasets: [{
                 label: 'Tasa Real Ex-Post',
-                data: data.map(d => d['Real Rate Ex-Post'] || d['Breakeven Inflation']),
+                data: column(data, 'Real Rate Ex-Post', 'Breakeven Inflation'),
                 borderColor: '#FF6692',
                 borderWidth: 2,
                 pointRadius: 0
@@ -552,14 +738,14 @@ function renderPillar2(data) {
 // --- PILLAR 3: RISK (Logic: Bollinger Alerts) ---
 // Store chart instance and data globally for period switching
 let riskChart = null;
-let riskData = [];
+let riskData = null;
 
 function renderPillar3(data) {
     if (!data || data.length === 0) return;
 
     // Store data globally for period switching
     riskData = data;
-    const last = data[data.length - 1];
+    const last = lastRow(data);
 
     // KPI - Only update if no live rate is available
     const close = parseFloat(last['Close'] || last['Tipo de Cambio FIX']);
@@ -589,7 +775,7 @@ function renderPillar3(data) {
     }
 
     // Render chart with default 90 days
-    renderRiskChart(data.slice(-90));
+    seriesView('risk', 90).then(renderRiskChart);
 }
 
 function renderRiskChart(data) {
@@ -603,18 +789,18 @@ function renderRiskChart(data) {
     riskChart = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: data.map(d => d.Date),
+            labels: data.index,
             datasets: [
                 {
                     label: 'USD/MXN',
-                    data: data.map(d => d['Close'] || d['Tipo de Cambio FIX']),
+                    data: column(data, 'Close', 'Tipo de Cambio FIX'),
                     borderColor: '#00CC96',
                     borderWidth: 2,
                     pointRadius: 0
                 },
                 {
                     label: 'Upper',
-                    data: data.map(d => d['Upper_Band']),
+                    data: column(data, 'Upper_Band'),
                     borderColor: 'rgba(255, 255, 255, 0.2)',
                     borderWidth: 1,
                     pointRadius: 0,
@@ -623,7 +809,7 @@ function renderRiskChart(data) {
                 },
                 {
                     label: 'Lower',
-                    data: data.map(d => d['Lower_Band']),
+                    data: column(data, 'Lower_Band'),
                     borderColor: 'rgba(255, 255, 255, 0.2)',
                     borderWidth: 1,
                     pointRadius: 0,
@@ -645,17 +831,16 @@ function setChartPeriod(days) {
         }
     });
 
-    // Filter data and re-render
-    if (riskData.length > 0) {
-        const filteredData = riskData.slice(-days);
-        renderRiskChart(filteredData);
+    // Filter data (calendar days, from the matching tier) and re-render
+    if (riskData && riskData.length > 0) {
+        seriesView('risk', days).then(renderRiskChart);
     }
 }
 
 // --- PILLAR 4: ECONOMY ---
 function renderPillar4(data) {
     if (!data || data.length === 0) return;
-    const last = data[data.length - 1];
+    const last = lastRow(data);
 
     // KPI
     // Just display something relevant
@@ -668,17 +853,17 @@ function renderPillar4(data) {
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: data.map(d => d.Date),
+            labels: data.index,
             datasets: [{
                 label: 'M1 (Dinero)',
-                data: data.map(d => d['M1 Normalized']),
+                data: column(data, 'M1 Normalized'),
                 borderColor: '#636EFA',
                 borderWidth: 2,
                 pointRadius: 0
             },
             {
                 label: 'IPC (Bolsa)',
-                data: data.map(d => d['IPC Normalized']),
+                data: column(data, 'IPC Normalized'),
                 borderColor: '#00CC96',
                 borderWidth: 2,
                 pointRadius: 0
@@ -0,0 +1,157 @@
+"""
+Chart downsampling and resolution tiers.
+
+- lttb_indices / lttb_frame: Largest-Triangle-Three-Buckets for line series (keeps the
+  visual shape, peaks and troughs with a fixed point budget; first and last rows kept)
+- ohlc_frame: bar aggregation for candles (Open first, High max, Low min, Close last)
+- tier_frames: pre-reduced views of the latest 1M / 1Y / 5Y and the whole history,
+  each with at most ~TIER_POINTS rows
+
+The last row of every reduced frame is the last row of the input, so KPIs read from a
+tier match the full-resolution data.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+TIER_POINTS = 500
+
+# (name, calendar days back from the last date; None = whole history)
+TIERS = (("1M", 31), ("1Y", 366), ("5Y", 1827), ("Max", None))
+
+OHLC_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points LTTB keeps from (x, y); x must be increasing, no NaNs"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def _x_values(df, dates=None):
+    """Numeric x axis: dates (given or the DatetimeIndex) in days, else row numbers"""
+    if dates is None and isinstance(df.index, pd.DatetimeIndex):
+        dates = df.index
+    if dates is None:
+        return np.arange(len(df), dtype=float)
+    return pd.DatetimeIndex(dates).values.astype('datetime64[ns]').astype(np.int64) / 86_400e9
+
+
+def lttb_frame(df, points=TIER_POINTS, columns=None, dates=None):
+    """
+    Rows of `df` kept by LTTB. Each of `columns` (default: every numeric column) gets
+    points // len(columns) picks and the union of rows is returned, so no series loses
+    its extremes. NaNs are skipped per column.
+    """
+    n = len(df)
+    if n <= points:
+        return df
+    if columns is None:
+        columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    if not columns:
+        return df.iloc[np.linspace(0, n - 1, points).astype(int)]
+
+    x = _x_values(df, dates)
+    values = [df[column].to_numpy(dtype=float) for column in columns]
+    per_column = max(points // len(columns), 3)
+    keep = _lttb_union(x, values, per_column)
+    # Correlated columns pick mostly the same rows: spend the unused budget once
+    if keep.sum() < points * 0.8:
+        per_column = min(int(per_column * points / keep.sum()), n)
+        keep = _lttb_union(x, values, per_column)
+    return df[keep]
+
+
+def _lttb_union(x, values, per_column):
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, len(x) - 1]] = True
+    for y in values:
+        valid = np.flatnonzero(~np.isnan(y))
+        if len(valid) == 0:
+            continue
+        keep[valid[lttb_indices(x[valid], y[valid], per_column)]] = True
+    return keep
+
+
+def ohlc_frame(df, points=TIER_POINTS):
+    """
+    Aggregate consecutive rows into at most `points` bars. OHLC(V) columns use bar
+    rules; every other column (dates, indicators) keeps the bucket's last value.
+    """
+    n = len(df)
+    if n <= points:
+        return df
+    size = math.ceil(n / points)
+    buckets = np.arange(n) // size
+    agg = {c: OHLC_AGG.get(c, "last") for c in df.columns}
+    out = df.groupby(buckets).agg(agg)
+    # Index of each bucket's last row (dates stay real observation dates)
+    ends = np.minimum(np.arange(len(out)) * size + size - 1, n - 1)
+    out.index = df.index[ends]
+    return out
+
+
+def reduce_frame(df, points=TIER_POINTS, method="lttb", dates=None):
+    if method == "ohlc":
+        return ohlc_frame(df, points)
+    return lttb_frame(df, points, dates=dates)
+
+
+def tier_window(df, days, dates=None):
+    """Rows within `days` calendar days of the last date (all rows for days=None)"""
+    if days is None or df.empty:
+        return df
+    dates = pd.DatetimeIndex(df.index if dates is None else dates)
+    return df[dates >= dates.max() - pd.Timedelta(days=days)]
+
+
+def tier_view(df, tier, points=TIER_POINTS, method="lttb"):
+    """One tier of a DatetimeIndex frame (e.g. for a chart range selector)"""
+    days = dict(TIERS)[tier]
+    return reduce_frame(tier_window(df, days), points, method)
+
+
+def tier_frames(df, date_column="Date", points=TIER_POINTS, method="lttb"):
+    """
+    {tier: {"days", "rows", "downsampled", "table"}} for a frame with a date column.
+    Tiers whose window already covers the whole history are left out (use "Max").
+    """
+    dates = pd.to_datetime(df[date_column])
+    tiers = {}
+    for name, days in TIERS:
+        window = tier_window(df, days, dates)
+        if days is not None and len(window) == len(df):
+            continue
+        reduced = reduce_frame(window, points, method, dates=dates[window.index])
+        tiers[name] = {
+            "days": days,
+            "rows": len(window),
+            "downsampled": len(reduced) < len(window),
+            "table": reduced.reset_index(drop=True),
+        }
+    return tiers
@@ -1,71 +1,239 @@
 import pandas as pd
+import argparse
 import json
 import os
 import glob
-import ast
+import hashlib
+import time
+from contextlib import contextmanager
 from datetime import datetime
-import yfinance as yf
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, exports must not overlap there
+    fcntl = None
+
+import backtest
+import downsample
+import http_client
+import json_stream
+import metrics
+import utils
+from utils import read_table
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-CSV_PATHS = {
-    "carry_trade": os.path.join(BASE_DIR, "1_Carry_Trade/carry_trade_data.csv"),
-    "inflation": os.path.join(BASE_DIR, "2_Inflation_Shield/inflation_data.csv"),
-    "risk": os.path.join(BASE_DIR, "3_Risk_Thermometer/risk_data.csv"),
-    "economy": os.path.join(BASE_DIR, "4_Real_Economy/economy_data.csv"),
-    "us_stocks": os.path.join(BASE_DIR, "5_US_Stocks/us_stocks_data.csv"),
-    "global_indicators": os.path.join(BASE_DIR, "6_Global_Indicators/global_indicators_data.csv")
+# Pillar outputs (without extension: <path>.arrow, or legacy <path>.csv)
+DATA_PATHS = {
+    "carry_trade": os.path.join(BASE_DIR, "1_Carry_Trade/carry_trade_data"),
+    "inflation": os.path.join(BASE_DIR, "2_Inflation_Shield/inflation_data"),
+    "risk": os.path.join(BASE_DIR, "3_Risk_Thermometer/risk_data"),
+    "economy": os.path.join(BASE_DIR, "4_Real_Economy/economy_data"),
+    "us_stocks": os.path.join(BASE_DIR, "5_US_Stocks/us_stocks_data"),
+    "global_indicators": os.path.join(BASE_DIR, "6_Global_Indicators/global_indicators_data")
 }
 
-OUTPUT_PATH = os.path.join(BASE_DIR, "Web/data/dashboard_data.json")
+# Written columnar (index + one array per column); the other sections stay as records
+TIME_SERIES = ("carry_trade", "inflation", "risk", "economy")
+
+# Time series whose dashboard chart has a range selector also get a "<name>_tiers" section
+# (1M/1Y/5Y/Max, ~500 points each) once they have more rows than that. The dashboard loads
+# the tiers up front and fetches the full-resolution section on demand; every other series
+# is loaded whole (its tiers would be bigger than the section itself).
+# Risk is bar data (OHLC aggregation), the rest are lines (LTTB).
+TIER_SUFFIX = "_tiers"
+TIERED_SERIES = ("risk",)
+TIER_METHODS = {"risk": "ohlc"}
+
+# One file per section plus a manifest with content hashes; only changed sections are rewritten
+DATA_DIR = os.path.join(BASE_DIR, "Web/data")
+SECTIONS_DIR = os.path.join(DATA_DIR, "sections")
+MANIFEST_PATH = os.path.join(DATA_DIR, "manifest.json")
+MANIFEST_VERSION = 1
+
+# Legacy single-file export (read to migrate old data; written only when ALPHA_JSON_COMBINED=1 / --combined)
+OUTPUT_PATH = os.path.join(DATA_DIR, "dashboard_data.json")
+WRITE_COMBINED = os.environ.get('ALPHA_JSON_COMBINED', '0') == '1'
+
+# Minified by default; ALPHA_JSON_PRETTY=1 (or --pretty) writes indented debug files
+PRETTY_JSON = os.environ.get('ALPHA_JSON_PRETTY', '0') == '1'
+
+# Twelve Data API root (point at fake_upstream.py for offline runs)
+TWELVE_DATA_BASE_URL = os.environ.get('TWELVE_DATA_BASE_URL', "https://api.twelvedata.com").rstrip('/')
+
+# Advisory lock held while the manifest is read, merged and rewritten, so exports can run
+# concurrently (e.g. Banxico and market refreshes). Kept outside Web/data: never published.
+LOCK_PATH = os.path.join(BASE_DIR, "data", "export.lock")
+LOCK_TIMEOUT = float(os.environ.get('ALPHA_EXPORT_LOCK_TIMEOUT', '300'))
+
+def load_frame(path, index=True):
+    """Pillar output as a DataFrame ready for export (empty if missing/unreadable)"""
+    try:
+        df = read_table(path, index=index)
+        if df.empty:
+            return df
+        if index:
+            # DatetimeIndex -> 'Date' column with plain YYYY-MM-DD strings
+            df.index = pd.to_datetime(df.index).strftime('%Y-%m-%d')
+            df.index.name = 'Date'
+            df = df.reset_index()
+        return df
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return pd.DataFrame()
+
+
+def section_frame(section):
+    """DataFrame from a section kept from a previous export (columnar dict or records)"""
+    if isinstance(section, dict):
+        return json_stream.frame_from_columnar(section)
+    return pd.DataFrame(section)
+
+
+def last_records(section):
+    """Last row of a section (DataFrame, columnar dict or records) as a one-item list of dicts"""
+    if isinstance(section, dict):
+        section = section_frame(section)
+    if isinstance(section, pd.DataFrame):
+        return section.tail(1).to_dict(orient='records')
+    return section[-1:]
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Could not load {path}: {e}")
+        return None
+
+
+def section_path(name):
+    return os.path.join(SECTIONS_DIR, f"{name}.json")
 
-def load_and_clean(path):
-    if os.path.exists(path):
+
+def load_existing_section(name, legacy):
+    """Section from the previous export (its own file, else the legacy combined file)"""
+    section = load_json(section_path(name))
+    if section is None:
+        section = legacy.get(name)
+    return section if section is not None else []
+
+
+@contextmanager
+def export_lock(timeout=LOCK_TIMEOUT):
+    """Exclusive lock on LOCK_PATH (waits up to `timeout` seconds for another export)"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    with open(LOCK_PATH, 'a') as f:
+        deadline = time.monotonic() + timeout
+        waiting = False
+        with metrics.span("export", step="lock_wait"):
+            while True:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Another export still holds {LOCK_PATH} after {timeout:.0f}s")
+                    if not waiting:
+                        print("Waiting for another export to finish...")
+                        waiting = True
+                    time.sleep(0.2)
         try:
-            df = pd.read_csv(path)
-            if 'price_history' in df.columns:
-                # Parse string representations of lists to actual Python lists
-                df['price_history'] = df['price_history'].apply(
-                    lambda x: ast.literal_eval(x) if pd.notna(x) and isinstance(x, str) else x
-                )
-            # Convert to records (list of dicts) to avoid JSON serialization issues
-            records = df.to_dict(orient='records')
-            return records
-        except Exception as e:
-            print(f"Error reading {path}: {e}")
-            return []
-    return []
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
 
 
-def fetch_live_fx():
+def build_tiers(df, method="lttb"):
+    return {
+        "schema_version": json_stream.SCHEMA_VERSION,
+        "points": downsample.TIER_POINTS,
+        "method": method,
+        "tiers": downsample.tier_frames(df, method=method),
+    }
+
+
+def write_sections(sections, manifest, pretty=False):
+    """
+    Write every section whose content hash differs from the manifest (or whose file is missing).
+    Returns the updated {name: entry} manifest map and the names that were written.
+    """
+    os.makedirs(SECTIONS_DIR, exist_ok=True)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    entries = dict(manifest.get("sections", {}))
+    written = []
+    for name in TIME_SERIES:
+        # A series written without tiers must not keep the tiers of an older export
+        if name in sections and name + TIER_SUFFIX not in sections and entries.pop(name + TIER_SUFFIX, None):
+            try:
+                os.remove(section_path(name + TIER_SUFFIX))
+            except FileNotFoundError:
+                pass
+    for name, value in sections.items():
+        # Full-resolution series with tiers are lazy: the dashboard starts from the tiers
+        lazy = name in TIME_SERIES and name + TIER_SUFFIX in sections
+        text = json_stream.encode_section(value, columnar=name in TIME_SERIES or name.endswith(TIER_SUFFIX))
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path = section_path(name)
+        previous = entries.get(name, {})
+        if previous.get("sha256") == digest and os.path.exists(path):
+            entries[name] = dict(previous, lazy=lazy)
+            continue
+        size = json_stream.write_text(path, text, pretty=pretty)
+        entries[name] = {
+            "file": f"sections/{name}.json",
+            "lazy": lazy,
+            "sha256": digest,
+            "bytes": size,
+            "updated_at": now,
+        }
+        written.append(name)
+    return entries, written
+
+
+def fetch_live_quote():
+    """Latest USD/MXN as {"rate", "source"} (Twelve Data, then Yahoo), or None"""
     TWELVE_DATA_API_KEY = os.environ.get('TWELVE_DATA_API_KEY', '')
     try:
-        import requests
-        url = f"https://api.twelvedata.com/price?symbol=USD/MXN&apikey={TWELVE_DATA_API_KEY}"
-        response = requests.get(url, timeout=5)
+        url = f"{TWELVE_DATA_BASE_URL}/price?symbol=USD/MXN&apikey={TWELVE_DATA_API_KEY}"
+        response = http_client.get(url, timeout=(3, 5), max_retries=1)
         if response.status_code == 200:
             data = response.json()
             if 'price' in data:
                 live_price = float(data['price'])
                 print(f"Live USD/MXN (Twelve Data): {live_price}")
-                return live_price
+                return {"rate": live_price, "source": "twelvedata"}
     except Exception as e:
         print(f"Twelve Data failed: {e}")
 
     try:
-        ticker = yf.Ticker("MXN=X")
-        data = ticker.history(period='1d', interval='1m')
+        if utils.YAHOO_BASE_URL:
+            data = utils.yahoo_chart("MXN=X", period='1d', interval='1m')
+        else:
+            import yfinance as yf  # only needed when Twelve Data does not answer
+            data = yf.Ticker("MXN=X").history(period='1d', interval='1m')
         if not data.empty:
             live_price = float(data['Close'].iloc[-1])
             print(f"Live USD/MXN (Yahoo): {live_price}")
-            return live_price
+            return {"rate": live_price, "source": "yahoo"}
     except Exception as e:
         print(f"Yahoo Finance failed: {e}")
 
     return None
 
 
+def fetch_live_fx():
+    quote = fetch_live_quote()
+    return quote["rate"] if quote else None
+
+
 def generate_alpha_signal(data_carry, data_risk):
     signal = {
         "status": "NEUTRAL",
@@ -89,19 +257,21 @@ def generate_alpha_signal(data_carry, data_risk):
     except:
         return signal
 
-    if spread > 500 and vol_z < 1.5:
+    # Same rules as the historical backtest (backtest.py)
+    position = backtest.signals([spread], [vol_z])[0]
+    sl = backtest.stop_levels([position], [close_fx], [upper_band])[0]
+
+    if position == backtest.LONG:
         signal["status"] = "🟢 RIESGO ACEPTABLE"
         signal["action"] = "LONG MXN (CARRY)"
         signal["probability"] = "68%"
-        sl = upper_band * 1.01 if upper_band > 0 else close_fx * 1.02
         signal["stop_loss"] = f"${sl:.2f}"
         signal["reason"] = f"Spread {spread:.0f}pbs + Volatilidad Baja (Z={vol_z:.1f})"
 
-    elif spread < 400 or vol_z > 2.0:
+    elif position == backtest.SHORT:
         signal["status"] = "🔴 RIESGO ALTO"
         signal["action"] = "SHORT MXN (COMPRA USD)"
         signal["probability"] = "75%"
-        sl = close_fx * 0.99
         signal["stop_loss"] = f"${sl:.2f}"
         signal["reason"] = f"Compresión de Spread ({spread:.0f}pbs) o Pánico (Z={vol_z:.1f})"
 
@@ -114,73 +284,98 @@ def generate_alpha_signal(data_carry, data_risk):
 
     return signal
 
-def replace_nan_with_none(obj):
-    """Recursively replace NaN values with None in nested structures"""
-    if isinstance(obj, dict):
-        return {k: replace_nan_with_none(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [replace_nan_with_none(item) for item in obj]
-    elif isinstance(obj, float) and pd.isna(obj):
-        return None
-    else:
-        return obj
 
-def main():
-    # Load existing data first (to preserve data from other workflows)
-    existing_data = {}
-    if os.path.exists(OUTPUT_PATH):
-        try:
-            with open(OUTPUT_PATH, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-            print(f"Loaded existing data from {OUTPUT_PATH}")
-        except Exception as e:
-            print(f"Could not load existing data: {e}")
-
-    # Load new data from CSVs
-    carry_data = load_and_clean(CSV_PATHS["carry_trade"])
-    inflation_data = load_and_clean(CSV_PATHS["inflation"])
-    risk_data = load_and_clean(CSV_PATHS["risk"])
-    economy_data = load_and_clean(CSV_PATHS["economy"])
-    us_stocks_data = load_and_clean(CSV_PATHS["us_stocks"])
-    global_indicators_data = load_and_clean(CSV_PATHS["global_indicators"])
-
-    # Merge: use new data if available, else preserve existing
-    final_carry = carry_data if carry_data else existing_data.get("carry_trade", [])
-    final_inflation = inflation_data if inflation_data else existing_data.get("inflation", [])
-    final_risk = risk_data if risk_data else existing_data.get("risk", [])
-    final_economy = economy_data if economy_data else existing_data.get("economy", [])
-    final_us_stocks = us_stocks_data if us_stocks_data else existing_data.get("us_stocks", [])
-    final_global = global_indicators_data if global_indicators_data else existing_data.get("global_indicators", [])
-
-    # Generate Alpha Decision (use merged data)
-    alpha_signal = generate_alpha_signal(final_carry, final_risk)
-
-    # Fetch live FX rate
-    live_fx = fetch_live_fx()
-
-    data = {
-        "metadata": {
-            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "live_fx_rate": live_fx
-        },
-        "system_status": alpha_signal,
-        "carry_trade": final_carry,
-        "inflation": final_inflation,
-        "risk": final_risk,
-        "economy": final_economy,
-        "us_stocks": final_us_stocks,
-        "global_indicators": final_global
-    }
+def add_tiers(sections):
+    """
+    Add the missing "<name>_tiers" section of every range-selectable series in `sections`
+    that has more rows than a tier's point budget
+    """
+    for name in TIERED_SERIES:
+        df = sections.get(name)
+        if isinstance(df, pd.DataFrame) and len(df) > downsample.TIER_POINTS and name + TIER_SUFFIX not in sections:
+            sections[name + TIER_SUFFIX] = build_tiers(df, TIER_METHODS.get(name, "lttb"))
+    return sections
 
+def main(pretty=None, combined=None, only=None):
+    """
+    Export the pillar outputs. `only` limits the job to those sections (e.g. the ones a
+    Banxico refresh produced); every other section keeps its current file and manifest entry.
+    """
+    pretty = PRETTY_JSON if pretty is None else pretty
+    combined = WRITE_COMBINED if combined is None else combined
+    names = list(only) if only else list(DATA_PATHS)
+    unknown = sorted(set(names) - set(DATA_PATHS))
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)} (choose from {', '.join(DATA_PATHS)})")
 
-    # Clean NaN values from the data structure
-    data = replace_nan_with_none(data)
+    # Slow work happens before taking the lock: read pillar outputs, build tiers, fetch FX
+    sections = {}
+    for name in names:
+        with metrics.span("export", step="load", section=name):
+            df = load_frame(DATA_PATHS[name], index=name in TIME_SERIES)
+        if not df.empty:
+            sections[name] = df
+    with metrics.span("export", step="tiers"):
+        add_tiers(sections)
+    with metrics.span("export", step="live_fx"):
+        live_fx = fetch_live_fx()
 
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    # Read-merge-write of the manifest under the lock: a concurrent export's sections are
+    # re-read here, so neither job drops the other's entries
+    with export_lock():
+        manifest = load_json(MANIFEST_PATH) or {}
+        # Old single-file exports are only read while their sections have no file of their own
+        legacy = {} if manifest else (load_json(OUTPUT_PATH) or {})
+        for name in names:
+            if name not in sections and name not in manifest.get("sections", {}) and legacy.get(name):
+                # Migrate from the legacy file (time series are re-encoded columnar)
+                sections[name] = section_frame(legacy[name]) if name in TIME_SERIES else legacy[name]
+        add_tiers(sections)
 
-    print(f"Data exported to {OUTPUT_PATH}")
+        def current(name):
+            return sections[name] if name in sections else load_existing_section(name, legacy)
 
-if __name__ == "__main__":
-    main()
+        # Generate Alpha Decision (use merged data)
+        sections["system_status"] = generate_alpha_signal(last_records(current("carry_trade")), last_records(current("risk")))
+
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with metrics.span("export", step="write_sections"):
+            entries, written = write_sections(sections, manifest, pretty=pretty)
+        manifest = {
+            "schema_version": MANIFEST_VERSION,
+            "generated_at": generated_at,
+            "metadata": {
+                "generated_at": generated_at,
+                "live_fx_rate": live_fx
+            },
+            "sections": entries,
+        }
+        json_stream.write_text(MANIFEST_PATH, json_stream.encode(manifest), pretty=pretty)
+
+        if combined:
+            with metrics.span("export", step="combined"):
+                data = {"metadata": manifest["metadata"], "system_status": sections["system_status"]}
+                for name in DATA_PATHS:
+                    data[name] = current(name)
+                    if isinstance(data[name], dict):
+                        data[name] = section_frame(data[name])
+                size = json_stream.write_document(OUTPUT_PATH, data, pretty=pretty, columnar=TIME_SERIES)
 
+    skipped = sorted(set(entries) - set(written))
+    print(f"Sections written: {', '.join(written) or 'none'}")
+    print(f"Sections unchanged: {', '.join(skipped) or 'none'}")
+    print(f"Manifest exported to {MANIFEST_PATH}")
+    if combined:
+        print(f"Data exported to {OUTPUT_PATH} ({size / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export pillar outputs for the web dashboard")
+    parser.add_argument("--pretty", action="store_true", help="Indented JSON (debugging)")
+    parser.add_argument("--combined", action="store_true", help="Also write the single dashboard_data.json")
+    parser.add_argument("--sections", help="Comma-separated sections to export (default: all), e.g. risk,us_stocks")
+    args = parser.parse_args()
+    main(
+        pretty=True if args.pretty else None,
+        combined=True if args.combined else None,
+        only=[name.strip() for name in args.sections.split(",") if name.strip()] if args.sections else None,
+    )
@@ -0,0 +1,498 @@
+"""
+Offline stand-in for the pipeline's upstream APIs (Banxico SIE, Twelve Data, Yahoo chart).
+
+One local HTTP server answers the same paths and JSON shapes as the real services:
+
+    GET /SieAPIRest/service/v1/series/<ids>/datos/<start>/<end>   (and /datos/oportuno)
+    GET /price?symbol=USD/MXN                                      Twelve Data
+    GET /v8/finance/chart/<symbol>?period1=&period2=&interval=1d   Yahoo (also range=1d&interval=1m)
+    GET /_fake/stats                                               requests served per upstream
+
+Modes:
+    synthetic (default)  deterministic multi-year histories per series/ticker, generated
+                         from --since to today (same seed -> same values on every run)
+    --record DIR         forward each request to the real service and save the payload
+    --replay DIR         serve recorded payloads, cut to the requested date range;
+                         anything not recorded falls back to synthetic data (404 with --strict)
+
+Fault injection (applies to every mode): --latency/--jitter seconds per request,
+--error-rate (500/502/503), --throttle-rate (429 with Retry-After), --ne-rate (SIE
+values replaced by "N/E").
+
+Point the pipeline at it with the base URL variables it prints on startup:
+    python fake_upstream.py --port 8090 --error-rate 0.05 &
+    SIE_BASE_URL=http://127.0.0.1:8090/SieAPIRest/service/v1 \\
+    TWELVE_DATA_BASE_URL=http://127.0.0.1:8090 YAHOO_BASE_URL=http://127.0.0.1:8090 \\
+    python run_pipeline.py
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+PORT = int(os.environ.get('FAKE_UPSTREAM_PORT', '8090'))
+SIE_PREFIX = "/SieAPIRest/service/v1/series/"
+YAHOO_PREFIX = "/v8/finance/chart/"
+
+# Real services, used by --record
+REAL_BASES = {
+    "sie": "https://www.banxico.org.mx",
+    "twelvedata": "https://api.twelvedata.com",
+    "yahoo": "https://query1.finance.yahoo.com",
+}
+# Never written to fixtures
+SECRET_PARAMS = {"apikey", "token"}
+
+# Synthetic series: start level, daily log volatility, drift per step, mean reversion
+# and observation frequency (B business days, D calendar days, W Fridays, M month starts)
+DEFAULT_PROFILE = {"level": 100.0, "vol": 0.012, "drift": 0.0003, "kappa": 0.0, "freq": "B"}
+PROFILES = {
+    # Banxico SIE (rates in %, UDI in pesos, INPC index, reserves in USD mn)
+    "SF60648": {"level": 7.0, "vol": 0.01, "drift": 0.0, "kappa": 0.002, "freq": "B"},
+    "SF61745": {"level": 7.2, "vol": 0.01, "drift": 0.0, "kappa": 0.002, "freq": "B"},
+    "SF43936": {"level": 7.0, "vol": 0.01, "drift": 0.0, "kappa": 0.002, "freq": "W"},
+    "SF43939": {"level": 7.1, "vol": 0.01, "drift": 0.0, "kappa": 0.002, "freq": "W"},
+    "SF43945": {"level": 7.3, "vol": 0.01, "drift": 0.0, "kappa": 0.002, "freq": "W"},
+    "SF43912": {"level": 8.0, "vol": 0.008, "drift": 0.0, "kappa": 0.002, "freq": "B"},
+    "SF3338": {"level": 4.0, "vol": 0.008, "drift": 0.0, "kappa": 0.002, "freq": "B"},
+    "SP68257": {"level": 2.5, "vol": 0.0002, "drift": 0.0001, "kappa": 0.0, "freq": "D"},
+    "SP30578": {"level": 30.0, "vol": 0.002, "drift": 0.004, "kappa": 0.0, "freq": "M"},
+    "SF43707": {"level": 30000.0, "vol": 0.004, "drift": 0.0002, "kappa": 0.0, "freq": "W"},
+    # Yahoo
+    "^IRX": {"level": 4.0, "vol": 0.015, "drift": 0.0, "kappa": 0.002, "freq": "B"},
+    "USDMXN=X": {"level": 10.0, "vol": 0.006, "drift": 0.0, "kappa": 0.0005, "freq": "B"},
+    "MXN=X": {"level": 10.0, "vol": 0.006, "drift": 0.0, "kappa": 0.0005, "freq": "B"},
+    "^MXX": {"level": 6000.0, "vol": 0.012, "drift": 0.0003, "kappa": 0.0, "freq": "B"},
+}
+
+
+class Synthetic:
+    """Deterministic histories from `since` to today, generated once per series"""
+
+    def __init__(self, since, seed):
+        self.since = since
+        self.seed = seed
+        self.paths = {}
+        self.bars = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _dates(since, until, freq):
+        day = since
+        if freq == "M":
+            day = date(since.year, since.month, 1)
+        while day <= until:
+            if freq == "M":
+                yield day
+                day = date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+                continue
+            if freq == "D" or (freq == "B" and day.weekday() < 5) or (freq == "W" and day.weekday() == 4):
+                yield day
+            day += timedelta(days=1)
+
+    def path(self, key):
+        """[(date, value)] for a series ID or ticker"""
+        with self.lock:
+            if key not in self.paths:
+                profile = dict(DEFAULT_PROFILE, **PROFILES.get(key, {}))
+                rng = random.Random(zlib.crc32(f"{self.seed}:{key}".encode('utf-8')))
+                if key not in PROFILES:
+                    profile["level"] = rng.uniform(20, 400)
+                deviation = 0.0
+                points = []
+                for step, day in enumerate(self._dates(self.since, date.today(), profile["freq"])):
+                    deviation = deviation * (1 - profile["kappa"]) + rng.gauss(0, profile["vol"])
+                    points.append((day, profile["level"] * math.exp(deviation + profile["drift"] * step)))
+                self.paths[key] = points
+            return self.paths[key]
+
+    def daily_bars(self, symbol):
+        """OHLCV bars over the whole path (built once, so every window agrees)"""
+        points = self.path(symbol)
+        with self.lock:
+            if symbol not in self.bars:
+                self.bars[symbol] = daily_bars(symbol, points)
+            return self.bars[symbol]
+
+
+def _sie_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def _epoch(day):
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def sie_payload(series):
+    """bmx.series document for [(id, [(date, value)])]; string values (recorded) pass through"""
+    return {"bmx": {"series": [
+        {
+            "idSerie": sid,
+            "titulo": f"Serie sintética {sid}",
+            "datos": [
+                {"fecha": day.strftime("%d/%m/%Y"), "dato": value if isinstance(value, str) else f"{value:,.4f}"}
+                for day, value in points
+            ],
+        }
+        for sid, points in series
+    ]}}
+
+
+def yahoo_payload(symbol, bars):
+    """chart document for [(epoch seconds, open, high, low, close, volume)]"""
+    closes = [bar[4] for bar in bars]
+    return {"chart": {"result": [{
+        "meta": {
+            "currency": "USD", "symbol": symbol, "exchangeName": "FAKE", "timezone": "UTC",
+            "exchangeTimezoneName": "UTC", "gmtoffset": 0,
+            "regularMarketPrice": closes[-1] if closes else None,
+        },
+        "timestamp": [bar[0] for bar in bars],
+        "indicators": {
+            "quote": [{
+                "open": [bar[1] for bar in bars],
+                "high": [bar[2] for bar in bars],
+                "low": [bar[3] for bar in bars],
+                "close": closes,
+                "volume": [bar[5] for bar in bars],
+            }],
+            "adjclose": [{"adjclose": closes}],
+        },
+    }], "error": None}}
+
+
+def daily_bars(symbol, points):
+    """OHLCV around a close path (open = previous close)"""
+    rng = random.Random(zlib.crc32(f"bars:{symbol}".encode('utf-8')))
+    bars = []
+    previous = points[0][1] if points else 0.0
+    for day, close in points:
+        spread = abs(rng.gauss(0, 0.004))
+        high = max(previous, close) * (1 + spread)
+        low = min(previous, close) * (1 - spread)
+        bars.append((_epoch(day), previous, high, low, close, rng.randint(1_000_000, 50_000_000)))
+        previous = close
+    return bars
+
+
+def intraday_bars(last_close, minutes=390):
+    """1-minute bars for today ending now, drifting around the last daily close"""
+    rng = random.Random(int(time.time()) // 60)
+    now = int(time.time()) // 60 * 60
+    price = last_close
+    bars = []
+    for i in range(minutes):
+        previous, price = price, price * math.exp(rng.gauss(0, 0.0004))
+        bars.append((now - (minutes - 1 - i) * 60, previous, max(previous, price), min(previous, price), price, 0))
+    return bars
+
+
+class Faults:
+    """Request-level fault injection (thread-safe, seeded)"""
+
+    def __init__(self, latency, jitter, error_rate, throttle_rate, ne_rate, seed):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.ne_rate = ne_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            extra = self.rng.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def failure(self):
+        """None, or (status, extra headers) for an injected error"""
+        with self.lock:
+            roll = self.rng.random()
+            if roll < self.throttle_rate:
+                return HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "1"}
+            if roll < self.throttle_rate + self.error_rate:
+                return self.rng.choice((500, 502, 503)), {}
+        return None
+
+    def blank_values(self, payload):
+        """Replace a share of SIE values with "N/E" (what SIE sends for missing days)"""
+        if not self.ne_rate:
+            return payload
+        with self.lock:
+            for series in payload.get("bmx", {}).get("series", []):
+                for datum in series.get("datos", []):
+                    if self.rng.random() < self.ne_rate:
+                        datum["dato"] = "N/E"
+        return payload
+
+
+class NoFixture(LookupError):
+    """--replay --strict and nothing was recorded for the request"""
+
+
+class Fixtures:
+    """One recorded payload per upstream + key (series IDs, ticker, symbol)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, upstream, key):
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', key).strip('_')
+        return os.path.join(self.directory, f"{upstream}-{slug}.json")
+
+    def load(self, upstream, key):
+        path = self.path(upstream, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["body"]
+
+    def save(self, upstream, key, request_path, body):
+        path = self.path(upstream, key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"request": request_path, "recorded_at": datetime.now().isoformat(timespec='seconds'),
+                       "body": body}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+class FakeUpstream:
+    """Routes a request to SIE / Twelve Data / Yahoo and produces (status, headers, body)"""
+
+    def __init__(self, synthetic, faults, record=None, replay=None, strict=False):
+        self.synthetic = synthetic
+        self.faults = faults
+        self.record = Fixtures(record) if record else None
+        self.replay = Fixtures(replay) if replay else None
+        self.strict = strict
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def count(self, upstream, status):
+        with self.stats_lock:
+            stats = self.stats.setdefault(upstream, {"requests": 0, "errors": 0})
+            stats["requests"] += 1
+            if status >= 400:
+                stats["errors"] += 1
+
+    def handle(self, path, query, headers):
+        if path.startswith(SIE_PREFIX):
+            upstream = "sie"
+        elif path == "/price":
+            upstream = "twelvedata"
+        elif path.startswith(YAHOO_PREFIX):
+            upstream = "yahoo"
+        elif path == "/_fake/stats":
+            with self.stats_lock:
+                return HTTPStatus.OK, {}, {name: dict(stats) for name, stats in self.stats.items()}
+        else:
+            return HTTPStatus.NOT_FOUND, {}, {"error": f"unknown path {path}"}
+
+        self.faults.delay()
+        failure = self.faults.failure()
+        if failure is not None:
+            status, extra = failure
+            self.count(upstream, int(status))
+            return status, extra, {"error": "injected failure"}
+
+        params = {k: v[-1] for k, v in parse_qs(query).items()}
+        try:
+            if self.record:
+                status, body = self.forward(upstream, path, params, headers)
+            else:
+                status, body = getattr(self, upstream)(path, params)
+        except NoFixture as e:
+            status, body = HTTPStatus.NOT_FOUND, {"error": str(e)}
+        except (ValueError, KeyError, IndexError) as e:
+            status, body = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        if upstream == "sie" and status == HTTPStatus.OK:
+            body = self.faults.blank_values(body)
+        self.count(upstream, int(status))
+        return status, {}, body
+
+    # --- record -----------------------------------------------------------------------------
+
+    def forward(self, upstream, path, params, headers):
+        import http_client  # requests is only needed when recording
+
+        url = REAL_BASES[upstream] + path
+        if params:
+            url += "?" + urlencode(params)
+        forward_headers = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
+        if headers.get("Bmx-Token"):
+            forward_headers["Bmx-Token"] = headers["Bmx-Token"]
+        response = http_client.get(url, headers=forward_headers)
+        body = response.json()
+        if response.status_code == 200:
+            public = {k: v for k, v in params.items() if k not in SECRET_PARAMS}
+            request_path = path + ("?" + urlencode(public) if public else "")
+            saved = self.record.save(upstream, self.fixture_key(upstream, path, params), request_path, body)
+            print(f"Recorded {request_path} -> {os.path.basename(saved)}", flush=True)
+        return response.status_code, body
+
+    @staticmethod
+    def fixture_key(upstream, path, params):
+        if upstream == "sie":
+            return path[len(SIE_PREFIX):].split("/")[0]
+        if upstream == "yahoo":
+            interval = params.get("interval", "1d")
+            return f"{path[len(YAHOO_PREFIX):]}_{interval}"
+        return params.get("symbol", "USD/MXN")
+
+    def recorded(self, upstream, path, params):
+        if self.replay is None:
+            return None
+        body = self.replay.load(upstream, self.fixture_key(upstream, path, params))
+        if body is None and self.strict:
+            raise NoFixture(f"no fixture for {path}")
+        return body
+
+    # --- upstreams ----------------------------------------------------------------------------
+
+    def sie(self, path, params):
+        parts = path[len(SIE_PREFIX):].split("/")
+        ids = [sid for sid in parts[0].split(",") if sid]
+        if len(parts) >= 4 and parts[1] == "datos":
+            start, end = _sie_date(parts[2]), _sie_date(parts[3])
+        elif len(parts) >= 3 and parts[2] == "oportuno":
+            start, end = None, None
+        else:
+            raise ValueError("expected /series/<ids>/datos/<start>/<end> or /datos/oportuno")
+
+        recorded = self.recorded("sie", path, params)
+        if recorded is not None:
+            series = [(s["idSerie"], [(datetime.strptime(d["fecha"], "%d/%m/%Y").date(), d["dato"])
+                                      for d in s.get("datos", [])])
+                      for s in recorded.get("bmx", {}).get("series", [])]
+        else:
+            series = [(sid, self.synthetic.path(sid)) for sid in ids]
+
+        if start is None:
+            series = [(sid, points[-1:]) for sid, points in series]
+        else:
+            series = [(sid, [(d, v) for d, v in points if start <= d <= end]) for sid, points in series]
+        return HTTPStatus.OK, sie_payload(series)
+
+    def twelvedata(self, path, params):
+        symbol = params.get("symbol", "USD/MXN")
+        recorded = self.recorded("twelvedata", path, params)
+        if recorded is not None:
+            return HTTPStatus.OK, recorded
+        ticker = symbol.replace("/", "") + "=X"
+        last_close = self.synthetic.path(ticker)[-1][1]
+        price = intraday_bars(last_close, minutes=1)[-1][4]
+        return HTTPStatus.OK, {"price": f"{price:.5f}"}
+
+    def yahoo(self, path, params):
+        symbol = path[len(YAHOO_PREFIX):]
+        interval = params.get("interval", "1d")
+        recorded = self.recorded("yahoo", path, params)
+        if recorded is not None:
+            return HTTPStatus.OK, self._cut_chart(recorded, params)
+
+        bars = self.synthetic.daily_bars(symbol)
+        if interval != "1d":
+            return HTTPStatus.OK, yahoo_payload(symbol, intraday_bars(bars[-1][4]))
+        if "period1" in params:
+            # period2 is exclusive, like Yahoo
+            first, last = int(params["period1"]), int(params.get("period2", time.time()))
+            bars = [bar for bar in bars if first <= bar[0] < last]
+        else:
+            bars = bars[-365:]
+        return HTTPStatus.OK, yahoo_payload(symbol, bars)
+
+    @staticmethod
+    def _cut_chart(body, params):
+        """Keep only the recorded bars inside [period1, period2)"""
+        if "period1" not in params:
+            return body
+        first, last = int(params["period1"]), int(params.get("period2", time.time()))
+        result = body["chart"]["result"][0]
+        keep = [i for i, ts in enumerate(result.get("timestamp", [])) if first <= ts < last]
+        result = dict(result, timestamp=[result["timestamp"][i] for i in keep])
+        indicators = {}
+        for name, blocks in body["chart"]["result"][0].get("indicators", {}).items():
+            indicators[name] = [{k: [values[i] for i in keep] for k, values in block.items()} for block in blocks]
+        result["indicators"] = indicators
+        return {"chart": {"result": [result], "error": None}}
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes: without this, keep-alive clients wait on
+    # delayed ACKs (~40ms per request), which would swamp benchmark timings
+    disable_nagle_algorithm = True
+    upstream = None  # set in main()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, headers, body = self.upstream.handle(unquote(url.path), url.query, self.headers)
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write(f"{self.log_date_time_string()} {format % args}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for Banxico SIE, Twelve Data and Yahoo")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--since", default="1990-01-01", help="First date of the synthetic histories")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data and fault injection seed")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, 0..jitter seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 500/502/503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--ne-rate", type=float, default=0.0, help='Share of SIE values sent as "N/E"')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", help="Proxy to the real services and save fixtures in DIR")
+    mode.add_argument("--replay", metavar="DIR", help="Serve fixtures from DIR (synthetic when missing)")
+    parser.add_argument("--strict", action="store_true", help="With --replay: 404 instead of synthetic data")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    synthetic = Synthetic(_sie_date(args.since), args.seed)
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.throttle_rate, args.ne_rate, args.seed)
+    FakeHandler.upstream = FakeUpstream(synthetic, faults, record=args.record, replay=args.replay, strict=args.strict)
+
+    server = ThreadingHTTPServer((args.bind, args.port), FakeHandler)
+    server.daemon_threads = True
+    server.verbose = args.verbose
+    base = f"http://{args.bind}:{args.port}"
+    mode_name = f"record -> {args.record}" if args.record else f"replay <- {args.replay}" if args.replay else "synthetic"
+    print(f"Fake upstream on {base} ({mode_name})", flush=True)
+    print(f"  export SIE_BASE_URL={base}/SieAPIRest/service/v1", flush=True)
+    print(f"  export TWELVE_DATA_BASE_URL={base}", flush=True)
+    print(f"  export YAHOO_BASE_URL={base}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nFake upstream stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
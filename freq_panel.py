@@ -0,0 +1,179 @@
+"""
+Mixed-frequency panel: each series is kept at its native frequency (daily rates,
+monthly INPC, trading-day indices, ...) instead of being outer-joined and
+forward-filled onto a daily grid.
+
+- Transformations run on the native observations. YoY and momentum compare each
+  observation with the value one calendar period earlier (as of that date), so a
+  monthly YoY is exactly 12 months, not "360 forward-filled rows".
+- align() builds a DataFrame on a target calendar only when it is needed. Each
+  column holds the last observation on or before each date (an as-of join, i.e. what
+  ffill did, without materializing 30 copies of every monthly value first).
+
+Usage:
+    panel = FrequencyPanel.from_frame(get_banxico_series_batch(...))
+    panel.add('Inflation YoY', panel.yoy('INPC'))                 # monthly, exact
+    df = panel.align(panel.calendar(['UDI', 'Cetes 28d']))        # daily output
+"""
+
+import numpy as np
+import pandas as pd
+
+# Median spacing between observations (days) -> frequency label
+FREQUENCIES = [(1.5, 'D'), (3.5, 'B'), (8, 'W'), (40, 'M'), (100, 'Q')]
+# Observations used to infer a frequency (the most recent ones)
+FREQUENCY_SAMPLE = 64
+# How far back an "as of one period earlier" value may be (weekends, holidays, late prints)
+TOLERANCE_DAYS = {'D': 7, 'B': 7, 'W': 10, 'M': 20, 'Q': 50, 'A': 120}
+
+
+def infer_frequency(index):
+    """Rough native frequency of a sorted DatetimeIndex: D, B, W, M, Q or A"""
+    index = index[-FREQUENCY_SAMPLE:]
+    if len(index) < 2:
+        return 'D'
+    spacing = np.median(np.diff(index.values).astype('timedelta64[s]').astype(float)) / 86400
+    if spacing <= 1.5:
+        # Business-day series have no weekend observations
+        return 'B' if not (index.dayofweek >= 5).any() else 'D'
+    for limit, freq in FREQUENCIES[1:]:
+        if spacing <= limit:
+            return freq
+    return 'A'
+
+
+def as_of(series, dates, tolerance=None):
+    """
+    Values of `series` as of each date (last observation on or before it).
+    NaN before the first observation, or when that observation is older than `tolerance`.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if series.empty:
+        return np.full(len(dates), np.nan)
+    observed = series.index.values
+    if len(observed) == len(dates) and np.array_equal(observed, dates.values):
+        return series.to_numpy(dtype=float)  # already on the target calendar
+    # Integer search on the same datetime unit (datetime64 comparisons are much slower)
+    needles = dates.values.astype(observed.dtype).view('i8')
+    position = np.searchsorted(observed.view('i8'), needles, side='right') - 1
+    found = position >= 0
+    position = position.clip(0)
+    values = np.where(found, series.to_numpy(dtype=float)[position], np.nan)
+    if tolerance is not None:
+        stale = (dates - series.index[position]) > pd.Timedelta(tolerance)
+        values[stale] = np.nan
+    return values
+
+
+class FrequencyPanel:
+    """Named series, each at its own frequency"""
+
+    def __init__(self):
+        self._series = {}
+        self._freq = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Split a wide (outer-joined) frame back into its native series (NaN rows dropped)"""
+        panel = cls()
+        for name in df.columns:
+            panel.add(name, df[name])
+        return panel
+
+    def add(self, name, series):
+        series = pd.Series(series, dtype=float).dropna()
+        series.index = pd.DatetimeIndex(series.index)
+        if series.index.tz is not None:
+            series.index = series.index.tz_localize(None)
+        series = series[~series.index.duplicated(keep='last')].sort_index()
+        series.name = name
+        self._series[name] = series
+        self._freq[name] = infer_frequency(series.index)
+        return self
+
+    def __getitem__(self, name):
+        return self._series[name]
+
+    def __contains__(self, name):
+        return name in self._series
+
+    @property
+    def names(self):
+        return list(self._series)
+
+    @property
+    def empty(self):
+        return all(series.empty for series in self._series.values())
+
+    def freq(self, name):
+        return self._freq[name]
+
+    def observations(self):
+        """{name: native observation count} (what the panel actually stores)"""
+        return {name: len(series) for name, series in self._series.items()}
+
+    def __repr__(self):
+        parts = [f"{name} [{self.freq(name)}, {len(series)} obs]" for name, series in self._series.items()]
+        return f"FrequencyPanel({', '.join(parts)})"
+
+    # --- transformations at native frequency -------------------------------------------
+
+    def pct_change(self, name, offset=None, scale=100.0, tolerance=None):
+        """
+        Percent change of each observation versus the previous one, or versus the value
+        as of `offset` earlier (a pd.DateOffset) when given.
+        """
+        series = self._series[name]
+        if offset is None:
+            return series.pct_change() * scale
+        if tolerance is None:
+            tolerance = pd.Timedelta(days=TOLERANCE_DAYS[self.freq(name)])
+        prior = as_of(series, series.index - offset, tolerance)
+        return pd.Series((series.to_numpy() / prior - 1.0) * scale, index=series.index, name=name)
+
+    def yoy(self, name, scale=100.0):
+        """Calendar-exact year-over-year change (%)"""
+        return self.pct_change(name, pd.DateOffset(years=1), scale)
+
+    def momentum(self, name, months=3, scale=100.0):
+        """Change (%) over the last `months` calendar months"""
+        return self.pct_change(name, pd.DateOffset(months=months), scale)
+
+    def rebase(self, name, base=100.0, at=None):
+        """Series scaled to `base` at its first observation (or as of date `at`)"""
+        series = self._series[name]
+        if series.empty:
+            return series.copy()
+        anchor = series.iloc[0] if at is None else as_of(series, [at])[0]
+        return series / anchor * base
+
+    # --- alignment --------------------------------------------------------------------
+
+    def calendar(self, names=None):
+        """Union of the observation dates of `names` (default: every series)"""
+        names = self.names if names is None else [n for n in names if n in self._series]
+        dates = [self._series[name].index.values.astype('datetime64[ns]') for name in names]
+        if not dates:
+            return pd.DatetimeIndex([], name='Date')
+        # Every index is sorted: a stable (merge) sort of the concatenation plus dedupe
+        dates = np.sort(np.concatenate(dates), kind='stable')
+        return pd.DatetimeIndex(dates[np.r_[True, dates[1:] != dates[:-1]]], name='Date')
+
+    def align(self, calendar=None, names=None, tolerance=None):
+        """
+        DataFrame on `calendar` (default: union of all dates) with one column per name,
+        each holding its last observation on or before the row's date.
+        Names that are not in the panel come back as all-NaN columns.
+        """
+        calendar = self.calendar() if calendar is None else pd.DatetimeIndex(calendar, name='Date')
+        names = self.names if names is None else names
+        columns = {}
+        for name in names:
+            series = self._series.get(name)
+            columns[name] = as_of(series, calendar, tolerance) if series is not None else np.nan
+        return pd.DataFrame(columns, index=calendar, columns=names)
+
+
+def as_panel(data):
+    """FrequencyPanel for a panel or a wide DataFrame (older callers pass frames)"""
+    return data if isinstance(data, FrequencyPanel) else FrequencyPanel.from_frame(data)
@@ -0,0 +1,177 @@
+"""
+Live USD/MXN streaming service (Server-Sent Events).
+
+Polls Twelve Data (Yahoo fallback) every FX_POLL_SECONDS, keeps the latest quote in
+memory and pushes it to every connected dashboard over SSE. A poll that returns the
+same rate as the last broadcast is not re-sent, and a slow client only ever holds the
+newest quote (older pending ticks are dropped).
+
+Endpoints:
+    GET /fx/stream   text/event-stream, `event: fx` with {"rate", "source", "as_of", "seq"}
+    GET /fx/latest   latest quote as JSON
+
+Usage:
+    python fx_stream.py                  # port 8081, poll every 120s
+    python fx_stream.py --interval 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from urllib.parse import urlsplit
+
+PORT = int(os.environ.get('FX_STREAM_PORT', '8081'))
+# Twelve Data free tier: 800 requests/day -> 120s keeps a 24h service under the cap
+POLL_SECONDS = float(os.environ.get('FX_POLL_SECONDS', '120'))
+HEARTBEAT_SECONDS = 15
+REQUEST_TIMEOUT = 10
+
+CORS_HEADERS = "Access-Control-Allow-Origin: *\r\n"
+
+
+class FXHub:
+    """Latest quote plus one single-slot queue per connected client"""
+
+    def __init__(self):
+        self.latest = None
+        self.seq = 0
+        self.clients = set()
+
+    def publish(self, quote):
+        """Broadcast a new quote; returns False when it repeats the last rate (coalesced)"""
+        if self.latest is not None and round(quote["rate"], 6) == round(self.latest["rate"], 6):
+            return False
+        self.seq += 1
+        self.latest = dict(quote, seq=self.seq)
+        for queue in self.clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(self.latest)
+        return True
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=1)
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+
+def fetch_quote():
+    # Imported lazily: pulls in pandas/yfinance, only needed by the poller thread
+    from export_to_json import fetch_live_quote
+    quote = fetch_live_quote()
+    if quote:
+        quote["as_of"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return quote
+
+
+async def poll(hub, interval):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            # The fetch is blocking (requests/yfinance): keep it off the event loop
+            quote = await loop.run_in_executor(None, fetch_quote)
+            if quote and hub.publish(quote):
+                print(f"Broadcast USD/MXN {quote['rate']:.4f} ({quote['source']}) "
+                      f"to {len(hub.clients)} client(s)", flush=True)
+        except Exception as e:
+            print(f"FX poll failed: {e}", flush=True)
+        await asyncio.sleep(interval)
+
+
+def sse_event(quote):
+    return f"id: {quote['seq']}\nevent: fx\ndata: {json.dumps(quote)}\n\n".encode('utf-8')
+
+
+async def stream(hub, writer):
+    writer.write((
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: text/event-stream\r\n"
+        "Cache-Control: no-cache\r\n"
+        "Connection: keep-alive\r\n"
+        f"{CORS_HEADERS}\r\n"
+        "retry: 5000\n\n"
+    ).encode('utf-8'))
+    if hub.latest is not None:
+        writer.write(sse_event(hub.latest))
+    await writer.drain()
+
+    queue = hub.subscribe()
+    try:
+        while True:
+            try:
+                quote = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                writer.write(sse_event(quote))
+            except asyncio.TimeoutError:
+                writer.write(b": ping\n\n")  # keeps proxies from closing an idle stream
+            await writer.drain()
+    finally:
+        hub.unsubscribe(queue)
+
+
+def simple_response(writer, status, body, content_type="application/json"):
+    payload = body.encode('utf-8')
+    writer.write((
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Cache-Control: no-cache\r\n"
+        "Connection: close\r\n"
+        f"{CORS_HEADERS}\r\n"
+    ).encode('utf-8') + payload)
+
+
+async def handle_client(hub, reader, writer):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+        while True:  # headers are not needed
+            line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            if line in (b'\r\n', b'\n', b''):
+                break
+        parts = request_line.decode('latin-1').split()
+        path = urlsplit(parts[1]).path if len(parts) >= 2 else ''
+
+        if parts and parts[0] != 'GET':
+            simple_response(writer, "405 Method Not Allowed", '{"error": "GET only"}')
+        elif path == '/fx/stream':
+            await stream(hub, writer)
+        elif path == '/fx/latest':
+            simple_response(writer, "200 OK", json.dumps(hub.latest))
+        else:
+            simple_response(writer, "404 Not Found", '{"error": "not found"}')
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(port, interval):
+    hub = FXHub()
+    server = await asyncio.start_server(lambda r, w: handle_client(hub, r, w), '0.0.0.0', port)
+    print(f"FX stream on http://0.0.0.0:{port}/fx/stream (poll every {interval:.0f}s)", flush=True)
+    poller = asyncio.ensure_future(poll(hub, interval))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        poller.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live USD/MXN SSE service")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Poll cadence in seconds")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.port, args.interval))
+    except KeyboardInterrupt:
+        print("\nFX stream stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Shared HTTP client for every outbound fetcher (Banxico SIE, Twelve Data, ...).
+
+- One requests.Session with keep-alive connection pooling
+- Per-host concurrency cap (threads wait for a free slot)
+- Connect/read timeouts on every call
+- Exponential backoff with full jitter on 429/5xx and connection errors (Retry-After honored)
+- Per-host counters: requests, retries, errors, bytes and latency (the same counts
+  are added to the caller's open metrics span)
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '30'))
+MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', '10'))
+MAX_PER_HOST = int(os.environ.get('HTTP_MAX_PER_HOST', '4'))
+
+# Hosts that need a tighter cap than MAX_PER_HOST
+HOST_LIMITS = {
+    "www.banxico.org.mx": 2,
+    "api.twelvedata.com": 1,
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(MAX_PER_HOST, 8))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _slot(host):
+    with _session_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(HOST_LIMITS.get(host, MAX_PER_HOST))
+        return _host_slots[host]
+
+
+def _record(host, **counters):
+    with _stats_lock:
+        stats = _stats.setdefault(host, {
+            "requests": 0, "retries": 0, "errors": 0, "bytes": 0,
+            "latency_total": 0.0, "latency_max": 0.0,
+        })
+        for key, value in counters.items():
+            if key == "latency":
+                stats["latency_total"] += value
+                stats["latency_max"] = max(stats["latency_max"], value)
+            else:
+                stats[key] += value
+    metrics.record_http(**{key: value for key, value in counters.items() if key != "latency"})
+
+
+def _backoff(attempt, response=None):
+    """Full-jitter exponential backoff; Retry-After wins when the server sends one"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method, url, timeout=None, max_retries=None, **kwargs):
+    """
+    Send a request through the shared session.
+    Returns the final Response (callers still call raise_for_status()).
+    Raises the last exception if every attempt failed at the connection level.
+    """
+    host = urlparse(url).netloc
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    session = get_session()
+
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            with _slot(host):
+                response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record(host, requests=1, errors=1, latency=time.monotonic() - started)
+            if attempt >= max_retries:
+                raise
+            _record(host, retries=1)
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+
+        _record(host, requests=1, bytes=len(response.content), latency=time.monotonic() - started)
+        if response.status_code in RETRY_STATUS and attempt < max_retries:
+            _record(host, retries=1)
+            time.sleep(_backoff(attempt, response))
+            attempt += 1
+            continue
+        if response.status_code >= 400:
+            _record(host, errors=1)
+        return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def get_stats():
+    """Snapshot of the per-host counters"""
+    with _stats_lock:
+        snapshot = {host: dict(stats) for host, stats in _stats.items()}
+    for stats in snapshot.values():
+        stats["latency_avg"] = stats["latency_total"] / stats["requests"] if stats["requests"] else 0.0
+    return snapshot
+
+
+def format_stats():
+    lines = []
+    for host, s in sorted(get_stats().items()):
+        lines.append(
+            f"{host:.<40} {s['requests']:>3} req  {s['retries']:>2} retries  {s['errors']:>2} errors  "
+            f"avg {s['latency_avg']*1000:.0f}ms  max {s['latency_max']*1000:.0f}ms  {s['bytes']/1024:.1f} KB"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+"""
+Vectorized cross-sectional indicator engine.
+
+Works on a dates x tickers close panel and computes RSI, SMAs, change %, sparkline
+slices and the COMPRAR/VENDER/SOBRECOMPRA/SOBREVENTA/MANTENER signal for every
+ticker at once with NumPy array ops.
+
+Rolling windows run over rows of the panel, so tickers are expected to share a
+trading calendar (rows where every ticker is NaN are dropped first). Leading NaNs
+(e.g. recent listings) behave like a shorter history.
+"""
+
+import numpy as np
+import pandas as pd
+
+RSI_PERIOD = 14
+SMA_FAST = 50
+SMA_SLOW = 200
+SPARKLINE_DAYS = 30
+
+# Signal thresholds
+SMA_BUFFER = 0.02   # SMA50 must clear SMA200 by 2% for a cross signal
+RSI_HIGH = 75       # RSI above -> SOBRECOMPRA
+RSI_LOW = 25        # RSI below -> SOBREVENTA
+
+SIGNALS = np.array(["SOBRECOMPRA", "SOBREVENTA", "COMPRAR", "VENDER", "MANTENER"])
+
+
+def rolling_mean(values, window):
+    """
+    Column-wise rolling mean of a 2D array (rows = time), same semantics as
+    pandas rolling(window).mean(): NaN until the window holds `window` valid values.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or values.shape[0] < window:
+        return out
+
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    zero_row = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zero_row, np.cumsum(filled, axis=0)])
+    counts = np.concatenate([zero_row, np.cumsum(valid, axis=0)])
+
+    window_sum = sums[window:] - sums[:-window]
+    window_count = counts[window:] - counts[:-window]
+    with np.errstate(invalid='ignore'):
+        out[window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+    return out
+
+
+def rsi(values, period=RSI_PERIOD):
+    """Column-wise RSI (simple moving average of gains/losses, as calculate_rsi did)"""
+    values = np.asarray(values, dtype=float)
+    delta = np.full(values.shape, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    # First observation counts as a zero move (like pandas .where); missing prices stay missing
+    missing = np.isnan(values)
+    gain[missing] = np.nan
+    loss[missing] = np.nan
+
+    avg_gain = rolling_mean(gain, period)
+    avg_loss = rolling_mean(loss, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def signal(sma_fast, sma_slow, rsi_values, sma_buffer=SMA_BUFFER, rsi_high=RSI_HIGH, rsi_low=RSI_LOW):
+    """
+    Vectorized trading signal: SMA crossover (with buffer) overridden by RSI extremes.
+    Inputs are arrays of the same shape; returns an array of signal labels.
+    """
+    conditions = [
+        rsi_values > rsi_high,
+        rsi_values < rsi_low,
+        sma_fast > sma_slow * (1 + sma_buffer),
+        sma_fast < sma_slow * (1 - sma_buffer),
+    ]
+    return np.select(conditions, SIGNALS[:4], default=SIGNALS[4])
+
+
+def compute_panel(close, rsi_period=RSI_PERIOD, sma_fast=SMA_FAST, sma_slow=SMA_SLOW):
+    """
+    Full-history indicator arrays for a dates x tickers close panel.
+    Returns a dict of 2D arrays (rows = dates, columns = tickers) plus the cleaned panel.
+    """
+    close = close.dropna(how='all').sort_index()
+    values = close.to_numpy(dtype=float)
+    return {
+        "close": close,
+        "values": values,
+        "sma_fast": rolling_mean(values, sma_fast),
+        "sma_slow": rolling_mean(values, sma_slow),
+        "rsi": rsi(values, rsi_period),
+    }
+
+
+def _last_valid_rows(valid):
+    """Row index of the last and second-to-last valid value per column (-1 if missing)"""
+    rank = np.cumsum(valid, axis=0)
+    count = rank[-1]
+    last = np.where(count > 0, np.argmax(valid & (rank == count), axis=0), -1)
+    prev = np.where(count > 1, np.argmax(valid & (rank == count - 1), axis=0), last)
+    return last, prev
+
+
+def latest_snapshot(close, names=None, sparkline_days=SPARKLINE_DAYS, **thresholds):
+    """
+    Latest indicators and signal for every ticker of a dates x tickers close panel.
+    Returns a columnar DataFrame (one row per ticker) with the same fields the
+    dashboard expects: ticker, name, price, change, change_pct, rsi, sma50, sma200,
+    signal, date, price_history.
+    """
+    panel = compute_panel(close)
+    close = panel["close"]
+    values = panel["values"]
+    tickers = np.asarray(close.columns)
+    if values.size == 0:
+        return pd.DataFrame()
+
+    valid = ~np.isnan(values)
+    last, prev = _last_valid_rows(valid)
+    has_data = last >= 0
+    cols = np.arange(values.shape[1])
+    last_row = np.where(has_data, last, 0)
+    prev_row = np.where(has_data, prev, 0)
+
+    price = values[last_row, cols]
+    prev_close = values[prev_row, cols]
+    change = price - prev_close
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = change / prev_close * 100
+
+    # Missing indicators fall back to neutral values (SMA -> price, RSI -> 50)
+    sma50 = panel["sma_fast"][last_row, cols]
+    sma200 = panel["sma_slow"][last_row, cols]
+    rsi_last = panel["rsi"][last_row, cols]
+    sma50 = np.where(np.isnan(sma50), price, sma50)
+    sma200 = np.where(np.isnan(sma200), price, sma200)
+    rsi_last = np.where(np.isnan(rsi_last), 50.0, rsi_last)
+
+    signals = signal(sma50, sma200, rsi_last, **thresholds)
+
+    dates = close.index[last_row].strftime("%Y-%m-%d")
+    tail = np.round(values[-sparkline_days:], 2)
+    tail_valid = valid[-sparkline_days:]
+    price_history = [tail[tail_valid[:, j], j].tolist() for j in range(len(tickers))]
+
+    names = names or {}
+    result = pd.DataFrame({
+        "ticker": tickers,
+        "name": [names.get(t, t) for t in tickers],
+        "price": np.round(price, 2),
+        "change": np.round(change, 2),
+        "change_pct": np.round(change_pct, 2),
+        "rsi": np.round(rsi_last, 1),
+        "sma50": np.round(sma50, 2),
+        "sma200": np.round(sma200, 2),
+        "signal": signals,
+        "date": np.asarray(dates),
+        "price_history": price_history,
+    })
+    return result[has_data].reset_index(drop=True)
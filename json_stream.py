@@ -0,0 +1,148 @@
+"""
+Streaming JSON writer for the dashboard payload.
+
+DataFrames are encoded straight to JSON by pandas' C encoder (NaN -> null at the
+array level, no per-value Python recursion). Each section is written to disk as soon
+as it is encoded, so the full document never has to be built as one Python object.
+
+Time series sections can be written columnar (struct of arrays) instead of as
+records, so column names appear once instead of on every row:
+
+    {"schema_version": 1, "index": ["2024-01-02", ...], "columns": {"Close": [...], ...}}
+
+Output is minified by default; pretty=True re-indents it for debugging. Every file is
+written to a unique temp file in the same directory, fsynced and renamed over the
+target, so readers (and concurrent writers) never see a partial file.
+"""
+
+import json
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+
+# pandas' encoder tops out at 15 significant digits
+DOUBLE_PRECISION = 15
+
+# Bump when the columnar layout changes (the dashboard checks it)
+SCHEMA_VERSION = 1
+
+
+def _clean(obj):
+    """NaN/inf -> None for the small plain-Python parts of the document (metadata, signals)"""
+    if isinstance(obj, dict):
+        return {k: _clean(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_clean(v) for v in obj]
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return None
+    return obj
+
+
+def encode(value, orient='records'):
+    """Compact JSON text for a DataFrame (records by default) or a plain Python value"""
+    if isinstance(value, pd.DataFrame):
+        return value.to_json(orient=orient, double_precision=DOUBLE_PRECISION, force_ascii=False)
+    if isinstance(value, pd.Series):
+        return value.to_json(orient='values', double_precision=DOUBLE_PRECISION, force_ascii=False)
+    return json.dumps(_clean(value), ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+def encode_columnar(df, index='Date'):
+    """Columnar JSON text for a DataFrame; the `index` column becomes the shared index array"""
+    if index in df.columns:
+        index_values = encode(df[index])
+        df = df.drop(columns=[index])
+    else:
+        index_values = encode(pd.Series(df.index.astype(str)))
+    columns = ','.join(
+        f"{json.dumps(str(name), ensure_ascii=False)}:{encode(df[name])}" for name in df.columns
+    )
+    return f'{{"schema_version":{SCHEMA_VERSION},"index":{index_values},"columns":{{{columns}}}}}'
+
+
+def frame_from_columnar(section, index='Date'):
+    """DataFrame back from a columnar section (e.g. one preserved from a previous export)"""
+    df = pd.DataFrame(section.get("columns", {}))
+    df.insert(0, index, section.get("index", []))
+    return df
+
+
+def _has_frames(value):
+    if isinstance(value, pd.DataFrame):
+        return True
+    return isinstance(value, dict) and any(_has_frames(v) for v in value.values())
+
+
+def encode_section(value, columnar=False):
+    """
+    Compact JSON text for one section (columnar layout for DataFrames if requested).
+    Dicts holding DataFrames (e.g. resolution tiers) are encoded key by key.
+    """
+    if isinstance(value, pd.DataFrame):
+        return encode_columnar(value) if columnar else encode(value)
+    if isinstance(value, dict) and _has_frames(value):
+        items = ','.join(
+            f"{json.dumps(str(k), ensure_ascii=False)}:{encode_section(v, columnar)}" for k, v in value.items()
+        )
+        return f'{{{items}}}'
+    return encode(value)
+
+
+@contextmanager
+def atomic_open(path):
+    """
+    Text file handle that replaces `path` in one rename when the block exits cleanly.
+    The temp name is unique per writer, so two processes never write the same temp file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; published files must stay readable
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_text(path, text, pretty=False):
+    """Atomically write JSON text to `path` (re-indented if pretty); returns the byte size"""
+    if pretty:
+        text = json.dumps(json.loads(text), indent=4, ensure_ascii=False)
+    with atomic_open(path) as f:
+        f.write(text)
+    return os.path.getsize(path)
+
+
+def write_document(path, sections, pretty=False, columnar=()):
+    """
+    Write {name: value} to `path` as one JSON object, one section at a time.
+    Values may be DataFrames, Series or JSON-compatible Python objects; DataFrames
+    whose name is in `columnar` use the columnar layout, the rest are records.
+    The file is replaced atomically when complete.
+    Returns the number of bytes written.
+    """
+    if pretty:
+        document = {name: json.loads(encode_section(value, columnar=name in columnar))
+                    for name, value in sections.items()}
+        with atomic_open(path) as f:
+            json.dump(document, f, indent=4, ensure_ascii=False)
+        return os.path.getsize(path)
+
+    with atomic_open(path) as f:
+        f.write('{')
+        for i, (name, value) in enumerate(sections.items()):
+            if i:
+                f.write(',')
+            f.write(json.dumps(name, ensure_ascii=False))
+            f.write(':')
+            f.write(encode_section(value, columnar=name in columnar))
+        f.write('}')
+    return os.path.getsize(path)
@@ -0,0 +1,264 @@
+"""
+Run instrumentation: nested timing spans, HTTP counters and peak memory.
+
+    with metrics.span("fetch", source="banxico", series="SF43936,SF43939"):
+        ...
+
+Spans nest per thread: a span opened inside another one on the same thread becomes its
+child, and the first span of a new thread hangs off the run root. http_client adds the
+bytes, requests and retries of every call to the innermost open span, so each fetch
+span knows what its series/ticker cost on the wire.
+
+write_report() saves
+    <ALPHA_METRICS_DIR>/runs/<run id>-<job>.json   span tree, HTTP per host, peak RSS
+    <ALPHA_METRICS_DIR>/alpha_<job>.prom           Prometheus textfile-collector format
+run_pipeline.py writes one per run. Standalone scripts write theirs at exit when
+ALPHA_METRICS_REPORT=1 (the GitHub workflows run the pillars one by one).
+"""
+
+import atexit
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_DIR = os.environ.get('ALPHA_METRICS_DIR', os.path.join(BASE_DIR, "data", "metrics"))
+# node_exporter's --collector.textfile.directory, if the .prom files should go straight there
+PROM_DIR = os.environ.get('ALPHA_METRICS_PROM_DIR', METRICS_DIR)
+REPORT_AT_EXIT = os.environ.get('ALPHA_METRICS_REPORT', '0') == '1'
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("name", "labels", "started", "seconds", "thread", "children",
+                 "requests", "bytes", "retries", "errors", "peak_growth_mb", "error")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.thread = threading.current_thread().name
+        self.children = []
+        self.requests = self.bytes = self.retries = self.errors = 0
+        self.peak_growth_mb = 0.0
+        self.error = None
+
+    def to_dict(self, origin):
+        out = {"name": self.name}
+        if self.labels:
+            out["labels"] = self.labels
+        out["start"] = round(self.started - origin, 6)
+        out["seconds"] = round(self.seconds if self.seconds is not None else time.perf_counter() - self.started, 6)
+        out["thread"] = self.thread
+        if self.requests:
+            out.update(requests=self.requests, bytes=self.bytes, retries=self.retries, errors=self.errors)
+        if self.peak_growth_mb:
+            out["peak_growth_mb"] = round(self.peak_growth_mb, 1)
+        if self.error:
+            out["error"] = self.error
+        if self.children:
+            out["children"] = [child.to_dict(origin) for child in list(self.children)]
+        return out
+
+
+def _new_run():
+    return {"root": Span("run", {}), "started_at": datetime.now()}
+
+
+_run = _new_run()
+
+
+def reset():
+    """Start a new run (drops every recorded span)"""
+    global _run
+    with _lock:
+        _run = _new_run()
+
+
+def peak_rss_mb():
+    """Process high-water resident memory in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+@contextmanager
+def span(name, **labels):
+    """Time a block; labels (e.g. series=..., ticker=...) become Prometheus labels"""
+    stack = _stack()
+    parent = stack[-1] if stack else _run["root"]
+    current = Span(name, {k: str(v) for k, v in labels.items()})
+    with _lock:
+        parent.children.append(current)
+    peak_before = peak_rss_mb()
+    stack.append(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        stack.pop()
+        current.seconds = time.perf_counter() - current.started
+        current.peak_growth_mb = peak_rss_mb() - peak_before
+
+
+def record_http(requests=0, bytes=0, retries=0, errors=0):
+    """Add HTTP counters to the innermost open span of this thread (no-op outside spans)"""
+    stack = getattr(_local, "stack", None)
+    if not stack:
+        return
+    current = stack[-1]
+    current.requests += requests
+    current.bytes += bytes
+    current.retries += retries
+    current.errors += errors
+
+
+def _walk(node, path=()):
+    for child in list(node.children):
+        yield path, child
+        yield from _walk(child, path + (child.name,))
+
+
+def aggregate():
+    """{(span name, labels tuple): totals} over the whole run (spans of the same key are summed)"""
+    totals = {}
+    for _, node in _walk(_run["root"]):
+        if node.seconds is None:
+            continue
+        key = (node.name, tuple(sorted(node.labels.items())))
+        entry = totals.setdefault(key, {"seconds": 0.0, "count": 0, "bytes": 0, "retries": 0, "requests": 0})
+        entry["seconds"] += node.seconds
+        entry["count"] += 1
+        entry["bytes"] += node.bytes
+        entry["retries"] += node.retries
+        entry["requests"] += node.requests
+    return totals
+
+
+def slowest(limit=10, names=None):
+    """[(seconds, name, labels)] of the slowest span keys, optionally only some span names"""
+    rows = [(entry["seconds"], name, dict(labels)) for (name, labels), entry in aggregate().items()
+            if names is None or name in names]
+    return sorted(rows, key=lambda row: row[0], reverse=True)[:limit]
+
+
+def format_slowest(limit=10, names=("fetch", "parse", "analyze", "write", "export", "chart")):
+    lines = []
+    for seconds, name, labels in slowest(limit, names):
+        detail = " ".join(f"{k}={v}" for k, v in labels.items())
+        lines.append(f"{name + ' ' + detail:.<50} {seconds * 1000:>8.0f} ms")
+    return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{re.sub(r"[^a-zA-Z0-9_]", "_", k)}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def prometheus_text(job, http_stats, status=None, finished=None):
+    """Textfile-collector exposition of the current run"""
+    finished = finished or time.time()
+    job_label = (("job", job),)
+    lines = []
+
+    def metric(name, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(job_label + tuple(labels))} {float(value)!r}")
+
+    root = _run["root"]
+    duration = time.perf_counter() - root.started
+    metric("alpha_run_duration_seconds", "Wall time of the last run", [((), duration)])
+    metric("alpha_run_timestamp_seconds", "Unix time the last run finished", [((), finished)])
+    metric("alpha_run_peak_rss_bytes", "Peak resident memory of the last run", [((), peak_rss_mb() * 1024 * 1024)])
+
+    totals = aggregate()
+    spans = [(("span", name),) + labels for name, labels in totals]
+    metric("alpha_span_seconds", "Wall time per span (summed when a span repeats)",
+           [(key, entry["seconds"]) for key, entry in zip(spans, totals.values())])
+    metric("alpha_span_count", "Times each span ran", [(key, entry["count"]) for key, entry in zip(spans, totals.values())])
+    with_http = [(key, entry) for key, entry in zip(spans, totals.values()) if entry["requests"]]
+    metric("alpha_span_http_bytes", "Response bytes downloaded inside the span", [(k, e["bytes"]) for k, e in with_http])
+    metric("alpha_span_http_retries", "HTTP retries inside the span", [(k, e["retries"]) for k, e in with_http])
+
+    hosts = sorted(http_stats.items())
+    metric("alpha_http_requests", "HTTP requests per host", [((("host", h),), s["requests"]) for h, s in hosts])
+    metric("alpha_http_retries", "HTTP retries per host", [((("host", h),), s["retries"]) for h, s in hosts])
+    metric("alpha_http_errors", "HTTP error responses per host", [((("host", h),), s["errors"]) for h, s in hosts])
+    metric("alpha_http_bytes", "Response bytes per host", [((("host", h),), s["bytes"]) for h, s in hosts])
+    metric("alpha_http_latency_max_seconds", "Slowest request per host",
+           [((("host", h),), s["latency_max"]) for h, s in hosts])
+    if status:
+        metric("alpha_task_success", "1 if the task succeeded in the last run",
+               [((("task", task),), int(bool(ok))) for task, ok in status.items()])
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)  # node_exporter must never read a partial file
+
+
+def write_report(job="pipeline", status=None):
+    """Write the JSON run report and the Prometheus textfile; returns both paths"""
+    http_stats = {}
+    if "http_client" in sys.modules:
+        http_stats = sys.modules["http_client"].get_stats()
+    root = _run["root"]
+    started_at = _run["started_at"]
+    report = {
+        "job": job,
+        "run_id": started_at.strftime("%Y%m%d-%H%M%S"),
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - root.started, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "status": status or {},
+        "http": http_stats,
+        "spans": [child.to_dict(root.started) for child in list(root.children)],
+    }
+    json_path = os.path.join(METRICS_DIR, "runs", f"{report['run_id']}-{job}.json")
+    prom_path = os.path.join(PROM_DIR, f"alpha_{job}.prom")
+    _write_atomic(json_path, json.dumps(report, indent=2, ensure_ascii=False))
+    _write_atomic(prom_path, prometheus_text(job, http_stats, status))
+    return json_path, prom_path
+
+
+def _report_at_exit():
+    job = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+    try:
+        json_path, _ = write_report(re.sub(r"[^A-Za-z0-9_]", "_", job))
+        print(f"Metrics: {json_path}")
+    except Exception as e:
+        print(f"Could not write metrics: {e}")
+
+
+if REPORT_AT_EXIT:
+    atexit.register(_report_at_exit)
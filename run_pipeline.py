@@ -1,49 +1,289 @@
 #!/usr/bin/env python3
 """
 Alpha Dashboard - Master Data Collection Pipeline
-Runs all data collectors in sequence and exports to JSON
+Runs all data collectors in parallel (in-process) and exports to JSON.
+Every run writes a metrics report (span tree, HTTP counters, peak memory) and a
+Prometheus textfile, see metrics.py.
 """
 
+import argparse
+import importlib.util
+import io
+import os
+import queue
 import subprocess
 import sys
-import os
+import threading
+import time
+import traceback
 from datetime import datetime
 
-def run_script(script_path, description):
-    """Run a Python script and handle errors"""
-    print(f"\n{'='*60}")
-    print(f"Running: {description}")
-    print(f"Script: {script_path}")
-    print(f"{'='*60}")
-    
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import http_client
+import metrics
+
+TASK_TIMEOUT = 120  # 2 minute timeout per task
+# Isolated scripts are killed at this share of the task timeout, so the kill always
+# lands before the graph deadline and a killed script is reported as failed, not abandoned
+ISOLATED_TIMEOUT_SHARE = 0.9
+
+# Data collectors (independent of each other)
+PILLARS = [
+    ("1_Carry_Trade/carry_trade.py", "Carry Trade Analysis"),
+    ("2_Inflation_Shield/inflation_shield.py", "Inflation Shield"),
+    ("3_Risk_Thermometer/risk_thermometer.py", "Risk Thermometer"),
+    ("4_Real_Economy/real_economy.py", "Real Economy Pulse"),
+    ("5_US_Stocks/us_stocks.py", "US Stocks Radar"),
+    ("6_Global_Indicators/global_indicators.py", "Global Indicators"),
+]
+
+# Join step: runs once every pillar has finished (successfully or not)
+EXPORT = ("export_to_json.py", "Export to JSON")
+
+# Export section built from each pillar's output
+PILLAR_SECTIONS = {
+    "Carry Trade Analysis": "carry_trade",
+    "Inflation Shield": "inflation",
+    "Risk Thermometer": "risk",
+    "Real Economy Pulse": "economy",
+    "US Stocks Radar": "us_stocks",
+    "Global Indicators": "global_indicators",
+}
+
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout proxy that routes writes to a per-thread buffer when one is registered"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+
+def load_module(script_path):
+    """Import a pillar script as a module (pillar folders are not packages)"""
+    name = os.path.splitext(os.path.basename(script_path))[0]
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def run_module(script_path, **kwargs):
+    """Run a pillar's main() in the current process"""
+    module = load_module(script_path)
+    module.main(**kwargs)
+
+
+def run_script(script_path, description, timeout=TASK_TIMEOUT, args=()):
+    """Run a Python script in a subprocess (isolated mode); killed after `timeout` seconds"""
     try:
         result = subprocess.run(
-            [sys.executable, script_path],
+            [sys.executable, script_path, *args],
             capture_output=True,
             text=True,
-            timeout=120  # 2 minute timeout per script
+            timeout=timeout
         )
-        
-        if result.stdout:
-            print(result.stdout)
-        
-        if result.returncode != 0:
-            print(f"❌ ERROR in {description}")
-            if result.stderr:
-                print(f"Error details:\n{result.stderr}")
-            return False
-        else:
-            print(f"✅ {description} completed successfully")
-            return True
-            
     except subprocess.TimeoutExpired:
-        print(f"⏱️ TIMEOUT: {description} took too long")
-        return False
-    except Exception as e:
-        print(f"❌ EXCEPTION in {description}: {e}")
-        return False
+        raise RuntimeError(f"{description} was killed after {timeout:g}s") from None
+
+    if result.stdout:
+        print(result.stdout)
+
+    if result.returncode != 0:
+        if result.stderr:
+            print(f"Error details:\n{result.stderr}")
+        raise RuntimeError(f"{description} exited with code {result.returncode}")
+
+
+def _worker(name, target, output, buffer, done):
+    output.capture(buffer)
+    try:
+        with metrics.span("task", task=name):
+            target()
+        done.put((name, True, None))
+    except BaseException as e:
+        done.put((name, False, (e, traceback.format_exc())))
+    finally:
+        output.release()
+
+
+def run_graph(tasks, timeout=TASK_TIMEOUT):
+    """
+    Run tasks as a dependency graph.
+    tasks: {name: {"target": callable, "after": [names], "label": str}}
+    A task starts once all tasks in "after" have finished (success, failure or timeout).
+    A timed-out task's thread cannot be killed and may still be writing its output, so a
+    task that depends on one is skipped, unless it has an "on_timeout" callable: that gets
+    the timed-out names and returns a replacement target (or None to skip).
+    Returns {name: True/False}.
+    """
+    output = _ThreadOutput(sys.stdout)
+    original_stdout = sys.stdout
+    sys.stdout = output
+
+    done = queue.Queue()
+    pending = dict(tasks)
+    running = {}
+    results = {}
+    timed_out = set()
+
+    def report(name, status, buffer, detail=None):
+        task = tasks[name]
+        elapsed = time.monotonic() - running[name][1] if name in running else 0.0
+        lines = [
+            f"\n{'='*60}",
+            f"Running: {name}",
+            f"Script: {task['label']}",
+            f"{'='*60}",
+        ]
+        captured = buffer.getvalue() if buffer is not None else ""
+        if captured:
+            lines.append(captured.rstrip("\n"))
+        if status == "ok":
+            lines.append(f"✅ {name} completed successfully ({elapsed:.1f}s)")
+        elif status == "timeout":
+            lines.append(f"⏱️ TIMEOUT: {name} took too long")
+        elif status == "skipped":
+            lines.append(f"⏭️ SKIPPED: {name} ({detail})")
+        else:
+            lines.append(f"❌ ERROR in {name}")
+            if detail:
+                lines.append(f"Error details:\n{detail}")
+        original_stdout.write("\n".join(lines) + "\n")
+        original_stdout.flush()
+
+    try:
+        while pending or running:
+            # Launch every task whose dependencies are all finished
+            for name in list(pending):
+                if all(dep in results for dep in pending[name].get("after", [])):
+                    task = pending.pop(name)
+                    target = task["target"]
+                    abandoned = [dep for dep in task.get("after", []) if dep in timed_out]
+                    if abandoned:
+                        on_timeout = task.get("on_timeout")
+                        target = on_timeout(abandoned) if on_timeout else None
+                        if target is None:
+                            report(name, "skipped", None, f"{', '.join(abandoned)} timed out and may still be running")
+                            results[name] = False
+                            continue
+                    buffer = io.StringIO()
+                    thread = threading.Thread(
+                        target=_worker,
+                        args=(name, target, output, buffer, done),
+                        name=f"pipeline-{name}",
+                        daemon=True,  # a hung task must not keep the interpreter alive
+                    )
+                    running[name] = (thread, time.monotonic(), buffer)
+                    thread.start()
+
+            if not running:
+                if pending:
+                    # Unsatisfiable dependencies: fail the rest instead of spinning
+                    for name in pending:
+                        results[name] = False
+                    pending.clear()
+                continue
+
+            now = time.monotonic()
+            next_deadline = min(start + timeout for _, start, _ in running.values())
+            try:
+                name, ok, error = done.get(timeout=max(0.0, next_deadline - now))
+            except queue.Empty:
+                # Every task past its deadline is reported and abandoned
+                now = time.monotonic()
+                for name in [n for n, (_, start, _) in running.items() if now - start >= timeout]:
+                    report(name, "timeout", running[name][2])
+                    results[name] = False
+                    timed_out.add(name)
+                    del running[name]
+                continue
+
+            if name not in running:
+                # Finished after its timeout was already reported
+                continue
+            if ok:
+                report(name, "ok", running[name][2])
+            else:
+                report(name, "error", running[name][2], error[1])
+            results[name] = ok
+            del running[name]
+    finally:
+        sys.stdout = original_stdout
+
+    return results
+
+
+def build_tasks(base_dir, isolated=False, timeout=TASK_TIMEOUT):
+    tasks = {}
+    for script_path, description in PILLARS + [EXPORT]:
+        full_path = os.path.join(base_dir, script_path)
+        if not os.path.exists(full_path):
+            print(f"⚠️  WARNING: {script_path} not found, skipping...")
+            continue
+        if isolated:
+            target = (lambda p=full_path, d=description: run_script(p, d, timeout * ISOLATED_TIMEOUT_SHARE))
+        else:
+            target = (lambda p=full_path: run_module(p))
+        tasks[description] = {"target": target, "label": script_path, "after": []}
+
+    export_name = EXPORT[1]
+    if export_name in tasks:
+        tasks[export_name]["after"] = [d for _, d in PILLARS if d in tasks]
+        tasks[export_name]["on_timeout"] = (
+            lambda abandoned: partial_export(os.path.join(base_dir, EXPORT[0]), abandoned, isolated, timeout)
+        )
+    return tasks
+
+
+def partial_export(script_path, abandoned, isolated=False, timeout=TASK_TIMEOUT):
+    """
+    Export target that leaves out the sections of timed-out pillars (their output may still
+    be half-written); those sections keep their last exported files. None if nothing is left.
+    """
+    sections = [section for description, section in PILLAR_SECTIONS.items() if description not in abandoned]
+    if not sections:
+        return None
+    print(f"⚠️  Exporting without the sections of {', '.join(abandoned)} (timed out)")
+    if isolated:
+        return lambda: run_script(script_path, EXPORT[1], timeout * ISOLATED_TIMEOUT_SHARE,
+                                  ["--sections", ",".join(sections)])
+    return lambda: run_module(script_path, only=sections)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Alpha Dashboard data pipeline")
+    parser.add_argument("--isolated", action="store_true",
+                        help="run each script in its own subprocess instead of in-process")
+    parser.add_argument("--timeout", type=float, default=TASK_TIMEOUT,
+                        help="per-task timeout in seconds")
+    args = parser.parse_args()
+
     print("""
     ╔════════════════════════════════════════════════════════════╗
     ║                                                            ║
@@ -52,67 +292,59 @@ def main():
     ║                                                            ║
     ╚════════════════════════════════════════════════════════════╝
     """)
-    
+
     start_time = datetime.now()
     print(f"Pipeline started at: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-    
-    # Get base directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Define all data collection scripts
-    scripts = [
-        ("1_Carry_Trade/carry_trade.py", "Carry Trade Analysis"),
-        ("2_Inflation_Shield/inflation_shield.py", "Inflation Shield"),
-        ("3_Risk_Thermometer/risk_thermometer.py", "Risk Thermometer"),
-        ("4_Real_Economy/real_economy.py", "Real Economy Pulse"),
-        ("5_US_Stocks/us_stocks.py", "US Stocks Radar"),
-        ("6_Global_Indicators/global_indicators.py", "Global Indicators"),
-    ]
-    
-    results = {}
-    
-    # Run each data collector
-    for script_path, description in scripts:
-        full_path = os.path.join(base_dir, script_path)
-        if os.path.exists(full_path):
-            results[description] = run_script(full_path, description)
-        else:
-            print(f"⚠️  WARNING: {script_path} not found, skipping...")
-            results[description] = False
-    
-    # Run export to JSON
-    print(f"\n{'='*60}")
-    print("FINAL STEP: Exporting data to JSON")
-    print(f"{'='*60}")
-    
-    export_path = os.path.join(base_dir, "export_to_json.py")
-    if os.path.exists(export_path):
-        results["Export to JSON"] = run_script(export_path, "Export to JSON")
-    else:
-        print("❌ export_to_json.py not found!")
-        results["Export to JSON"] = False
-    
+
+    tasks = build_tasks(BASE_DIR, isolated=args.isolated, timeout=args.timeout)
+    results = run_graph(tasks, timeout=args.timeout)
+
+    # Keep the summary in the same order as the task list, missing scripts count as failures
+    ordered = {}
+    for _, description in PILLARS + [EXPORT]:
+        ordered[description] = results.get(description, False)
+    results = ordered
+
     # Summary
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
-    
+
     print(f"\n{'='*60}")
     print("PIPELINE SUMMARY")
     print(f"{'='*60}")
-    
+
     success_count = sum(1 for v in results.values() if v)
     total_count = len(results)
-    
+
     for task, success in results.items():
         status = "✅ SUCCESS" if success else "❌ FAILED"
         print(f"{task:.<50} {status}")
-    
+
+    if not args.isolated:
+        http_summary = http_client.format_stats()
+        if http_summary:
+            print(f"\n{'-'*60}")
+            print("HTTP (per host)")
+            print(http_summary)
+        slowest = metrics.format_slowest()
+        if slowest:
+            print(f"\n{'-'*60}")
+            print("Slowest steps")
+            print(slowest)
+
+    try:
+        report_path, prom_path = metrics.write_report("pipeline", results)
+        print(f"\nMetrics: {os.path.relpath(report_path, BASE_DIR)}, {os.path.relpath(prom_path, BASE_DIR)}")
+    except OSError as e:
+        print(f"\n⚠️  Could not write metrics: {e}")
+
     print(f"\n{'='*60}")
     print(f"Completed: {success_count}/{total_count} tasks successful")
     print(f"Duration: {duration:.1f} seconds")
+    print(f"Peak memory: {metrics.peak_rss_mb():.0f} MB")
     print(f"Finished at: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
-    
+
     if success_count == total_count:
         print("🎉 All systems operational! Dashboard data is fresh.\n")
         print("📊 Open Web/index.html in your browser to view the dashboard.")
@@ -0,0 +1,234 @@
+"""
+Local time-series store (SQLite) shared by all fetchers.
+
+Observations are kept one row per (series key, date). A separate coverage table
+records which date range has already been downloaded for each key, so fetchers
+only need to request what comes after the last stored observation (plus a small
+revision window for late corrections).
+
+Keys: Banxico series use their SIE ID (e.g. 'SF43936'); Yahoo fields use
+'yahoo:<ticker>:<field>' with coverage tracked under 'yahoo:<ticker>'.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.environ.get('ALPHA_STORE_PATH', os.path.join(BASE_DIR, "data", "series_store.db"))
+
+# Set ALPHA_STORE=0 to always download the full range
+STORE_ENABLED = os.environ.get('ALPHA_STORE', '1') != '0'
+
+# Re-request this many days before the last stored observation (late revisions)
+REVISION_DAYS = int(os.environ.get('ALPHA_STORE_REVISION_DAYS', '5'))
+
+_WRITE_LOCK = threading.Lock()
+_initialized = set()
+
+
+def _connect(path=None):
+    path = path or STORE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS observations (
+                series_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                value REAL,
+                PRIMARY KEY (series_id, date)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS coverage (
+                series_id TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        _initialized.add(path)
+    return conn
+
+
+def _as_date(value):
+    """Normalize str/datetime/Timestamp to 'YYYY-MM-DD'"""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def get_coverage(keys, path=None):
+    """Returns {key: (start, end)} for the keys that have been downloaded before"""
+    keys = list(keys)
+    if not keys:
+        return {}
+    conn = _connect(path)
+    try:
+        placeholders = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT series_id, start, end FROM coverage WHERE series_id IN ({placeholders})", keys
+        ).fetchall()
+    finally:
+        conn.close()
+    return {key: (start, end) for key, start, end in rows}
+
+
+def last_observations(keys, path=None):
+    """
+    Returns {key: 'YYYY-MM-DD'} with the date of each key's last stored observation.
+    A coverage key such as 'yahoo:<ticker>' also matches its 'yahoo:<ticker>:<field>' rows.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    conn = _connect(path)
+    try:
+        last = {}
+        for key in keys:
+            # Range on the primary key instead of LIKE (':' + 1 is ';'), so the index is used
+            (date,) = conn.execute(
+                "SELECT MAX(date) FROM observations WHERE series_id = ? OR (series_id >= ? AND series_id < ?)",
+                (key, key + ":", key + ";")
+            ).fetchone()
+            if date is not None:
+                last[key] = date
+    finally:
+        conn.close()
+    return last
+
+
+def touches(start, end, cov_start, cov_end):
+    """True when start..end overlaps cov_start..cov_end or is adjacent to it (no gap between)"""
+    start, end, cov_start, cov_end = (pd.Timestamp(d) for d in (start, end, cov_start, cov_end))
+    return end + timedelta(days=1) >= cov_start and start - timedelta(days=1) <= cov_end
+
+
+def plan_fetch(keys, start_date, end_date, revision_days=None, path=None):
+    """
+    Decide where each key's download should start.
+    Returns {fetch_start: [keys]} ('YYYY-MM-DD'); keys already fully covered still get
+    a delta request from their last stored observation (minus the revision window) up to
+    end_date. Coverage runs up to the last request date, but monthly series such as INPC
+    are published weeks after the date they carry, so the delta is anchored on the data.
+    """
+    revision_days = REVISION_DAYS if revision_days is None else revision_days
+    start, end = _as_date(start_date), _as_date(end_date)
+    coverage = get_coverage(keys, path)
+    last = last_observations([key for key in keys if key in coverage], path)
+
+    plan = {}
+    for key in keys:
+        fetch_start = start
+        if key in coverage:
+            cov_start, cov_end = coverage[key]
+            # Delta only when the stored range reaches the requested start; a request that
+            # starts after a gap downloads its full range (mark_covered then replaces coverage)
+            # Covered but nothing stored (no data in range yet): keep the full request
+            if cov_start <= start and touches(start, end, cov_start, cov_end) and key in last:
+                anchor = min(last[key], cov_end)
+                delta_start = (pd.Timestamp(anchor) - timedelta(days=revision_days)).strftime('%Y-%m-%d')
+                fetch_start = max(start, min(delta_start, end))
+        plan.setdefault(fetch_start, []).append(key)
+    return plan
+
+
+def save(df, path=None):
+    """Upsert a wide DataFrame (DatetimeIndex x series keys). NaN cells are skipped."""
+    if df is None or df.empty:
+        return 0
+    long = df.stack().dropna()
+    if long.empty:
+        return 0
+    rows = [
+        (str(key), pd.Timestamp(date).strftime('%Y-%m-%d'), float(value))
+        for (date, key), value in long.items()
+    ]
+    with _WRITE_LOCK:
+        conn = _connect(path)
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO observations (series_id, date, value) VALUES (?, ?, ?)", rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    return len(rows)
+
+
+def mark_covered(keys, start_date, end_date, path=None):
+    """
+    Extend the downloaded range recorded for each key. A range that neither overlaps nor
+    touches the recorded one replaces it: coverage is one range and must not span a gap.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    start, end = _as_date(start_date), _as_date(end_date)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with _WRITE_LOCK:
+        conn = _connect(path)
+        try:
+            conn.executemany("""
+                INSERT INTO coverage (series_id, start, end, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(series_id) DO UPDATE SET
+                    start = CASE WHEN date(excluded.end, '+1 day') >= coverage.start
+                                  AND date(excluded.start, '-1 day') <= coverage.end
+                             THEN MIN(coverage.start, excluded.start) ELSE excluded.start END,
+                    end = CASE WHEN date(excluded.end, '+1 day') >= coverage.start
+                                AND date(excluded.start, '-1 day') <= coverage.end
+                           THEN MAX(coverage.end, excluded.end) ELSE excluded.end END,
+                    updated_at = excluded.updated_at
+            """, [(key, start, end, now) for key in keys])
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def forget(keys, path=None):
+    """Drop the stored observations and coverage of each key"""
+    keys = list(keys)
+    if not keys:
+        return
+    placeholders = ",".join("?" * len(keys))
+    with _WRITE_LOCK:
+        conn = _connect(path)
+        try:
+            conn.execute(f"DELETE FROM observations WHERE series_id IN ({placeholders})", keys)
+            conn.execute(f"DELETE FROM coverage WHERE series_id IN ({placeholders})", keys)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def load(keys, start_date=None, end_date=None, path=None):
+    """Returns a wide DataFrame indexed by Date with one column per key (in the given order)"""
+    keys = list(keys)
+    if not keys:
+        return pd.DataFrame()
+    query = f"SELECT series_id, date, value FROM observations WHERE series_id IN ({','.join('?' * len(keys))})"
+    params = list(keys)
+    if start_date is not None:
+        query += " AND date >= ?"
+        params.append(_as_date(start_date))
+    if end_date is not None:
+        query += " AND date <= ?"
+        params.append(_as_date(end_date))
+
+    conn = _connect(path)
+    try:
+        long = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+    if long.empty:
+        return pd.DataFrame()
+    df = long.pivot(index='date', columns='series_id', values='value')
+    df.index = pd.to_datetime(df.index)
+    df.index.name = 'Date'
+    df.columns.name = None
+    return df[[k for k in keys if k in df.columns]].sort_index()
@@ -0,0 +1,236 @@
+"""
+Static server for the Web dashboard (replaces `python -m http.server`).
+
+- One thread per connection, so a slow phone never blocks the other clients
+- gzip (and brotli, if the `brotli` package is installed) variants, compressed once
+  per file version and kept in a bounded in-memory LRU cache
+- Strong ETags and Last-Modified with 304 Not Modified revalidation
+- Per-path Cache-Control (manifest/HTML always revalidated, hashed sections immutable)
+- Access log with status, bytes, encoding and latency per request
+
+Usage:
+    python serve.py                      # serves Web/ on port 8080
+    python serve.py --port 9000 --directory docs
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WEB_DIR = os.path.join(BASE_DIR, "Web")
+
+PORT = int(os.environ.get('SERVE_PORT', '8080'))
+CACHE_MB = float(os.environ.get('SERVE_CACHE_MB', '64'))
+CLIENT_TIMEOUT = 30     # seconds before an idle/slow connection is dropped
+MIN_COMPRESS_BYTES = 512
+
+COMPRESSIBLE = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+# First match wins: (path prefix or suffix, Cache-Control)
+CACHE_RULES = [
+    ('/data/manifest.json', 'no-cache'),
+    ('/data/', 'no-cache'),
+    ('.html', 'no-cache'),
+    ('.js', 'public, max-age=300'),
+    ('.css', 'public, max-age=300'),
+]
+DEFAULT_CACHE = 'public, max-age=3600'
+# Section files requested with their content hash (?v=...) never change
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+
+class FileCache:
+    """Raw and compressed bodies per file version ((mtime, size)), LRU-bounded by bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, content_type):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry["version"] == version:
+                self.entries.move_to_end(path)
+                return entry
+
+        entry = self._build(path, version, stat.st_mtime, content_type)
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= old["bytes"]
+            self.entries[path] = entry
+            self.size += entry["bytes"]
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted["bytes"]
+        return entry
+
+    @staticmethod
+    def _build(path, version, mtime, content_type):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()[:20]
+        bodies = {"identity": raw}
+        if len(raw) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE):
+            bodies["gzip"] = gzip.compress(raw, compresslevel=6)
+            if brotli is not None:
+                bodies["br"] = brotli.compress(raw)
+        return {
+            "version": version,
+            "etag": digest,
+            "last_modified": formatdate(mtime, usegmt=True),
+            "mtime": int(mtime),
+            "bodies": bodies,
+            "bytes": sum(len(b) for b in bodies.values()),
+        }
+
+
+_cache = FileCache(int(CACHE_MB * 1024 * 1024))
+
+
+def cache_policy(url_path, query):
+    if url_path.startswith('/data/sections/') and 'v' in parse_qs(query):
+        return IMMUTABLE_CACHE
+    for pattern, policy in CACHE_RULES:
+        if url_path.startswith(pattern) or url_path.endswith(pattern):
+            return policy
+    return DEFAULT_CACHE
+
+
+def choose_encoding(accept_encoding, bodies):
+    accepted = {token.split(';')[0].strip() for token in (accept_encoding or '').split(',')}
+    for encoding in ("br", "gzip"):
+        if encoding in bodies and encoding in accepted:
+            return encoding
+    return "identity"
+
+
+class DashboardHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = CLIENT_TIMEOUT
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        started = time.monotonic()
+        url = urlsplit(self.path)
+        path = self.translate_path(url.path)
+        if os.path.isdir(path):
+            if not url.path.endswith('/'):
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", url.path + '/')
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                self._log_access(HTTPStatus.MOVED_PERMANENTLY, 0, "-", started)
+                return
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            self._log_access(HTTPStatus.NOT_FOUND, 0, "-", started)
+            return
+
+        content_type = self.guess_type(path)
+        entry = _cache.get(path, content_type)
+        encoding = choose_encoding(self.headers.get("Accept-Encoding"), entry["bodies"])
+        # Strong ETag per representation (compressed bytes differ from the raw ones)
+        etag = f'"{entry["etag"]}"' if encoding == "identity" else f'"{entry["etag"]}-{encoding}"'
+
+        if self._not_modified(etag, entry):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._common_headers(etag, entry, url)
+            self.end_headers()
+            self._log_access(HTTPStatus.NOT_MODIFIED, 0, encoding, started)
+            return
+
+        body = entry["bodies"][encoding]
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self._common_headers(etag, entry, url)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+        self._log_access(HTTPStatus.OK, len(body) if send_body else 0, encoding, started)
+
+    def _common_headers(self, etag, entry, url):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", entry["last_modified"])
+        self.send_header("Cache-Control", cache_policy(url.path, url.query))
+        self.send_header("Vary", "Accept-Encoding")
+
+    def _not_modified(self, etag, entry):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return etag in tags or '*' in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return entry["mtime"] <= int(parsedate_to_datetime(if_modified_since).timestamp())
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _log_access(self, status, size, encoding, started):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        sys.stderr.write(
+            f"{self.log_date_time_string()} {self.client_address[0]} "
+            f"\"{self.command} {self.path}\" {int(status)} {size} {encoding} {elapsed_ms:.1f}ms\n"
+        )
+
+    def log_request(self, code='-', size='-'):
+        # Requests are logged by _log_access (with latency); keep errors only
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alpha Dashboard static server")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--directory", default=WEB_DIR)
+    args = parser.parse_args()
+
+    directory = os.path.abspath(args.directory)
+
+    def handler(*a, **kw):
+        return DashboardHandler(*a, directory=directory, **kw)
+
+    server = ThreadingHTTPServer((args.bind, args.port), handler)
+    server.daemon_threads = True
+    print(f"Serving {directory} on http://{args.bind}:{args.port} "
+          f"(gzip{', br' if brotli is not None else ''}, cache {CACHE_MB:.0f} MB)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -58,11 +58,11 @@ echo ""
 echo "🚀 Servidor iniciado en el puerto $PORT..."
 echo ""
 
-# Start Python HTTP server
+# Start the dashboard server (threaded, gzip/brotli, ETag + Cache-Control)
 if command -v python3 &> /dev/null; then
-    python3 -m http.server $PORT
+    python3 "$DIR/serve.py" --port $PORT --directory "$DIR/Web"
 elif command -v python &> /dev/null; then
-    python -m SimpleHTTPServer $PORT
+    python "$DIR/serve.py" --port $PORT --directory "$DIR/Web"
 else
     echo "❌ Error: Python no encontrado"
     exit 1
@@ -19,10 +19,15 @@ echo "Access from: http://$LOCAL_IP:$PORT"
 echo "Logs: $LOG_FILE"
 
 # Start server in background with nohup
-nohup python3 -m http.server $PORT > "$LOG_FILE" 2>&1 &
+nohup python3 "$DIR/serve.py" --port $PORT --directory "$DIR/Web" > "$LOG_FILE" 2>&1 &
 
 # Save PID
 echo $! > "$DIR/server.pid"
 
 echo "✅ Server started (PID: $!)"
+
+# Live USD/MXN stream (SSE on port 8081) for the dashboard
+nohup python3 "$DIR/fx_stream.py" > "$DIR/logs/fx_stream.log" 2>&1 &
+echo $! > "$DIR/fx_stream.pid"
+echo "✅ FX stream started (PID: $!)"
 echo "To stop: ./stop_server.sh"
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for every entry point.
+
+Each entry point is imported (module top level only, main() is not run) in a fresh
+interpreter with `python -X importtime`. The report lists total import time and the
+heaviest top-level packages, and checks them against startup_budget.json:
+
+    "budget_ms":  import time limit (median of --repeat runs)
+    "forbidden":  packages that must not be imported at startup (e.g. matplotlib)
+
+The forbidden lists are the machine-independent part of the check; the millisecond
+budgets include headroom for slower machines.
+
+Usage:
+    python startup_budget.py              # report + check, exit 1 on a regression
+    python startup_budget.py --update     # rewrite budget_ms from this machine (+50%)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_PATH = os.path.join(BASE_DIR, "startup_budget.json")
+HEADROOM = 1.5
+TOP_PACKAGES = 5
+
+# Loads a script the way run_pipeline does: module code runs, main() does not
+IMPORT_SNIPPET = """
+import importlib.util, os, sys
+path = sys.argv[1]
+sys.path[:0] = [os.path.dirname(path), {base!r}]
+spec = importlib.util.spec_from_file_location("entry_point", path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Returns (total self time in ms, {directly imported package: cumulative ms},
+    set of every package imported at any depth)
+    """
+    total_us = 0
+    packages = {}
+    loaded = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        package = name.strip().split(".")[0]
+        loaded.add(package)
+        # Direct imports have no indentation; nested ones are indented by depth
+        if not name.startswith("  "):
+            packages[package] = packages.get(package, 0) + int(cumulative_us) / 1000
+    return total_us / 1000, packages, loaded
+
+
+def measure(script, repeat=3):
+    path = os.path.join(BASE_DIR, script)
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET.format(base=BASE_DIR), path],
+            capture_output=True, text=True, cwd=BASE_DIR,
+            env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"{script} failed to import:\n{result.stderr[-2000:]}")
+        runs.append(parse_importtime(result.stderr))
+    total_ms = statistics.median(run[0] for run in runs)
+    _, packages, loaded = runs[-1]
+    return total_ms, packages, loaded
+
+
+def load_budget():
+    with open(BUDGET_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets of the entry points")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point (median is used)")
+    parser.add_argument("--update", action="store_true", help="Rewrite budget_ms from this machine")
+    args = parser.parse_args()
+
+    budget = load_budget()
+    failures = []
+
+    print(f"{'ENTRY POINT':<42} {'IMPORT':>9} {'BUDGET':>9}  HEAVIEST PACKAGES")
+    print("-" * 110)
+    for script, rules in budget["entry_points"].items():
+        total_ms, packages, loaded = measure(script, args.repeat)
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]
+        limit = rules.get("budget_ms")
+        status = "✅"
+        if limit is not None and total_ms > limit:
+            status = "❌"
+            failures.append(f"{script}: {total_ms:.0f} ms > budget {limit:.0f} ms")
+        for package in rules.get("forbidden", []):
+            if package in loaded:
+                status = "❌"
+                failures.append(f"{script}: imports {package} at startup")
+        print(f"{status} {script:<40} {total_ms:>7.0f}ms {limit or 0:>7.0f}ms  "
+              + ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest))
+        if args.update:
+            rules["budget_ms"] = round(total_ms * HEADROOM, -1)
+
+    if args.update:
+        with open(BUDGET_PATH, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, indent=4)
+            f.write("\n")
+        print(f"\nBudgets updated in {BUDGET_PATH}")
+        return 0
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nAll entry points within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
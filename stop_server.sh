@@ -26,3 +26,14 @@ else
         echo "No server running on port 8080"
     fi
 fi
+
+# Live FX stream
+FX_PID_FILE="$DIR/fx_stream.pid"
+if [ -f "$FX_PID_FILE" ]; then
+    FX_PID=$(cat "$FX_PID_FILE")
+    if ps -p $FX_PID > /dev/null 2>&1; then
+        kill $FX_PID
+        echo "✅ FX stream stopped"
+    fi
+    rm "$FX_PID_FILE"
+fi
@@ -0,0 +1,222 @@
+"""
+Streaming (O(1) per bar) indicator state for the Risk Thermometer.
+
+RollingStats keeps a ring buffer plus Welford mean/M2 accumulators, so adding a
+value, dropping the oldest one or replacing the latest one never rescans the window.
+RiskIndicatorState chains three of them (20d Bollinger, 30d log-return volatility,
+volatility Z-score window) and can be saved to / loaded from JSON between runs.
+
+Pushing a bar with the same date as the last one replaces it, so intraday ticks can
+be streamed through update() without appending a new bar each time.
+"""
+
+import json
+import math
+import os
+from collections import deque
+
+import pandas as pd
+
+BB_WINDOW = 20
+BB_STD = 2
+VOL_WINDOW = 30
+VOL_Z_WINDOW = 252  # ~1 year of trading days
+ANNUALIZATION = math.sqrt(252) * 100
+STATE_VERSION = 1
+
+
+class RollingStats:
+    """Rolling mean / sample std over the last `window` values"""
+
+    def __init__(self, window, values=None):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        for value in values or []:
+            self.push(value)
+
+    def _add(self, x):
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, x):
+        n = len(self.values)
+        if n == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / n
+        self.m2 -= delta * (x - self.mean)
+        self.m2 = max(self.m2, 0.0)
+
+    def push(self, x):
+        self._add(x)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+
+    def pop_last(self):
+        """Undo the latest push (the evicted value, if any, is not restored)"""
+        x = self.values.pop()
+        self._remove(x)
+        return x
+
+    def replace_last(self, x):
+        self.pop_last()
+        self._add(x)
+
+    @property
+    def full(self):
+        return len(self.values) >= self.window
+
+    def std(self):
+        n = len(self.values)
+        return math.sqrt(self.m2 / (n - 1)) if n > 1 else float('nan')
+
+    def to_dict(self):
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        # Rebuilding from the stored values resets any floating point drift
+        return cls(data["window"], data["values"])
+
+
+class RiskIndicatorState:
+    """Bollinger bands, annualized volatility and its Z-score, updated bar by bar"""
+
+    def __init__(self):
+        self.closes = RollingStats(BB_WINDOW)
+        self.log_returns = RollingStats(VOL_WINDOW)
+        self.vols = RollingStats(VOL_Z_WINDOW)
+        self.last_date = None
+        self.last_close = None
+        self.prev_close = None  # close of the bar before last_date
+        self.last_vol = None
+        self.last = {}
+
+    def update(self, date, close, open_=None, high=None, low=None):
+        """
+        Push one bar (or a newer tick of the current bar) and return its indicator row.
+        Bars must arrive in date order.
+        """
+        date = pd.Timestamp(date).normalize()
+        same_bar = self.last_date is not None and date == self.last_date
+        if self.last_date is not None and date < self.last_date:
+            raise ValueError(f"Bar {date.date()} is older than state ({self.last_date.date()})")
+
+        if same_bar:
+            prev_close = self.prev_close
+        else:
+            prev_close = self.last_close
+
+        log_ret = math.log(close / prev_close) if prev_close else float('nan')
+
+        if same_bar:
+            self.closes.replace_last(close)
+            if not math.isnan(log_ret) and self.log_returns.values:
+                self.log_returns.replace_last(log_ret)
+            elif not math.isnan(log_ret):
+                self.log_returns.push(log_ret)
+        else:
+            self.closes.push(close)
+            if not math.isnan(log_ret):
+                self.log_returns.push(log_ret)
+            self.prev_close = self.last_close
+
+        sma = self.closes.mean if self.closes.full else float('nan')
+        std = self.closes.std() if self.closes.full else float('nan')
+        vol = self.log_returns.std() * ANNUALIZATION if self.log_returns.full else float('nan')
+
+        if not math.isnan(vol):
+            if same_bar and self.last_vol is not None and not math.isnan(self.last_vol):
+                self.vols.replace_last(vol)
+            else:
+                self.vols.push(vol)
+        vol_std = self.vols.std()
+        vol_z = (vol - self.vols.mean) / (vol_std + 1e-9) if not math.isnan(vol) else float('nan')
+
+        upper = sma + std * BB_STD
+        lower = sma - std * BB_STD
+        self.last_date = date
+        self.last_close = close
+        self.last_vol = vol
+        self.last = {
+            "Date": date,
+            "Open": open_ if open_ is not None else close,
+            "High": high if high is not None else close,
+            "Low": low if low is not None else close,
+            "Close": close,
+            "SMA_20": sma,
+            "STD_20": std,
+            "Upper_Band": upper,
+            "Lower_Band": lower,
+            "Log_Ret": log_ret,
+            "Volatility_30d": vol,
+            "Vol_Z_Score": vol_z,
+            "Band_Width": (upper - lower) / sma if sma else float('nan'),
+        }
+        return dict(self.last)
+
+    def update_frame(self, df):
+        """Stream an OHLC DataFrame (DatetimeIndex) through the state; returns the new rows"""
+        rows = [
+            self.update(date, row['Close'], row.get('Open'), row.get('High'), row.get('Low'))
+            for date, row in df.iterrows()
+        ]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).set_index('Date')
+
+    @classmethod
+    def from_frame(cls, df):
+        state = cls()
+        state.update_frame(df)
+        return state
+
+    def to_dict(self):
+        return {
+            "version": STATE_VERSION,
+            "closes": self.closes.to_dict(),
+            "log_returns": self.log_returns.to_dict(),
+            "vols": self.vols.to_dict(),
+            "last_date": self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            "last_close": self.last_close,
+            "prev_close": self.prev_close,
+            "last_vol": self.last_vol,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != STATE_VERSION:
+            raise ValueError("Unsupported state version")
+        state = cls()
+        state.closes = RollingStats.from_dict(data["closes"])
+        state.log_returns = RollingStats.from_dict(data["log_returns"])
+        state.vols = RollingStats.from_dict(data["vols"])
+        state.last_date = pd.Timestamp(data["last_date"]) if data["last_date"] else None
+        state.last_close = data["last_close"]
+        state.prev_close = data["prev_close"]
+        state.last_vol = data["last_vol"]
+        return state
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Returns the saved state, or None if missing/unreadable"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except Exception as e:
+            print(f"Could not load indicator state: {e}")
+            return None
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Parallel threshold sweeps for the dashboard signals.
+
+    alpha   Alpha Decision thresholds (backtest.py): carry spread and vol Z-score cutoffs.
+            Each combination is backtested over the stored carry trade / risk history.
+    stocks  US Stocks Radar signal (indicators.signal): SMA buffer and RSI bounds.
+            Every daily signal over the stored close history is scored by the next
+            --horizon days' return (COMPRAR/SOBREVENTA long, VENDER/SOBRECOMPRA short).
+
+The input arrays are computed once and placed in shared memory
+(multiprocessing.shared_memory). Pool workers map them as read-only NumPy views, so
+nothing but the parameter tuples and result rows crosses process boundaries, and the
+sweep scales with the number of cores.
+
+Outputs (ALPHA_SWEEP_DIR, default data/sweeps/): sweep_<target>.csv with every
+combination ranked, and sweep_<target>.png, a heatmap of the best score for the first
+two grid parameters.
+
+Usage:
+    python sweep.py alpha
+    python sweep.py alpha --grid long_spread=300:700:50,short_vol_z=1.5:3:0.5 --rank total_return
+    python sweep.py stocks --years 10 --horizon 20 --workers 32
+"""
+
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import indicators
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SWEEP_DIR = os.environ.get('ALPHA_SWEEP_DIR', os.path.join(BASE_DIR, "data", "sweeps"))
+CHUNKS_PER_WORKER = 8
+
+# parameter: (start, stop, step), stop inclusive; the current value is always part of the grid
+GRIDS = {
+    "alpha": {
+        "long_spread": (300, 700, 25),
+        "long_max_vol_z": (0.5, 2.5, 0.25),
+        "short_spread": (200, 500, 25),
+        "short_vol_z": (1.0, 3.0, 0.25),
+    },
+    "stocks": {
+        "sma_buffer": (0.0, 0.05, 0.005),
+        "rsi_high": (60, 90, 2.5),
+        "rsi_low": (10, 40, 2.5),
+    },
+}
+CURRENT = {
+    "alpha": {
+        "long_spread": backtest.LONG_SPREAD_BP,
+        "long_max_vol_z": backtest.LONG_MAX_VOL_Z,
+        "short_spread": backtest.SHORT_SPREAD_BP,
+        "short_vol_z": backtest.SHORT_VOL_Z,
+    },
+    "stocks": {
+        "sma_buffer": indicators.SMA_BUFFER,
+        "rsi_high": indicators.RSI_HIGH,
+        "rsi_low": indicators.RSI_LOW,
+    },
+}
+RANK_BY = {"alpha": "sharpe", "stocks": "mean_return_bp"}
+BULLISH = ("COMPRAR", "SOBREVENTA")
+BEARISH = ("VENDER", "SOBRECOMPRA")
+
+# Worker side: shared arrays attached once per process
+_blocks = []
+_data = {}
+_options = {}
+
+
+def parse_grid(text, target):
+    """'name=start:stop:step,...' overrides on top of the default grid"""
+    grid = dict(GRIDS[target])
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, _, spec = item.partition("=")
+        if name not in grid:
+            raise ValueError(f"Unknown {target} parameter {name!r} (choose from {', '.join(grid)})")
+        values = [float(v) for v in spec.split(":")]
+        grid[name] = tuple(values) if len(values) == 3 else (values[0], values[0], 1)
+    return grid
+
+
+def grid_values(start, stop, step):
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [round(start + i * step, 10) for i in range(max(count, 1))]
+
+
+def combinations(grid, current):
+    axes = []
+    for name, spec in grid.items():
+        values = grid_values(*spec)
+        if current.get(name) is not None and spec[0] <= current[name] <= spec[1] and current[name] not in values:
+            values = sorted(values + [current[name]])
+        axes.append(values)
+    return [dict(zip(grid, combo)) for combo in itertools.product(*axes)]
+
+
+def share(arrays):
+    """Copy arrays into shared memory blocks; returns (blocks, specs for attach())"""
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach(specs, options):
+    """
+    Pool initializer: read-only views of the parent's shared arrays. Pool workers share
+    the parent's resource tracker, so the blocks are unlinked once, by the parent.
+    """
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _blocks.append(block)
+        view = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        _data[name] = view
+    _options.update(options)
+
+
+def evaluate_alpha(params):
+    signal = backtest.signals(_data["spread"], _data["vol_z"], **params)
+    sim = backtest.simulate(_data, signal, use_stops=_options["use_stops"], cost_bp=_options["cost_bp"])
+    summary = backtest.summarize(_data, sim)
+    return dict(params, **{key: summary[key] for key in (
+        "sharpe", "total_return", "annual_return", "max_drawdown", "hit_rate", "trades", "stops_hit", "exposure")})
+
+
+def evaluate_stocks(params):
+    labels = indicators.signal(_data["sma_fast"], _data["sma_slow"], _data["rsi"], **params)
+    direction = np.where(np.isin(labels, BULLISH), 1.0, np.where(np.isin(labels, BEARISH), -1.0, 0.0))
+    forward = _data["forward"]
+    scored = (direction != 0) & ~np.isnan(forward)
+    returns = direction[scored] * forward[scored]
+    count = int(scored.sum())
+    return dict(params, signals=count,
+                hit_rate=float((returns > 0).mean()) if count else 0.0,
+                mean_return_bp=float(returns.mean() * 10000) if count else 0.0,
+                long_share=float((direction[scored] > 0).mean()) if count else 0.0)
+
+
+def evaluate_chunk(args):
+    target, chunk = args
+    evaluate = evaluate_alpha if target == "alpha" else evaluate_stocks
+    return [evaluate(params) for params in chunk]
+
+
+def load_alpha_inputs(args):
+    from utils import read_table
+
+    carry, risk = read_table(backtest.CARRY_PATH), read_table(backtest.RISK_PATH)
+    if carry.empty or risk.empty:
+        raise RuntimeError("Carry trade or risk data missing; run the pillars first")
+    data = backtest.align(carry, risk)
+    return data, f"{len(data['close'])} FX days"
+
+
+def load_stocks_inputs(args):
+    from datetime import datetime, timedelta
+    from run_pipeline import load_module
+    from utils import get_yahoo_history
+
+    us_stocks = load_module(os.path.join(BASE_DIR, "5_US_Stocks", "us_stocks.py"))
+    end = datetime.now() + timedelta(days=1)
+    history = get_yahoo_history(us_stocks.TICKERS, end - timedelta(days=int(365.25 * args.years)), end)
+    if history.empty or 'Close' not in history.columns.get_level_values(0):
+        raise RuntimeError("No stored Yahoo history for the US stocks")
+    panel = indicators.compute_panel(history['Close'])
+    values = panel["values"]
+    forward = np.full(values.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward[:-args.horizon] = values[args.horizon:] / values[:-args.horizon] - 1.0
+    data = {"sma_fast": panel["sma_fast"], "sma_slow": panel["sma_slow"], "rsi": panel["rsi"], "forward": forward}
+    return data, f"{values.shape[0]} days x {values.shape[1]} tickers"
+
+
+def draw_heatmap(fig, pivot):
+    ax = fig.subplots()
+    image = ax.imshow(pivot.to_numpy(dtype=float), origin='lower', aspect='auto', cmap='RdYlGn')
+    ax.set_xticks(range(len(pivot.columns)))
+    ax.set_xticklabels([f"{v:g}" for v in pivot.columns], rotation=45, fontsize=8)
+    ax.set_yticks(range(len(pivot.index)))
+    ax.set_yticklabels([f"{v:g}" for v in pivot.index], fontsize=8)
+    ax.set_xlabel(pivot.columns.name)
+    ax.set_ylabel(pivot.index.name)
+    ax.set_title(f"Best {pivot.attrs.get('score', 'score')} per cell")
+    fig.colorbar(image, ax=ax)
+    fig.tight_layout()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel threshold sweep for the dashboard signals")
+    parser.add_argument("target", choices=sorted(GRIDS))
+    parser.add_argument("--grid", help="Overrides, e.g. long_spread=300:700:50,short_vol_z=2 (start:stop:step)")
+    parser.add_argument("--rank", help="Result column to rank by (alpha: sharpe; stocks: mean_return_bp)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top", type=int, default=15, help="Rows of the ranking to print")
+    parser.add_argument("--min-trades", type=int, default=5, help="alpha: ignore combinations with fewer trades")
+    parser.add_argument("--no-stops", action="store_true", help="alpha: backtest without stop-losses")
+    parser.add_argument("--cost-bp", type=float, default=0.0, help="alpha: cost per side in bp")
+    parser.add_argument("--years", type=float, default=10, help="stocks: years of close history")
+    parser.add_argument("--horizon", type=int, default=20, help="stocks: days of forward return per signal")
+    parser.add_argument("--output", default=SWEEP_DIR, help="Directory for the CSV and heatmap")
+    args = parser.parse_args()
+
+    target = args.target
+    grid = parse_grid(args.grid, target)
+    combos = combinations(grid, CURRENT[target])
+    rank = args.rank or RANK_BY[target]
+
+    data, description = (load_alpha_inputs if target == "alpha" else load_stocks_inputs)(args)
+    options = {"use_stops": not args.no_stops, "cost_bp": args.cost_bp}
+    workers = max(1, min(args.workers, len(combos)))
+    size = max(1, math.ceil(len(combos) / (workers * CHUNKS_PER_WORKER)))
+    chunks = [(target, combos[i:i + size]) for i in range(0, len(combos), size)]
+    print(f"Sweeping {len(combos)} {target} combinations over {description} on {workers} worker(s)...")
+
+    started = time.perf_counter()
+    blocks, specs = share(data)
+    try:
+        with Pool(workers, initializer=attach, initargs=(specs, options)) as pool:
+            rows = [row for chunk in pool.imap_unordered(evaluate_chunk, chunks) for row in chunk]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    elapsed = time.perf_counter() - started
+    print(f"Done in {elapsed:.1f}s ({len(combos) / elapsed:.0f} combinations/s)")
+
+    results = pd.DataFrame(rows)
+    if rank not in results:
+        raise ValueError(f"Unknown rank column {rank!r} (choose from {', '.join(results.columns[len(grid):])})")
+    eligible = results["trades"] >= args.min_trades if target == "alpha" else results["signals"] > 0
+    results = pd.concat([results[eligible].sort_values(rank, ascending=False), results[~eligible]])
+    results.insert(0, "rank", np.where(np.arange(len(results)) < eligible.sum(), np.arange(1, len(results) + 1), 0))
+
+    current = CURRENT[target]
+    is_current = np.logical_and.reduce([np.isclose(results[name], value) for name, value in current.items()])
+    os.makedirs(args.output, exist_ok=True)
+    csv_path = os.path.join(args.output, f"sweep_{target}.csv")
+    results.to_csv(csv_path, index=False)
+
+    pd.set_option('display.width', 200)
+    print(f"\nTop {args.top} by {rank}:")
+    print(results.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    if is_current.any():
+        print("\nCurrent thresholds:")
+        print(results[is_current].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+    x_name, y_name = list(grid)[:2]
+    best = results[results["rank"] > 0]
+    if len(grid) >= 2 and not best.empty:
+        import charts
+
+        pivot = best.pivot_table(index=y_name, columns=x_name, values=rank, aggfunc='max')
+        pivot.attrs["score"] = rank
+        png_path = os.path.join(args.output, f"sweep_{target}.png")
+        charts.wait([charts.render_async(png_path, draw_heatmap, pivot)])
+        print(f"\nHeatmap: {png_path}")
+    print(f"Results: {csv_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import pandas as pd
+
+import backfill
+import series_store
+
+
+def test_monthly_series_picks_up_its_next_release_after_a_backfill(tmp_path):
+    path = str(tmp_path / "store.db")
+    windows = backfill.split_windows("2024-01-01", "2026-11-09", years=2)
+    # Backfill finished on 2026-11-09; INPC's last published value is dated 2026-09-01
+    inpc = pd.DataFrame({"SP30578": [140.1, 140.5, 141.0]},
+                        index=pd.to_datetime(["2024-01-01", "2026-08-01", "2026-09-01"]))
+    series_store.save(inpc, path)
+    backfill.record([("SP30578", block, start, end, backfill.DONE, 3, None) for block, start, end in windows], path)
+
+    complete, gaps = backfill.finish_coverage(["SP30578"], "2024-01-01", "2026-11-09", windows, path)
+
+    assert (complete, gaps) == (["SP30578"], [])
+    assert series_store.get_coverage(["SP30578"], path) == {"SP30578": ("2024-01-01", "2026-09-01")}
+    # The next pillar run asks for everything after September, so October's release arrives
+    plan = series_store.plan_fetch(["SP30578"], "2025-11-10", "2026-11-10", revision_days=5, path=path)
+    assert plan == {"2026-08-27": ["SP30578"]}
+
+
+def test_windows_do_not_depend_on_the_run_date():
+    today = backfill.split_windows("2006-10-18", "2026-10-17", years=2)
+    tomorrow = backfill.split_windows("2006-10-19", "2026-10-18", years=2)
+
+    assert [w[0] for w in today] == [w[0] for w in tomorrow]
+    assert today[1:-1] == tomorrow[1:-1]
@@ -0,0 +1,57 @@
+import pandas as pd
+
+import series_store
+
+
+def test_monthly_series_delta_starts_at_last_observation(tmp_path):
+    path = str(tmp_path / "store.db")
+    # INPC is dated the 1st and published ~40 days later: the daily runs covered up to
+    # 2026-11-08, but the last value stored is September's
+    inpc = pd.DataFrame({"SP30578": [140.1, 140.5, 141.0]},
+                        index=pd.to_datetime(["2026-07-01", "2026-08-01", "2026-09-01"]))
+    series_store.save(inpc, path)
+    series_store.mark_covered(["SP30578"], "2025-01-01", "2026-11-08", path)
+
+    plan = series_store.plan_fetch(["SP30578"], "2025-11-09", "2026-11-09", revision_days=5, path=path)
+
+    assert plan == {"2026-08-27": ["SP30578"]}
+
+
+def test_daily_series_delta_starts_before_last_observation(tmp_path):
+    path = str(tmp_path / "store.db")
+    rates = pd.DataFrame({"SF43936": [7.1, 7.2]}, index=pd.to_datetime(["2026-11-05", "2026-11-06"]))
+    series_store.save(rates, path)
+    series_store.mark_covered(["SF43936"], "2025-01-01", "2026-11-08", path)
+
+    plan = series_store.plan_fetch(["SF43936"], "2025-11-09", "2026-11-09", revision_days=5, path=path)
+
+    assert plan == {"2026-11-01": ["SF43936"]}
+
+
+def test_yahoo_coverage_key_uses_field_observations(tmp_path):
+    path = str(tmp_path / "store.db")
+    bars = pd.DataFrame({"yahoo:AAPL:Close": [230.0], "yahoo:AAPL2:Close": [1.0]},
+                        index=pd.to_datetime(["2026-11-06"]))
+    bars.loc[pd.Timestamp("2026-11-07"), "yahoo:AAPL2:Close"] = 1.1
+    series_store.save(bars, path)
+
+    assert series_store.last_observations(["yahoo:AAPL", "yahoo:MSFT"], path) == {"yahoo:AAPL": "2026-11-06"}
+
+
+def test_covered_without_observations_requests_full_range(tmp_path):
+    path = str(tmp_path / "store.db")
+    series_store.mark_covered(["SF1"], "2025-01-01", "2026-11-08", path)
+
+    assert series_store.plan_fetch(["SF1"], "2025-11-09", "2026-11-09", path=path) == {"2025-11-09": ["SF1"]}
+
+
+def test_disjoint_coverage_is_replaced_not_merged(tmp_path):
+    path = str(tmp_path / "store.db")
+    series_store.mark_covered(["A", "B"], "2020-01-01", "2021-01-01", path)
+    series_store.mark_covered(["A"], "2023-01-01", "2026-01-01", path)  # gap
+    series_store.mark_covered(["B"], "2021-01-02", "2022-01-01", path)  # adjacent
+
+    assert series_store.get_coverage(["A", "B"], path) == {
+        "A": ("2023-01-01", "2026-01-01"),
+        "B": ("2020-01-01", "2022-01-01"),
+    }
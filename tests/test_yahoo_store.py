@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+import series_store
+import utils
+
+DATES = pd.bdate_range("2026-01-01", "2026-11-06")
+
+
+def fake_download(calls, closes):
+    """yf_download stand-in serving closes[ticker] (a Series), recording each request"""
+    def download(tickers, start=None, end=None, **kwargs):
+        calls.append((tuple(tickers), str(pd.Timestamp(start).date())))
+        frames = {}
+        for ticker in tickers:
+            close = closes[ticker]
+            close = close[(close.index >= pd.Timestamp(start)) & (close.index < pd.Timestamp(end))]
+            bars = pd.DataFrame({field: close for field in ("Open", "High", "Low", "Close")})
+            bars["Volume"] = 1.0
+            frames[ticker] = bars
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    return download
+
+
+def setup_store(monkeypatch, tmp_path, closes):
+    calls = []
+    monkeypatch.setattr(series_store, "STORE_PATH", str(tmp_path / "store.db"))
+    monkeypatch.setattr(series_store, "STORE_ENABLED", True)
+    monkeypatch.setattr(utils, "yf_download", fake_download(calls, closes))
+    return calls
+
+
+def test_moved_intraday_close_does_not_refetch(monkeypatch, tmp_path):
+    closes = {"AAA": pd.Series(np.linspace(100, 200, len(DATES)), index=DATES)}
+    calls = setup_store(monkeypatch, tmp_path, closes)
+    utils.get_yahoo_history(["AAA"], "2026-01-01", "2026-11-07")
+
+    # Same history; only today's (still trading) bar has moved
+    closes["AAA"] = closes["AAA"].copy()
+    closes["AAA"].iloc[-1] *= 1.01
+    df = utils.get_yahoo_history(["AAA"], "2026-01-01", "2026-11-07")
+
+    assert len(calls) == 2 and calls[1][1] != "2026-01-01"  # full, then delta only
+    assert df[("Close", "AAA")].iloc[-1] == closes["AAA"].iloc[-1]
+
+
+def test_rescaled_history_is_downloaded_again(monkeypatch, tmp_path):
+    closes = {"AAA": pd.Series(np.linspace(100, 200, len(DATES)), index=DATES),
+              "BBB": pd.Series(np.linspace(50, 60, len(DATES)), index=DATES)}
+    calls = setup_store(monkeypatch, tmp_path, closes)
+    utils.get_yahoo_history(["AAA", "BBB"], "2026-01-01", "2026-11-07")
+
+    closes["AAA"] = closes["AAA"] / 10  # 10:1 split re-scales all earlier bars
+    df = utils.get_yahoo_history(["AAA", "BBB"], "2026-01-01", "2026-11-07")
+
+    assert calls[-1] == (("AAA",), "2026-01-01")
+    close = df[("Close", "AAA")]
+    assert close.iloc[0] == 10.0 and (close.pct_change().abs() < 0.5).iloc[1:].all()
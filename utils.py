@@ -1,8 +1,21 @@
-import requests
 import pandas as pd
+import ast
 import os
+import threading
 from datetime import datetime
 
+import http_client
+import metrics
+import series_store
+
+# Pillar outputs are Arrow IPC (Feather v2) files; set ALPHA_EXPORT_CSV=1 to also write CSV copies
+EXPORT_CSV = os.environ.get('ALPHA_EXPORT_CSV', '0') == '1'
+
+# Pillars may run concurrently in one process (run_pipeline.py).
+# Older yfinance releases keep module-level download state, so downloads are
+# serialized through this lock. (Charts use the thread-safe Figure API, see charts.py.)
+YF_LOCK = threading.Lock()
+
 # Centralized Token - Set BANXICO_TOKEN environment variable
 # Get your free token from: https://www.banxico.org.mx/SieAPIRest/service/v1/
 BANXICO_TOKEN = os.environ.get('BANXICO_TOKEN')
@@ -10,49 +23,370 @@ if not BANXICO_TOKEN:
     print("⚠️  WARNING: BANXICO_TOKEN environment variable not set!")
     print("   Get your token from: https://www.banxico.org.mx/SieAPIRest/service/v1/")
 
-def get_banxico_series(series_id, start_date=None, end_date=None, description="Data"):
+# Base URLs can point at a local stand-in (fake_upstream.py) for offline runs and benchmarks
+SIE_BASE_URL = os.environ.get('SIE_BASE_URL', "https://www.banxico.org.mx/SieAPIRest/service/v1")
+# When set, Yahoo history is read from <YAHOO_BASE_URL>/v8/finance/chart directly instead of yfinance
+YAHOO_BASE_URL = os.environ.get('YAHOO_BASE_URL', '').rstrip('/')
+# SIE accepts up to 20 comma-separated series IDs per request
+SIE_MAX_SERIES_PER_REQUEST = 20
+
+
+def _parse_sie_series(series_data, description):
+    """Turn one entry of bmx.series into a single-column DataFrame indexed by Date"""
+    records = []
+    for d in series_data.get('datos', []):
+        try:
+            val = float(d['dato'].replace(',', ''))
+            date = d['fecha']
+            records.append({'Date': date, description: val})
+        except ValueError:
+            # Handle cases where value might be 'N/E'
+            continue
+
+    df = pd.DataFrame(records)
+    if not df.empty:
+        df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
+        df.set_index('Date', inplace=True)
+        df.sort_index(inplace=True)
+        df = df[~df.index.duplicated(keep='last')]
+    return df
+
+
+def _fetch_banxico_batch(series_ids, start_date=None, end_date=None):
     """
-    Fetches historical data for a given series ID.
-    If dates are not provided, it fetches 'oportuno' (latest).
-    Returns a Pandas DataFrame with 'Date' and 'Value'.
+    Downloads series straight from SIE (no local store), 20 IDs per request.
+    Returns (wide DataFrame with one column per series ID, set of IDs SIE answered for).
     """
     headers = {
         "Bmx-Token": BANXICO_TOKEN,
         "Accept": "application/json"
     }
 
-    if start_date and end_date:
-        url = f"https://www.banxico.org.mx/SieAPIRest/service/v1/series/{series_id}/datos/{start_date}/{end_date}"
+    frames = {}
+    answered = set()
+    for i in range(0, len(series_ids), SIE_MAX_SERIES_PER_REQUEST):
+        chunk = series_ids[i:i + SIE_MAX_SERIES_PER_REQUEST]
+        ids = ",".join(chunk)
+        if start_date and end_date:
+            url = f"{SIE_BASE_URL}/series/{ids}/datos/{start_date}/{end_date}"
+        else:
+            url = f"{SIE_BASE_URL}/series/{ids}/datos/oportuno"
+
+        try:
+            with metrics.span("fetch", source="banxico", series=ids):
+                response = http_client.get(url, headers=headers)
+                response.raise_for_status()
+                data = response.json()
+        except Exception as e:
+            print(f"Error fetching {ids}: {e}")
+            continue
+
+        returned = {s.get('idSerie'): s for s in data.get('bmx', {}).get('series', [])}
+        for sid in chunk:
+            series_data = returned.get(sid)
+            if not series_data:
+                print(f"No data found for {sid}")
+                continue
+            answered.add(sid)
+            with metrics.span("parse", series=sid):
+                df = _parse_sie_series(series_data, sid)
+            if not df.empty:
+                frames[sid] = df
+
+    dfs = [frames[sid] for sid in series_ids if sid in frames]
+    if not dfs:
+        return pd.DataFrame(), answered
+    return pd.concat(dfs, axis=1).sort_index(), answered
+
+
+def get_banxico_series_batch(series_ids, start_date=None, end_date=None, names=None, use_store=True):
+    """
+    Fetches several series in one SIE request per chunk of 20 IDs.
+    names: list aligned with series_ids or dict {series_id: column name}; defaults to the IDs.
+    If dates are not provided, it fetches 'oportuno' (latest).
+    With a date range, the local series store is consulted first and only the range after
+    the last stored observation (plus a revision window) is downloaded.
+    Returns one wide DataFrame indexed by Date with one column per series that returned data.
+    """
+    series_ids = list(series_ids)
+    if names is None:
+        names = {sid: sid for sid in series_ids}
+    elif not isinstance(names, dict):
+        names = dict(zip(series_ids, names))
+
+    df = None
+    if start_date and end_date and use_store and series_store.STORE_ENABLED:
+        try:
+            plan = series_store.plan_fetch(series_ids, start_date, end_date)
+            for fetch_start, keys in plan.items():
+                if fetch_start != series_store._as_date(start_date):
+                    print(f"Banxico {','.join(keys)}: delta from {fetch_start}")
+                fetched, answered = _fetch_banxico_batch(keys, fetch_start, end_date)
+                series_store.save(fetched)
+                series_store.mark_covered(answered, fetch_start, end_date)
+            df = series_store.load(series_ids, start_date, end_date)
+        except Exception as e:
+            print(f"Series store unavailable ({e}), downloading full range")
+            df = None
+
+    if df is None:
+        df, _ = _fetch_banxico_batch(series_ids, start_date, end_date)
+
+    if df.empty:
+        return pd.DataFrame()
+    return df.rename(columns=names)
+
+
+def get_banxico_series(series_id, start_date=None, end_date=None, description="Data"):
+    """
+    Fetches historical data for a given series ID.
+    If dates are not provided, it fetches 'oportuno' (latest).
+    Returns a Pandas DataFrame with 'Date' and 'Value'.
+    """
+    return get_banxico_series_batch([series_id], start_date, end_date, {series_id: description})
+
+def yf_download(tickers, start=None, end=None, auto_adjust=True, **kwargs):
+    """Thread-safe wrapper around yfinance.download (chart API client when YAHOO_BASE_URL is set)"""
+    if YAHOO_BASE_URL:
+        return yahoo_chart_download(tickers, start, end, auto_adjust=auto_adjust)
+    import yfinance as yf
+    label = tickers if isinstance(tickers, str) else ",".join(tickers)
+    with YF_LOCK, metrics.span("fetch", source="yahoo", ticker=label):
+        return yf.download(tickers, start=start, end=end, auto_adjust=auto_adjust, **kwargs)
+
+
+YAHOO_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+# Relative difference between a re-downloaded and a stored adjusted close that means Yahoo
+# re-scaled the history (split or dividend) and the stored rows are stale
+YAHOO_RESCALE_TOLERANCE = 1e-4
+
+
+def yahoo_chart(ticker, start=None, end=None, interval='1d', period=None, auto_adjust=True):
+    """
+    One ticker from the Yahoo chart API at YAHOO_BASE_URL (what yfinance calls under the hood).
+    Either start/end (end exclusive) or a period such as '1d'.
+    Returns OHLCV columns indexed by tz-naive timestamps (empty DataFrame on errors).
+    """
+    params = {"interval": interval, "includeAdjustedClose": "true"}
+    if period:
+        params["range"] = period
     else:
-        url = f"https://www.banxico.org.mx/SieAPIRest/service/v1/series/{series_id}/datos/oportuno"
+        params["period1"] = int(pd.Timestamp(start).timestamp())
+        params["period2"] = int(pd.Timestamp(end).timestamp()) if end else int(datetime.now().timestamp())
+    url = f"{YAHOO_BASE_URL}/v8/finance/chart/{ticker}"
+    try:
+        with metrics.span("fetch", source="yahoo", ticker=ticker):
+            response = http_client.get(url, params=params)
+            response.raise_for_status()
+            result = response.json()["chart"]["result"][0]
+    except Exception as e:
+        print(f"Error fetching {ticker} chart: {e}")
+        return pd.DataFrame()
+
+    with metrics.span("parse", ticker=ticker):
+        return _parse_yahoo_chart(result, auto_adjust)
+
+
+def _parse_yahoo_chart(result, auto_adjust):
+    quote = result.get("indicators", {}).get("quote", [{}])[0]
+    if not result.get("timestamp"):
+        return pd.DataFrame()
+    df = pd.DataFrame({field: quote.get(field.lower()) for field in YAHOO_FIELDS},
+                      index=pd.to_datetime(result["timestamp"], unit='s'), dtype=float)
+    adjclose = result["indicators"].get("adjclose")
+    if auto_adjust and adjclose:
+        ratio = pd.Series(adjclose[0]["adjclose"], index=df.index, dtype=float) / df['Close']
+        for field in ('Open', 'High', 'Low', 'Close'):
+            df[field] = df[field] * ratio
+    return df.dropna(subset=['Close'])
+
+
+def yahoo_chart_download(tickers, start, end, auto_adjust=True):
+    """yf.download(group_by='column')-shaped frame, (field, ticker) columns, from the chart API"""
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    frames = {ticker: yahoo_chart(ticker, start, end, auto_adjust=auto_adjust) for ticker in tickers}
+    frames = {ticker: df for ticker, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+def _normalize_yahoo_frame(raw, tickers):
+    """Always return (field, ticker) MultiIndex columns with a tz-naive daily index"""
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+    with metrics.span("parse", ticker=",".join(tickers)):
+        return _normalize_yahoo_columns(raw, tickers)
+
+
+def _normalize_yahoo_columns(raw, tickers):
+    df = raw.copy()
+    if not isinstance(df.columns, pd.MultiIndex):
+        df.columns = pd.MultiIndex.from_product([df.columns, [tickers[0]]])
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index = df.index.normalize()
+    df.index.name = 'Date'
+    return df
+
+
+def _yahoo_store_frame(df, tickers):
+    """(field, ticker) frame -> wide frame keyed 'yahoo:<ticker>:<field>' for the series store"""
+    return pd.DataFrame({
+        f"yahoo:{ticker}:{field}": df[(field, ticker)]
+        for field, ticker in df.columns
+        if field in YAHOO_FIELDS and ticker in tickers
+    })
+
+
+def _rescaled_tickers(wide, tickers):
+    """
+    Tickers whose re-downloaded closes differ from the stored ones on the overlapping days.
+    Prices are split/dividend adjusted, so Yahoo re-scales all earlier history after such an
+    event and the stored rows no longer line up with new ones. The last stored bar may have
+    been saved while its session was still trading, so only the bars before it are compared.
+    """
+    keys = [f"yahoo:{t}:Close" for t in tickers if f"yahoo:{t}:Close" in wide]
+    if not keys:
+        return []
+    fresh = wide[keys]
+    stored = series_store.load(keys, fresh.index.min(), fresh.index.max())
+    rescaled = []
+    for key in keys:
+        if key not in stored:
+            continue
+        both = pd.concat([fresh[key], stored[key]], axis=1, keys=['fresh', 'stored']).dropna()
+        both = both[both.index < stored[key].last_valid_index()]
+        diff = (both['fresh'] / both['stored'] - 1).abs()
+        if not both.empty and diff.max() > YAHOO_RESCALE_TOLERANCE:
+            rescaled.append(key.split(':')[1])
+    return rescaled
+
+
+def get_yahoo_history(tickers, start_date, end_date, use_store=True):
+    """
+    Daily OHLCV history from Yahoo Finance for one or more tickers.
+    All tickers that need the same date range are fetched in one threaded yf.download call.
+    The local series store is consulted first; only the missing tail is downloaded. When the
+    re-downloaded revision window disagrees with the stored closes (a split or dividend
+    re-scaled the adjusted history), that ticker's stored history is replaced by a full download.
+    Returns a DataFrame with (field, ticker) MultiIndex columns, like yf.download.
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    tickers = list(tickers)
+    s_start = series_store._as_date(start_date)
+    s_end = series_store._as_date(end_date)
+
+    if not (use_store and series_store.STORE_ENABLED):
+        raw = yf_download(tickers, start=s_start, end=s_end, progress=False, group_by='column', auto_adjust=True)
+        return _normalize_yahoo_frame(raw, tickers)
 
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        series_data = data['bmx']['series'][0]
-        if 'datos' in series_data:
-            records = []
-            for d in series_data['datos']:
-                try:
-                    val = float(d['dato'])
-                    date = d['fecha']
-                    records.append({'Date': date, description: val})
-                except ValueError:
-                    # Handle cases where value might be 'N/E'
-                    continue
-            
-            df = pd.DataFrame(records)
-            if not df.empty:
-                df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
-                df.set_index('Date', inplace=True)
-                df.sort_index(inplace=True)
-            return df
-        else:
-            print(f"No data found for {series_id}")
-            return pd.DataFrame()
-            
+        coverage_keys = {f"yahoo:{t}": t for t in tickers}
+        plan = series_store.plan_fetch(list(coverage_keys), s_start, s_end)
+        for fetch_start, keys in plan.items():
+            group = [coverage_keys[k] for k in keys]
+            if fetch_start != s_start:
+                print(f"Yahoo {','.join(group)}: delta from {fetch_start}")
+            raw = yf_download(group, start=fetch_start, end=s_end, progress=False, group_by='column', auto_adjust=True)
+            df = _normalize_yahoo_frame(raw, group)
+            if df.empty:
+                continue
+            wide = _yahoo_store_frame(df, group)
+            if fetch_start != s_start:
+                rescaled = _rescaled_tickers(wide, group)
+                if rescaled:
+                    print(f"Yahoo {','.join(rescaled)}: adjusted history changed, re-downloading from {s_start}")
+                    series_store.forget([f"yahoo:{t}:{field}" for t in rescaled for field in YAHOO_FIELDS]
+                                        + [f"yahoo:{t}" for t in rescaled])
+                    raw = yf_download(rescaled, start=s_start, end=s_end, progress=False, group_by='column', auto_adjust=True)
+                    full = _yahoo_store_frame(_normalize_yahoo_frame(raw, rescaled), rescaled)
+                    series_store.save(full)
+                    fetched = [t for t in rescaled if f"yahoo:{t}:Close" in full and full[f"yahoo:{t}:Close"].notna().any()]
+                    series_store.mark_covered([f"yahoo:{t}" for t in fetched], s_start, s_end)
+                    group = [t for t in group if t not in rescaled]
+                    wide = wide[[c for c in wide.columns if c.split(':')[1] in group]]
+            series_store.save(wide)
+            fetched = [t for t in group if f"yahoo:{t}:Close" in wide and wide[f"yahoo:{t}:Close"].notna().any()]
+            series_store.mark_covered([f"yahoo:{t}" for t in fetched], fetch_start, s_end)
+
+        keys = {f"yahoo:{t}:{field}": (field, t) for field in YAHOO_FIELDS for t in tickers}
+        stored = series_store.load(list(keys), s_start, s_end)
     except Exception as e:
-        print(f"Error fetching {series_id}: {e}")
+        print(f"Series store unavailable ({e}), downloading full range")
+        raw = yf_download(tickers, start=s_start, end=s_end, progress=False, group_by='column', auto_adjust=True)
+        return _normalize_yahoo_frame(raw, tickers)
+
+    if stored.empty:
         return pd.DataFrame()
+    # yfinance treats end as exclusive
+    stored = stored[stored.index < pd.Timestamp(s_end)]
+    stored.columns = pd.MultiIndex.from_tuples([keys[c] for c in stored.columns])
+    return stored
+
+
+def write_table(df, path, index=True):
+    """
+    Save a pillar output as <path>.arrow (uncompressed Arrow IPC, dtypes, list columns and
+    DatetimeIndex preserved). Also writes <path>.csv when ALPHA_EXPORT_CSV=1.
+    The file is written to a temp name and renamed, so readers never see a partial file.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    with metrics.span("write", table=os.path.basename(path)):
+        table = pa.Table.from_pandas(df, preserve_index=index)
+        arrow_path = f"{path}.arrow"
+        tmp_path = f"{arrow_path}.tmp"
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, arrow_path)
+
+        if EXPORT_CSV:
+            df.to_csv(f"{path}.csv", index=index)
+    return arrow_path
+
+
+def read_table(path, index=True):
+    """
+    Load a pillar output written by write_table (memory-mapped).
+    Falls back to <path>.csv for outputs produced before the Arrow handoff.
+    List columns come back as Python lists. Returns an empty DataFrame if nothing exists.
+    """
+    arrow_path = f"{path}.arrow"
+    if os.path.exists(arrow_path):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        table = feather.read_table(arrow_path, memory_map=True)
+        list_columns = [f.name for f in table.schema if pa.types.is_list(f.type) or pa.types.is_large_list(f.type)]
+        df = table.to_pandas()
+        for name in list_columns:
+            df[name] = table.column(name).to_pylist()
+        return df
+
+    csv_path = f"{path}.csv"
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path, index_col=0 if index else None, parse_dates=index)
+        if 'price_history' in df.columns:
+            df['price_history'] = df['price_history'].apply(
+                lambda x: ast.literal_eval(x) if pd.notna(x) and isinstance(x, str) else x
+            )
+        return df
+    return pd.DataFrame()
+
+
+def table_version(path):
+    """
+    (file, mtime_ns, size) of the file read_table(path) would load, or None if missing.
+    Used as a cache key: it changes whenever a pillar writes a new output.
+    """
+    for candidate in (f"{path}.arrow", f"{path}.csv"):
+        try:
+            stat = os.stat(candidate)
+        except OSError:
+            continue
+        return (candidate, stat.st_mtime_ns, stat.st_size)
+    return None